@@ -0,0 +1,25 @@
+"""Benchmarks for the login service.
+
+Importing this package points the service at a throwaway SQLite database and
+supplies the secrets ``Settings`` requires, so it must be imported before
+anything from ``login``. Run scripts from the repository root, for example
+``python -m benchmarks.bench_users_me``.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+_DB_DIR = tempfile.mkdtemp(prefix="login-bench-")
+os.environ.setdefault("JWT_SECRET", "benchmark-jwt-secret-0123456789abcdef")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("ADMIN_PASSWORD", "admin-password")
+# Load tests hammer the credential endpoints from a single client address,
+# and for a single user: coalescing would turn the repeated forgot-password
+# and request-verify calls into no-ops instead of timing the send path.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+os.environ.setdefault("EMAIL_COALESCE_ENABLED", "False")
@@ -0,0 +1,135 @@
+"""Throughput and latency of the auth endpoints registered by ``create_app``.
+
+Drives login, register, /users/me, forgot-password and request-verify-token at
+each concurrency level, in-process through ``httpx.ASGITransport`` and over
+TCP against a uvicorn subprocess. Both run against the benchmark SQLite
+database, and emails are delivered to a stub SMTP server, so no external
+services are needed.
+
+The report is one JSON document with the package versions and one entry per
+mode, endpoint and concurrency level; compare two reports with
+``python -m benchmarks.compare``.
+
+Usage: ``python -m benchmarks.bench_auth [--mode in-process|uvicorn]
+[--endpoint NAME] [--concurrency 1 10 50] [--requests N] [--output FILE]``
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import uuid
+
+from benchmarks.common import app_client, environment, run_load, uvicorn_client
+from benchmarks.stub_smtp import StubSMTPServer
+from login.main import create_app
+
+PASSWORD = "bench-password"
+
+
+def endpoints(email: str, token: str, run: str) -> dict[str, dict]:
+    """Request specs per endpoint for an existing user ``email``."""
+    return {
+        "login": {
+            "method": "POST",
+            "url": "/auth/jwt/login",
+            "data": {"username": email, "password": PASSWORD},
+        },
+        "register": {
+            "method": "POST",
+            "url": "/auth/register",
+            # A fresh address per request, across warm-up and every level.
+            "request_factory": lambda i: {
+                "json": {
+                    "email": f"{run}-{uuid.uuid4().hex[:12]}@example.com",
+                    "password": PASSWORD,
+                }
+            },
+        },
+        "users-me": {
+            "method": "GET",
+            "url": "/users/me",
+            "headers": {"Authorization": f"Bearer {token}"},
+        },
+        "forgot-password": {
+            "method": "POST",
+            "url": "/auth/forgot-password",
+            "json": {"email": email},
+        },
+        "request-verify-token": {
+            "method": "POST",
+            "url": "/auth/request-verify-token",
+            "json": {"email": email},
+        },
+    }
+
+
+ENDPOINTS = tuple(endpoints("", "", ""))
+
+
+async def bench_client(client, mode: str, args) -> list[dict]:
+    run = f"{mode}-{uuid.uuid4().hex[:8]}"
+    email = f"{run}@example.com"
+    response = await client.post(
+        "/auth/register", json={"email": email, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    response = await client.post(
+        "/auth/jwt/login", data={"username": email, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    specs = endpoints(email, response.json()["access_token"], run)
+
+    results = []
+    for name in args.endpoint or ENDPOINTS:
+        for concurrency in args.concurrency:
+            spec = dict(specs[name])
+            method, url = spec.pop("method"), spec.pop("url")
+            # Warm up pools and caches so the first level is not penalized.
+            await run_load(client, method, url, requests=5, concurrency=1, **spec)
+            result = await run_load(
+                client,
+                method,
+                url,
+                requests=args.requests,
+                concurrency=concurrency,
+                **spec,
+            )
+            results.append({"mode": mode, "endpoint": name, **result})
+            print(json.dumps(results[-1]), flush=True)
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("in-process", "uvicorn"), action="append")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, action="append")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "results": []}
+    with StubSMTPServer() as smtp:
+        os.environ["SMTP_HOST"] = smtp.host
+        os.environ["SMTP_PORT"] = str(smtp.port)
+        for mode in args.mode or ("in-process", "uvicorn"):
+            if mode == "in-process":
+                async with app_client(create_app()) as client:
+                    results = await bench_client(client, mode, args)
+            else:
+                async with uvicorn_client(args.port) as client:
+                    results = await bench_client(client, mode, args)
+            report["results"].extend(results)
+        report["environment"]["emails_delivered"] = len(smtp.state.messages)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""Cold-start time of the login service.
+
+Two measurements, each in fresh interpreters so nothing is already imported:
+
+* ``import``: seconds to ``import login.main`` (the cost every worker would
+  pay without preloading);
+* ``first_request``: seconds from launching ``python -m login.server`` with
+  ``--workers N`` until ``/health`` answers, for each worker count.
+
+Usage: ``python -m benchmarks.bench_cold_start [--workers 1 2 4] [--runs N]
+[--output FILE]``
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import environment
+
+SRC = Path(__file__).parent.parent / "src"
+
+
+def subprocess_env() -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def import_time() -> float:
+    code = (
+        "import time; started = time.perf_counter(); import login.main; "
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=subprocess_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def first_request_time(port: int, workers: int, timeout: float = 60.0) -> float:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "login.server",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env=subprocess_env(),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                if (
+                    process.poll() is not None
+                    or time.perf_counter() - started > timeout
+                ):
+                    raise RuntimeError("login.server did not become healthy")
+                time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summarize(timings: list[float]) -> dict:
+    return {
+        "runs": len(timings),
+        "median_s": round(statistics.median(timings), 4),
+        "min_s": round(min(timings), 4),
+        "max_s": round(max(timings), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = [
+        {"scenario": "import", **summarize([import_time() for _ in range(args.runs)])}
+    ]
+    for workers in args.workers:
+        timings = [first_request_time(args.port, workers) for _ in range(args.runs)]
+        results.append(
+            {"scenario": "first_request", "workers": workers, **summarize(timings)}
+        )
+    report = {"environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Per-request dependency-resolution overhead and import cost of the auth wiring.
+
+Three measurements:
+
+* ``routes``: microseconds per request for routes that depend on nothing, on
+  ``get_jwt_strategy``, on ``get_user_manager`` (which opens a session but
+  runs no query) and on both, driven straight through the ASGI interface so
+  no HTTP client or network is timed. Routes take turns over ``--runs``
+  rounds of ``--requests`` requests and the median round is reported;
+  ``overhead_us`` is the difference from the dependency-free route.
+* ``calls``: microseconds per direct call of the dependencies and of
+  ``Settings()``.
+* ``import``: seconds to import ``login.auth`` and ``login.main`` in fresh
+  interpreters (``--runs`` each), and how many ``Settings`` objects each
+  import builds.
+
+``settings_built`` counts ``Settings`` instances created per request or call.
+The script only uses names that predate the lifespan service container, so it
+can be run on commits from before and after it for comparison.
+
+Usage: ``python -m benchmarks.bench_dependencies [--requests N] [--runs N]
+[--output FILE]``
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from fastapi import Depends, FastAPI
+
+from benchmarks.common import environment
+
+SRC = Path(__file__).parent.parent / "src"
+
+IMPORT_CODE = """
+import time
+from login.config import Settings
+built = 0
+init = Settings.__init__
+def counting_init(self, *args, **kwargs):
+    global built
+    built += 1
+    init(self, *args, **kwargs)
+Settings.__init__ = counting_init
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started, built)
+"""
+
+
+class SettingsCounter:
+    """Counts ``Settings`` instances built while installed."""
+
+    def __init__(self) -> None:
+        from login.config import Settings
+
+        self.settings_class = Settings
+        self.original_init = Settings.__init__
+        self.built = 0
+
+    def __enter__(self) -> "SettingsCounter":
+        original_init = self.original_init
+
+        def counting_init(settings, *args, **kwargs):
+            self.built += 1
+            original_init(settings, *args, **kwargs)
+
+        self.settings_class.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.settings_class.__init__ = self.original_init
+
+
+def subprocess_env() -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    return env
+
+
+def import_cost(module: str, runs: int) -> dict:
+    seconds = []
+    built = 0
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_CODE.format(module=module)],
+            env=subprocess_env(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        elapsed, built = result.stdout.strip().splitlines()[-1].split()
+        seconds.append(float(elapsed))
+    return {
+        "module": module,
+        "median_s": round(statistics.median(seconds), 4),
+        "min_s": round(min(seconds), 4),
+        "settings_built": int(built),
+    }
+
+
+def bench_app() -> FastAPI:
+    from login.auth import get_jwt_strategy, get_user_manager
+
+    app = FastAPI()
+
+    @app.get("/none")
+    async def no_dependencies() -> None:
+        return None
+
+    @app.get("/strategy")
+    async def strategy(strategy=Depends(get_jwt_strategy)) -> None:
+        return None
+
+    @app.get("/user-manager")
+    async def user_manager(user_manager=Depends(get_user_manager)) -> None:
+        return None
+
+    @app.get("/both")
+    async def both(
+        strategy=Depends(get_jwt_strategy),
+        user_manager=Depends(get_user_manager),
+    ) -> None:
+        return None
+
+    return app
+
+
+async def call(app: FastAPI, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"{path} answered {status}")
+
+
+async def route_costs(requests: int, rounds: int) -> list[dict]:
+    """Median cost per route over ``rounds`` interleaved rounds of requests."""
+    from userdb import db
+
+    app = bench_app()
+    paths = ("/none", "/strategy", "/user-manager", "/both")
+    samples: dict[str, list[float]] = {path: [] for path in paths}
+    built = dict.fromkeys(paths, 0)
+    async with db.lifespan():
+        db.DBState.engine.sync_engine.echo = False
+        for path in paths:
+            for _ in range(min(requests, 200)):
+                await call(app, path)
+        for _ in range(rounds):
+            for path in paths:
+                with SettingsCounter() as counter:
+                    started = time.perf_counter()
+                    for _ in range(requests):
+                        await call(app, path)
+                    elapsed = time.perf_counter() - started
+                samples[path].append(elapsed / requests * 1e6)
+                built[path] += counter.built
+    baseline = statistics.median(samples["/none"])
+    return [
+        {
+            "route": path,
+            "us_per_request": round(statistics.median(samples[path]), 2),
+            "overhead_us": round(statistics.median(samples[path]) - baseline, 2),
+            "settings_built": built[path] / (requests * rounds),
+        }
+        for path in paths
+    ]
+
+
+async def call_costs(calls: int) -> list[dict]:
+    from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+    from userdb.models import User
+
+    from login.auth import get_jwt_strategy, get_user_manager
+    from login.config import Settings
+
+    if "user_db" in inspect.signature(get_user_manager).parameters:
+        manager_args = {"user_db": SQLAlchemyUserDatabase(None, User)}
+    else:
+        manager_args = {"session": None}
+
+    results = []
+    for name, function, kwargs in (
+        ("get_jwt_strategy()", get_jwt_strategy, {}),
+        ("get_user_manager()", get_user_manager, manager_args),
+        ("Settings()", Settings, {}),
+    ):
+        with SettingsCounter() as counter:
+            started = time.perf_counter()
+            for _ in range(calls):
+                await resolve(function(**kwargs))
+            elapsed = time.perf_counter() - started
+        results.append(
+            {
+                "call": name,
+                "us_per_call": round(elapsed / calls * 1e6, 2),
+                "settings_built": counter.built / calls,
+            }
+        )
+    return results
+
+
+async def resolve(value):
+    """The value a dependency provides, whether it returns, awaits or yields."""
+    if inspect.isasyncgen(value):
+        return await value.__anext__()
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = {
+        "environment": environment(),
+        "import": [import_cost(m, args.runs) for m in ("login.auth", "login.main")],
+        "calls": await call_costs(args.requests),
+        "routes": await route_costs(args.requests, args.runs),
+    }
+    for section in ("import", "calls", "routes"):
+        for result in report[section]:
+            print(json.dumps({"section": section, **result}))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
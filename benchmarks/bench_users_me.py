@@ -0,0 +1,78 @@
+"""Compare /users/me throughput across token strategies.
+
+Scenarios:
+
+* ``baseline`` - plain tokens, no user cache: one user query per request.
+* ``user-cache`` - plain tokens served through the in-process user cache.
+* ``claims`` - claims tokens on /users/me (the route still needs the user).
+* ``claims-only`` - claims tokens on ``/auth/check``, which only needs an
+  active user and is authorized by ``current_active_claims`` without a
+  database read.
+* ``not-modified`` - plain tokens through the user cache, sending the ETag of
+  the previous response in ``If-None-Match``; every response is a 304.
+
+Usage: ``python -m benchmarks.bench_users_me [--requests N] [--concurrency C]``
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from benchmarks.common import app_client, register_and_login, run_load
+from login.main import create_app
+
+SCENARIOS = {
+    "baseline": {"cache": False, "claims": False, "url": "/users/me"},
+    "user-cache": {"cache": True, "claims": False, "url": "/users/me"},
+    "claims": {"cache": True, "claims": True, "url": "/users/me"},
+    "claims-only": {"cache": True, "claims": True, "url": "/auth/check"},
+    "not-modified": {
+        "cache": True,
+        "claims": False,
+        "url": "/users/me",
+        "conditional": True,
+    },
+}
+
+
+async def run_scenario(name: str, requests: int, concurrency: int) -> dict:
+    scenario = SCENARIOS[name]
+    os.environ["USER_CACHE_ENABLED"] = str(scenario["cache"])
+    os.environ["JWT_EMBED_CLAIMS"] = str(scenario["claims"])
+    app = create_app()
+
+    async with app_client(app) as client:
+        token = await register_and_login(client, "users-me@example.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        if scenario.get("conditional"):
+            response = await client.get(scenario["url"], headers=headers)
+            headers["If-None-Match"] = response.headers["ETag"]
+        # Warm up caches and connection pools before measuring.
+        await run_load(
+            client, "GET", scenario["url"], requests=50, concurrency=1, headers=headers
+        )
+        result = await run_load(
+            client,
+            "GET",
+            scenario["url"],
+            requests=requests,
+            concurrency=concurrency,
+            headers=headers,
+        )
+    return {"scenario": name, **result}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    args = parser.parse_args()
+    for name in args.scenario or SCENARIOS:
+        result = await run_scenario(name, args.requests, args.concurrency)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
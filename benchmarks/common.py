@@ -0,0 +1,154 @@
+"""Shared helpers for the benchmark scripts."""
+
+import asyncio
+import logging
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from importlib import metadata
+
+import httpx
+from fastapi import FastAPI
+from userdb import db
+
+PACKAGES = ("fastapi", "fastapi-users", "beanone-userdb", "sqlalchemy", "pwdlib")
+
+# The service logs at INFO; per-request client logs would flood the output.
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def environment() -> dict:
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+@asynccontextmanager
+async def app_client(app: FastAPI):
+    """Run the app lifespan and yield an in-process HTTP client for it."""
+    async with app.router.lifespan_context(app):
+        # userdb creates its engine with echo=True; SQL logging would
+        # dominate every measurement.
+        db.DBState.engine.sync_engine.echo = False
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            yield client
+
+
+async def register_and_login(
+    client: httpx.AsyncClient, email: str, password: str = "bench-password"
+) -> str:
+    """Create a user (if needed) and return a bearer token for it."""
+    response = await client.post(
+        "/auth/register", json={"email": email, "password": password}
+    )
+    if response.status_code not in (201, 400):  # 400: already registered
+        response.raise_for_status()
+    response = await client.post(
+        "/auth/jwt/login", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_load(  # noqa: PLR0913
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    requests: int,
+    concurrency: int,
+    request_factory: Callable[[int], dict] | None = None,
+    **request_kwargs,
+) -> dict:
+    """Issue ``requests`` calls with ``concurrency`` workers and summarize them.
+
+    ``request_factory(i)`` can supply per-request keyword arguments (for
+    example a unique email per registration) instead of ``request_kwargs``.
+    """
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for i in remaining:
+            kwargs = request_factory(i) if request_factory else request_kwargs
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "method": method,
+        "url": url,
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "status": dict(statuses),
+    }
+
+
+@asynccontextmanager
+async def uvicorn_client(port: int, workers: int = 1, timeout: float = 30.0):
+    """Serve the app with uvicorn in a subprocess and yield a TCP client for it.
+
+    The server inherits this process's environment, so it uses the same
+    database and SMTP settings as the in-process runs.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.serve",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if process.returncode is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become healthy")
+                await asyncio.sleep(0.1)
+            yield client
+    finally:
+        process.terminate()
+        await process.wait()
@@ -0,0 +1,45 @@
+"""Compare two ``bench_auth`` reports.
+
+Prints the requests/sec and p99 change for every mode, endpoint and
+concurrency level present in both, and exits with status 1 if any throughput
+dropped by more than ``--threshold`` (default 10%).
+
+Usage: ``python -m benchmarks.compare BASELINE.json CANDIDATE.json``
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict[tuple, dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {(r["mode"], r["endpoint"], r["concurrency"]): r for r in report["results"]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    baseline, candidate = load(args.baseline), load(args.candidate)
+
+    regressed = False
+    print(f"{'mode':<11}{'endpoint':<22}{'conc':>5}{'rps':>18}{'p99 ms':>20}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        change = (new["rps"] - old["rps"]) / old["rps"] if old["rps"] else 0.0
+        regressed |= change < -args.threshold
+        mode, endpoint, concurrency = key
+        print(
+            f"{mode:<11}{endpoint:<22}{concurrency:>5}"
+            f"{old['rps']:>9.1f} {change:>+7.1%}"
+            f"{old['p99_ms']:>10.1f} -> {new['p99_ms']:<7.1f}"
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
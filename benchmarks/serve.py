@@ -0,0 +1,49 @@
+"""Run the login app under uvicorn for benchmarks.
+
+Same as ``uvicorn login.main:app`` except that the SQL echo userdb enables is
+switched off once the engine exists. Usage:
+``python -m benchmarks.serve [--port 8001] [--workers 1]``
+"""
+
+import argparse
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI
+from userdb import db
+
+from login.main import create_app
+
+
+def create_bench_app() -> FastAPI:
+    app = create_app()
+    lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def quiet_lifespan(app: FastAPI):
+        async with lifespan(app):
+            db.DBState.engine.sync_engine.echo = False
+            yield
+
+    app.router.lifespan_context = quiet_lifespan
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run(
+        "benchmarks.serve:create_bench_app",
+        factory=True,
+        host="127.0.0.1",
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Minimal in-process SMTP relay shared by the benchmarks and the tests.
+
+Speaks just enough ESMTP (EHLO/HELO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP,
+QUIT) for ``smtplib`` to deliver messages, and records what it receives.
+"""
+
+import socketserver
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ReceivedMessage:
+    mail_from: str
+    rcpt_to: list[str]
+    data: bytes
+
+
+@dataclass
+class _ServerState:
+    messages: list[ReceivedMessage] = field(default_factory=list)
+    connections: int = 0
+    logins: int = 0
+    # Drop the session after this many messages on it (0 disables).
+    disconnect_after: int = 0
+    # Reply 550 to RCPT for these addresses.
+    reject_rcpt: set[str] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    server: "_ThreadingSMTPServer"
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:  # noqa: PLR0912
+        state = self.server.state
+        with state.lock:
+            state.connections += 1
+        sent_on_session = 0
+        mail_from, rcpt_to = "", []
+        self.reply("220 stub ESMTP ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode().rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            arg = line[len(verb) + 1 :]
+            if verb == "EHLO":
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "HELO":
+                self.reply("250 stub")
+            elif verb == "AUTH":
+                with state.lock:
+                    state.logins += 1
+                self.reply("235 authenticated")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = arg.split(":", 1)[1].strip("<> "), []
+                self.reply("250 ok")
+            elif verb == "RCPT":
+                address = arg.split(":", 1)[1].strip("<> ")
+                if address in state.reject_rcpt:
+                    self.reply("550 mailbox unavailable")
+                else:
+                    rcpt_to.append(address)
+                    self.reply("250 ok")
+            elif verb == "DATA":
+                self.reply("354 end with .")
+                data = b""
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data += chunk
+                with state.lock:
+                    state.messages.append(ReceivedMessage(mail_from, rcpt_to, data))
+                self.reply("250 queued")
+                sent_on_session += 1
+                if state.disconnect_after and sent_on_session >= state.disconnect_after:
+                    return
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 ok")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.state = _ServerState()
+
+
+class StubSMTPServer:
+    """Context manager running the stub relay on an ephemeral local port."""
+
+    def __init__(self) -> None:
+        self._server = _ThreadingSMTPServer()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def state(self) -> _ServerState:
+        return self._server.state
+
+    def __enter__(self) -> "StubSMTPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
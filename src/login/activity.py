@@ -0,0 +1,249 @@
+"""Write-behind login activity tracking.
+
+Updating a row on every login would add a write to the hottest endpoint.
+Instead ``on_after_login`` calls :meth:`ActivityTracker.record`, which only
+touches an in-memory dict keyed by user: repeated logins of one user between
+flushes coalesce into a single entry holding the latest time and IP and the
+number of logins. A background task started from the application lifespan
+writes all pending entries to ``login_activity`` in one bulk upsert every
+``flush_interval`` seconds, and once more on shutdown.
+
+What a crash can lose is bounded by the flush interval and by ``max_pending``
+users: when the buffer is full the flush runs early, and logins of further
+users are dropped (and counted) until it has room again. Entries whose flush
+fails transiently are put back and retried with the next flush.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from userdb import db
+
+from .config import Settings
+from .models import LoginActivity
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PendingLogin:
+    """Logins of one user not yet written."""
+
+    count: int
+    last_login_at: float
+    last_login_ip: str | None
+
+
+def _upsert_statement(dialect: str):
+    """An ``INSERT ... ON CONFLICT`` adding to existing rows, if supported."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    table = LoginActivity.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            "last_login_at": stmt.excluded.last_login_at,
+            "last_login_ip": stmt.excluded.last_login_ip,
+            "login_count": table.c.login_count + stmt.excluded.login_count,
+        },
+    )
+
+
+class ActivityTracker:
+    """Buffers logins per user and flushes them in bulk upserts."""
+
+    enabled: bool = True
+    flush_interval: float = 5.0
+    max_pending: int = 10_000
+
+    def __init__(self) -> None:
+        self._pending: dict[uuid.UUID, PendingLogin] = {}
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush = 0.0
+
+    def configure(self, settings: Settings) -> None:
+        self.enabled = settings.login_activity_enabled
+        self.flush_interval = settings.login_activity_flush_seconds
+        self.max_pending = settings.login_activity_max_pending
+
+    def record(
+        self, user_id: uuid.UUID, ip: str | None = None, at: float | None = None
+    ) -> None:
+        """Note a successful login; never blocks or touches the database."""
+        if not self.enabled:
+            return
+        at = time.time() if at is None else at
+        entry = self._pending.get(user_id)
+        if entry is not None:
+            entry.count += 1
+            entry.last_login_at = max(entry.last_login_at, at)
+            entry.last_login_ip = ip
+        elif len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            self._wake.set()
+            return
+        else:
+            self._pending[user_id] = PendingLogin(1, at, ip)
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+        self.recorded += 1
+
+    async def flush(self, session: AsyncSession) -> int:
+        """Write every pending entry; returns the number of users written."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        rows = [
+            {
+                "user_id": user_id,
+                "last_login_at": entry.last_login_at,
+                "last_login_ip": entry.last_login_ip,
+                "login_count": entry.count,
+            }
+            for user_id, entry in batch.items()
+        ]
+        try:
+            await self._write(session, rows)
+            written = len(rows)
+        except IntegrityError:
+            # A user was deleted before their activity was written.
+            await session.rollback()
+            written = await self._write_one_by_one(session, rows)
+        except Exception:
+            await session.rollback()
+            self._restore(batch)
+            raise
+        self.written += written
+        self.flushes += 1
+        self.last_flush = time.time()
+        return written
+
+    async def _write(self, session: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        upsert = _upsert_statement(session.get_bind().dialect.name)
+        if upsert is not None:
+            await session.execute(upsert, rows)
+        else:
+            await self._update_or_insert(session, rows)
+        await session.commit()
+
+    async def _update_or_insert(
+        self, session: AsyncSession, rows: list[dict[str, Any]]
+    ) -> None:
+        table = LoginActivity.__table__
+        existing = set(
+            (
+                await session.execute(
+                    select(table.c.user_id).where(
+                        table.c.user_id.in_([row["user_id"] for row in rows])
+                    )
+                )
+            ).scalars()
+        )
+        updates = [
+            {**row, "b_user_id": row["user_id"]}
+            for row in rows
+            if row["user_id"] in existing
+        ]
+        inserts = [row for row in rows if row["user_id"] not in existing]
+        if updates:
+            await session.execute(
+                update(table)
+                .where(table.c.user_id == bindparam("b_user_id"))
+                .values(
+                    last_login_at=bindparam("last_login_at"),
+                    last_login_ip=bindparam("last_login_ip"),
+                    login_count=table.c.login_count + bindparam("login_count"),
+                ),
+                updates,
+                execution_options={"synchronize_session": False},
+            )
+        if inserts:
+            await session.execute(insert(table), inserts)
+
+    async def _write_one_by_one(
+        self, session: AsyncSession, rows: list[dict[str, Any]]
+    ) -> int:
+        written = 0
+        for row in rows:
+            try:
+                await self._write(session, [row])
+                written += 1
+            except IntegrityError:
+                await session.rollback()
+                self.dropped += row["login_count"]
+        return written
+
+    def _restore(self, batch: dict[uuid.UUID, PendingLogin]) -> None:
+        """Merge a failed batch back in front of logins recorded since."""
+        for user_id, entry in batch.items():
+            newer = self._pending.get(user_id)
+            if newer is not None:
+                newer.count += entry.count
+            elif len(self._pending) < self.max_pending:
+                self._pending[user_id] = entry
+            else:
+                self.dropped += entry.count
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="login-activity-flush")
+
+    async def stop(self) -> None:
+        """Stop the background task and write whatever is still pending."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._flush_logged()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._flush_logged()
+
+    async def _flush_logged(self) -> None:
+        try:
+            async with db.DBState.async_session_maker() as session:
+                await self.flush(session)
+        except Exception:
+            logger.exception("Login activity flush failed")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending_users": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush": self.last_flush,
+        }
+
+
+activity = ActivityTracker()
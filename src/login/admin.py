@@ -0,0 +1,151 @@
+"""Administrative endpoints, restricted to active superusers.
+
+User listings page by keyset on the unique, indexed ``email`` column: each page
+starts strictly after the last email of the previous one, so deep pages cost
+the same as the first. Exports stream rows from a server-side cursor and
+never hold more than one fetch batch in memory.
+"""
+
+import csv
+import io
+import json
+import uuid
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from userdb.models import User
+
+from .auth import current_superuser, get_user_manager
+from .bulk_import import BulkUserImporter, iter_lines, iter_rows
+from .db_routing import get_read_session, replica
+
+EXPORT_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.is_active,
+    User.is_verified,
+    User.is_superuser,
+)
+EXPORT_BATCH_SIZE = 1000
+
+
+class UserFilter(BaseModel):
+    email_prefix: str | None = None
+    is_active: bool | None = None
+    is_verified: bool | None = None
+    is_superuser: bool | None = None
+
+    def apply(self, query: Select) -> Select:
+        if self.email_prefix:
+            prefix = User.email.startswith(self.email_prefix, autoescape=True)
+            query = query.where(prefix)
+        for name in ("is_active", "is_verified", "is_superuser"):
+            value = getattr(self, name)
+            if value is not None:
+                query = query.where(getattr(User, name) == value)
+        return query
+
+
+class AdminUser(BaseModel):
+    id: uuid.UUID
+    email: str
+    full_name: str | None
+    is_active: bool
+    is_verified: bool
+    is_superuser: bool
+
+
+class UserPage(BaseModel):
+    items: list[AdminUser]
+    next_after: str | None
+
+
+async def _export_rows(
+    query: Select, format: Literal["ndjson", "csv"]
+) -> AsyncIterator[str]:
+    names = [column.key for column in EXPORT_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        writer.writerow(names)
+        yield buffer.getvalue()
+    async with replica.session() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in partition:
+                if format == "csv":
+                    writer.writerow(row)
+                else:
+                    values = dict(zip(names, row, strict=True))
+                    values["id"] = str(values["id"])
+                    buffer.write(json.dumps(values) + "\n")
+            yield buffer.getvalue()
+
+
+def get_admin_router() -> APIRouter:
+    """Router for ``/admin`` endpoints."""
+    router = APIRouter(dependencies=[Depends(current_superuser)])
+
+    @router.get("/users", response_model=UserPage)
+    async def list_users(
+        filters: UserFilter = Depends(),
+        after: str | None = Query(default=None, description="Last email seen"),
+        limit: int = Query(default=100, ge=1, le=1000),
+        session: AsyncSession = Depends(get_read_session),
+    ) -> UserPage:
+        """List users by email, ``limit`` at a time.
+
+        Pass the previous page's ``next_after`` as ``after`` to continue.
+        """
+        query = filters.apply(select(*EXPORT_COLUMNS)).order_by(User.email)
+        if after is not None:
+            query = query.where(User.email > after)
+        rows = (await session.execute(query.limit(limit + 1))).all()
+        items = [AdminUser(**row._mapping) for row in rows[:limit]]
+        next_after = items[-1].email if len(rows) > limit else None
+        return UserPage(items=items, next_after=next_after)
+
+    @router.get("/users/export")
+    async def export_users(
+        filters: UserFilter = Depends(),
+        format: Literal["ndjson", "csv"] = "ndjson",
+    ) -> StreamingResponse:
+        """Stream every matching user as NDJSON or CSV."""
+        query = filters.apply(select(*EXPORT_COLUMNS)).order_by(User.email)
+        media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            _export_rows(query, format),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+        )
+
+    @router.post("/users/import")
+    async def import_users(
+        request: Request,
+        format: Literal["csv", "jsonl"] | None = None,
+        batch_size: int = Query(default=1000, ge=1, le=10000),
+        user_manager=Depends(get_user_manager),
+    ) -> dict:
+        """Bulk import users from a streamed CSV or JSON Lines request body.
+
+        The format defaults from the content type (``text/csv`` or
+        ``application/x-ndjson``). Returns counts and per-row errors.
+        """
+        if format is None:
+            content_type = request.headers.get("content-type", "")
+            format = "csv" if "csv" in content_type else "jsonl"
+        importer = BulkUserImporter(user_manager, batch_size)
+        report = await importer.run(iter_rows(iter_lines(request.stream()), format))
+        return report.as_dict()
+
+    return router
@@ -0,0 +1,286 @@
+"""Asynchronous audit trail of security-relevant events.
+
+The user manager hooks call :meth:`AuditLog.emit`, which only appends a small
+:class:`AuditEvent` (timestamp, event name, user id, client IP and a few
+details) to an in-memory buffer: nothing is formatted or written on the
+request path. A background task started from the application lifespan takes
+the buffer every ``flush_interval`` seconds, or as soon as ``batch_size``
+events are waiting, and hands it to the sink in batches:
+
+* ``file`` (the default) appends JSON lines to ``AUDIT_PATH`` in a worker
+  thread, rotating the file when it would exceed ``AUDIT_MAX_BYTES`` or is
+  older than ``AUDIT_ROTATE_SECONDS`` and keeping ``AUDIT_BACKUPS`` rotated
+  files. Under several server workers each process writes and rotates its
+  own file, ``AUDIT_PATH`` with the worker's slot before the suffix
+  (``audit.0.jsonl``), since workers sharing one file would rotate it from
+  under each other. A restarted worker takes over its predecessor's slot and
+  files, so their number stays bounded by the worker count;
+* ``db`` inserts the batch into the ``audit_event`` table with one
+  multi-row INSERT.
+
+The buffer holds at most ``queue_size`` events. When a slow sink lets it fill
+up, further events are dropped and counted rather than making requests wait;
+batches the sink fails to write are counted too. See ``/health/audit``.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import insert
+from userdb import db
+
+from .config import Settings
+from .models import AuditRecord
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class AuditEvent:
+    ts: float
+    event: str
+    user_id: uuid.UUID | None
+    ip: str | None
+    detail: dict[str, Any] | None
+
+    def as_dict(self) -> dict[str, Any]:
+        record = {
+            "ts": self.ts,
+            "event": self.event,
+            "user_id": str(self.user_id) if self.user_id else None,
+            "ip": self.ip,
+        }
+        if self.detail:
+            record.update(self.detail)
+        return record
+
+
+class AuditSink(abc.ABC):
+    """Destination for batches of audit events."""
+
+    @abc.abstractmethod
+    async def write(self, events: list[AuditEvent]) -> None:
+        """Persist ``events``; raising counts the batch as failed."""
+
+    async def close(self) -> None:  # noqa: B027 - optional hook
+        """Release any resources held by the sink."""
+
+
+class JsonlFileSink(AuditSink):
+    """Appends JSON lines to a file, rotating it by size and age."""
+
+    # Set by the server in each of several forked workers.
+    worker_slot: int | None = None
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_seconds: float = 24 * 3600,
+        backups: int = 10,
+    ) -> None:
+        self.path = Path(path)
+        self.file_path = self.path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self.rotations = 0
+
+    async def write(self, events: list[AuditEvent]) -> None:
+        await asyncio.to_thread(self._write, events)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+    def _write(self, events: list[AuditEvent]) -> None:
+        data = "".join(
+            json.dumps(event.as_dict(), separators=(",", ":")) + "\n"
+            for event in events
+        ).encode()
+        if self._file is None:
+            self._open()
+        elif self._size and (
+            self._size + len(data) > self.max_bytes
+            or time.time() - self._opened_at >= self.rotate_seconds
+        ):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _open(self) -> None:
+        self.file_path = self.path
+        if self.worker_slot is not None:
+            name = f"{self.path.stem}.{self.worker_slot}{self.path.suffix}"
+            self.file_path = self.path.with_name(name)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.file_path, "ab")
+        self._size = self._file.tell()
+        # An existing file keeps its age across restarts.
+        self._opened_at = self.file_path.stat().st_mtime if self._size else time.time()
+
+    def _rotate(self) -> None:
+        self._close()
+        path = self.file_path
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        path.rename(path.with_name(f"{path.name}.{stamp}-{self.rotations:04d}"))
+        self.rotations += 1
+        rotated = sorted(path.parent.glob(f"{path.name}.*"))
+        for old in rotated[: max(0, len(rotated) - self.backups)]:
+            old.unlink(missing_ok=True)
+        self._open()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DatabaseSink(AuditSink):
+    """Inserts each batch into the ``audit_event`` table."""
+
+    async def write(self, events: list[AuditEvent]) -> None:
+        rows = [
+            {
+                "ts": event.ts,
+                "event": event.event,
+                "user_id": event.user_id,
+                "ip": event.ip,
+                "detail": event.detail or None,
+            }
+            for event in events
+        ]
+        async with db.DBState.async_session_maker() as session:
+            await session.execute(insert(AuditRecord), rows)
+            await session.commit()
+
+
+def build_sink(settings: Settings) -> AuditSink:
+    if settings.audit_sink == "db":
+        return DatabaseSink()
+    if settings.audit_sink == "file":
+        return JsonlFileSink(
+            settings.audit_path,
+            settings.audit_max_bytes,
+            settings.audit_rotate_seconds,
+            settings.audit_backups,
+        )
+    raise ValueError(f"Unknown AUDIT_SINK: {settings.audit_sink!r}")
+
+
+class AuditLog:
+    """Bounded audit event buffer drained in batches by a background task."""
+
+    enabled: bool = True
+    queue_size: int = 10_000
+    batch_size: int = 500
+    flush_interval: float = 1.0
+
+    def __init__(self, sink: AuditSink | None = None) -> None:
+        self.sink = sink
+        self._buffer: list[AuditEvent] = []
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.enabled = settings.audit_enabled
+        self.queue_size = settings.audit_queue_size
+        self.batch_size = settings.audit_batch_size
+        self.flush_interval = settings.audit_flush_seconds
+        if self.enabled:
+            self.sink = build_sink(settings)
+
+    def emit(
+        self,
+        event: str,
+        user_id: uuid.UUID | None = None,
+        request: Request | None = None,
+        **detail: Any,
+    ) -> None:
+        """Buffer one event; drops it if the buffer is full. Never blocks."""
+        if not self.enabled:
+            return
+        if len(self._buffer) >= self.queue_size:
+            self.dropped += 1
+            return
+        client = request.client if request is not None else None
+        self._buffer.append(
+            AuditEvent(
+                time.time(), event, user_id, client.host if client else None, detail
+            )
+        )
+        self.emitted += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        """Hand everything buffered so far to the sink, in batches."""
+        events, self._buffer = self._buffer, []
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start : start + self.batch_size]
+            try:
+                await self.sink.write(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Unable to write %d audit events", len(batch))
+            else:
+                self.written += len(batch)
+                self.batches += 1
+
+    async def start(self) -> None:
+        if self.enabled and self.sink is not None and self._task is None:
+            self._wake = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self) -> None:
+        """Stop the writer, write whatever is still buffered and close the sink."""
+        if self._task is None:
+            return
+        # Let an in-progress write finish rather than cancelling it midway.
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        await self.flush()
+        await self.sink.close()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._buffer),
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+audit = AuditLog()
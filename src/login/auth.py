@@ -8,38 +8,64 @@ configuration, and extensibility.
 
 import logging
 import uuid
-from collections.abc import AsyncGenerator
-
-from fastapi import Depends, Request, Response
-from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
-from fastapi_users.authentication import (
-    AuthenticationBackend,
-    BearerTransport,
-    JWTStrategy,
+from typing import Any
+
+import jwt
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import (
+    BaseUserManager,
+    FastAPIUsers,
+    UUIDIDMixin,
+    exceptions,
+    schemas,
 )
+from fastapi_users.authentication import BearerTransport
+from fastapi_users.jwt import decode_jwt, generate_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
-from userdb.db import get_user_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from userdb.db import get_async_session
 from userdb.models import User
 
+from .activity import activity
+from .audit import audit
+from .cache import user_cache
+from .coalesce import email_coalescer
 from .config import Settings
-from .email_utils import send_email
+from .db_routing import replica
+from .email_templates import accept_language, email_templates
+from .metrics import timed_hook
+from .outbox import outbox
+from .password import ExecutorPasswordHelper, password_helper
+from .refresh import RefreshingAuthenticationBackend, refresh_tokens
+from .revocation import revocations
+from .services import services
+from .strategy import LoginJWTStrategy, TokenClaims
 
 logger = logging.getLogger("login.auth")
 
-settings = Settings()
+# Update fields that change the user's version stamp (see login.cache).
+CLAIMS_FIELDS = frozenset(
+    {"email", "password", "is_active", "is_verified", "is_superuser"}
+)
+
 
+async def get_jwt_strategy() -> LoginJWTStrategy:
+    """Return the JWT strategy built from the settings at startup.
+
+    Tokens embed the user's flags and version stamp when JWT_EMBED_CLAIMS is on,
+    and are signed with the active asymmetric key when one is configured. The
+    dependency is a coroutine so FastAPI calls it on the event loop rather than
+    handing it to the threadpool.
+    """
+    return services.strategy
 
-def get_jwt_strategy() -> JWTStrategy:
-    """Return a JWTStrategy using the configured secret and 1 hour lifetime."""
-    return JWTStrategy(
-        secret=settings.JWT_SECRET,
-        lifetime_seconds=3600,
-    )
 
+bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 
-auth_backend = AuthenticationBackend(
+auth_backend = RefreshingAuthenticationBackend(
     name="jwt",
-    transport=BearerTransport(tokenUrl="auth/jwt/login"),
+    transport=bearer_transport,
     get_strategy=get_jwt_strategy,
 )
 
@@ -50,12 +76,178 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     This class extends BaseUserManager from fastapi-users, providing hooks for
     user lifecycle events. It uses secrets loaded from environment variables for
     password reset and email verification tokens, ensuring security and configurability.
+
+    All password hashing and verification is awaited on an
+    ExecutorPasswordHelper so the CPU-bound work runs off the event loop.
     """
 
-    settings = Settings()
-    reset_password_token_secret = settings.RESET_PASSWORD_SECRET
-    verification_token_secret = settings.VERIFICATION_SECRET
+    password_helper: ExecutorPasswordHelper
+
+    @property
+    def settings(self) -> Settings:
+        return services.settings
+
+    @property
+    def reset_password_token_secret(self) -> str:
+        return services.settings.RESET_PASSWORD_SECRET
+
+    @property
+    def verification_token_secret(self) -> str:
+        return services.settings.VERIFICATION_SECRET
+
+    def __init__(
+        self,
+        user_db: SQLAlchemyUserDatabase,
+        password_helper: ExecutorPasswordHelper = password_helper,
+    ) -> None:
+        super().__init__(user_db, password_helper)
+
+    async def get_cached(self, id: uuid.UUID) -> User:
+        """Get a user by id from the user cache, the replica or the primary.
+
+        Only for read-only callers such as token authentication: the user may
+        lag behind the primary. Code that goes on to update or delete the user
+        uses :meth:`get`, which always reads the primary.
+        """
+        user = user_cache.get(id)
+        if user is None:
+            user = await replica.get_user(id)
+            if user is None:
+                user = await super().get(id)
+            user_cache.put(user)
+        return user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> User | None:
+        """Authenticate a user by email and password off the event loop.
+
+        Mirrors BaseUserManager.authenticate, including the dummy hash that
+        mitigates user-enumeration timing attacks and the transparent upgrade
+        of outdated password hashes.
+        """
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            await self.password_helper.hash_async(credentials.password)
+            return None
+
+        verified, updated_hash = await self.password_helper.verify_and_update_async(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_hash})
+            user_cache.invalidate(user.id)
+            replica.mark_written(user.id)
+        return user
+
+    async def create(
+        self,
+        user_create: schemas.UC,
+        safe: bool = False,
+        request: Request | None = None,
+    ) -> User:
+        """Create a user, hashing the password off the event loop."""
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await self.password_helper.hash_async(password)
+
+        created_user = await self.user_db.create(user_dict)
+        replica.mark_written(created_user.id)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def forgot_password(self, user: User, request: Request | None = None) -> None:
+        """Start a password reset, fingerprinting the hash off the event loop.
+
+        Repeats while an earlier reset email is pending are coalesced: no token
+        is minted and no email is sent.
+        """
+        if not user.is_active:
+            raise exceptions.UserInactive()
+        if not await email_coalescer.claim("forgot_password", user.id):
+            audit.emit("forgot_password", user.id, request, coalesced=True)
+            return
+
+        token_data = {
+            "sub": str(user.id),
+            "password_fgpt": await self.password_helper.hash_async(
+                user.hashed_password
+            ),
+            "aud": self.reset_password_token_audience,
+        }
+        token = generate_jwt(
+            token_data,
+            self.reset_password_token_secret,
+            self.reset_password_token_lifetime_seconds,
+        )
+        await self.on_after_forgot_password(user, token, request)
+
+    async def request_verify(self, user: User, request: Request | None = None) -> None:
+        """Start email verification unless a verification email is pending."""
+        if not user.is_active:
+            raise exceptions.UserInactive()
+        if user.is_verified:
+            raise exceptions.UserAlreadyVerified()
+        if not await email_coalescer.claim("request_verify", user.id):
+            audit.emit("request_verify", user.id, request, coalesced=True)
+            return
+        await super().request_verify(user, request)
+
+    async def reset_password(
+        self, token: str, password: str, request: Request | None = None
+    ) -> User:
+        """Reset a password, verifying the token fingerprint off the event loop."""
+        try:
+            data = decode_jwt(
+                token,
+                self.reset_password_token_secret,
+                [self.reset_password_token_audience],
+            )
+            user_id = data["sub"]
+            password_fingerprint = data["password_fgpt"]
+            parsed_id = self.parse_id(user_id)
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            raise exceptions.InvalidResetPasswordToken() from None
 
+        user = await self.get(parsed_id)
+
+        valid_fingerprint, _ = await self.password_helper.verify_and_update_async(
+            user.hashed_password, password_fingerprint
+        )
+        if not valid_fingerprint:
+            raise exceptions.InvalidResetPasswordToken()
+        if not user.is_active:
+            raise exceptions.UserInactive()
+
+        updated_user = await self._update(user, {"password": password})
+        await self.on_after_reset_password(user, request)
+        return updated_user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        """Apply an update, hashing any new password off the event loop."""
+        update_dict = dict(update_dict)
+        password = update_dict.pop("password", None)
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict["hashed_password"] = await self.password_helper.hash_async(
+                password
+            )
+        updated_user = await super()._update(user, update_dict)
+        replica.mark_written(user.id)
+        return updated_user
+
+    @timed_hook
     async def on_after_login(
         self,
         user: User,
@@ -64,19 +256,22 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     ) -> None:
         """Called after a successful user login.
 
-        This method can be used to update last login timestamps, trigger analytics,
-        or send login notifications. Here, we simply log the event for auditing.
+        Emits an audit event and records the login for write-behind activity
+        tracking; both are written in bulk in the background, not here.
         """
-        logger.info(f"User {user.id} logged in.")
+        audit.emit("login", user.id, request)
+        client = request.client if request is not None else None
+        activity.record(user.id, client.host if client else None)
 
+    @timed_hook
     async def on_after_register(self, user: User, request: Request = None) -> None:
         """Called after a new user registers.
 
-        Sends a welcome email with a verification link. This ensures users verify
-        their email address, which is critical for account security and communication.
+        Records the registration in the audit trail.
         """
-        logger.info(f"User registered: id={user.id}")
+        audit.emit("register", user.id, request)
 
+    @timed_hook
     async def on_after_forgot_password(
         self, user: User, token: str, request: Request = None
     ) -> None:
@@ -85,14 +280,25 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         Sends a password reset email with a secure, time-limited token. The reset
         link is constructed using the frontend URL and the token. This flow is
         essential for account recovery and must be secure to prevent abuse.
+        The message is rendered from the ``reset_password`` template in the
+        request's preferred language and queued on the email outbox so SMTP
+        never blocks the request.
         """
+        audit.emit("forgot_password", user.id, request)
         reset_link = f"{self.settings.frontend_url}/reset-password?token={token}"
-        send_email(
+        email = email_templates.render(
+            "reset_password", accept_language(request), link=reset_link
+        )
+        queued = outbox.enqueue(
             to_email=user.email,
-            subject="Password Reset",
-            body=f"Click the link to reset your password: {reset_link}",
+            subject=email.subject,
+            body=email.text,
+            html=email.html,
         )
+        if not queued:
+            await email_coalescer.release("forgot_password", user.id)
 
+    @timed_hook
     async def on_after_request_verify(
         self, user: User, token: str, request: Request = None
     ) -> None:
@@ -101,22 +307,100 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         Sends a verification email with a secure, time-limited token. The verification
         link is constructed using the frontend URL and the token. Email verification
         is important to confirm user ownership and prevent spam or abuse.
+        The message is rendered from the ``verify_email`` template in the
+        request's preferred language and queued on the email outbox so SMTP
+        never blocks the request.
         """
+        audit.emit("request_verify", user.id, request)
         verify_link = f"{self.settings.frontend_url}/verify-email?token={token}"
-        send_email(
+        email = email_templates.render(
+            "verify_email", accept_language(request), link=verify_link
+        )
+        queued = outbox.enqueue(
             to_email=user.email,
-            subject="Verify Your Email",
-            body=f"Click the link to verify your email: {verify_link}",
+            subject=email.subject,
+            body=email.text,
+            html=email.html,
         )
+        if not queued:
+            await email_coalescer.release("request_verify", user.id)
+
+    @timed_hook
+    async def on_after_update(
+        self, user: User, update_dict: dict[str, Any], request: Request = None
+    ) -> None:
+        """Called after a user is updated; drops the stale cached record.
+
+        A password change or deactivation also revokes every access and
+        refresh token issued to the user so far. Any other change to the
+        flags or email stops every worker trusting the claims in earlier
+        tokens.
+        """
+        audit.emit("update", user.id, request, fields=sorted(update_dict))
+        user_cache.invalidate(user.id)
+        if "password" in update_dict or update_dict.get("is_active") is False:
+            await refresh_tokens.revoke_user(self.user_db.session, user.id)
+            await revocations.revoke_user(self.user_db.session, user.id)
+            await self.user_db.session.commit()
+        elif not CLAIMS_FIELDS.isdisjoint(update_dict):
+            await self.expire_claims(user)
+
+    @timed_hook
+    async def on_after_verify(self, user: User, request: Request = None) -> None:
+        """Called after a user verifies their email; drops the cached record."""
+        audit.emit("verify", user.id, request)
+        user_cache.invalidate(user.id)
+        await self.expire_claims(user)
+        await email_coalescer.release("request_verify", user.id)
+
+    @timed_hook
+    async def on_after_reset_password(
+        self, user: User, request: Request = None
+    ) -> None:
+        """Called after a password reset.
+
+        Drops the cached record and revokes the user's access and refresh
+        tokens, so a stolen token cannot outlive the password it was issued
+        under.
+        """
+        audit.emit("reset_password", user.id, request)
+        user_cache.invalidate(user.id)
+        await email_coalescer.release("forgot_password", user.id)
+        await refresh_tokens.revoke_user(self.user_db.session, user.id)
+        await revocations.revoke_user(self.user_db.session, user.id)
+        await self.user_db.session.commit()
+
+    @timed_hook
+    async def on_after_delete(self, user: User, request: Request = None) -> None:
+        """Called after a user is deleted; drops the cached record."""
+        audit.emit("delete", user.id, request)
+        user_cache.invalidate(user.id)
+        await self.expire_claims(user)
+
+    async def expire_claims(self, user: User) -> None:
+        """Stop every worker trusting the claims of the user's earlier tokens.
+
+        Only needed when tokens embed claims; other workers apply the cutoff
+        at their next revocation sync.
+        """
+        if self.settings.jwt_embed_claims:
+            await revocations.expire_claims(self.user_db.session, user.id)
+            await self.user_db.session.commit()
 
     # Additional hooks and business logic can be added here as needed.
 
 
 async def get_user_manager(
-    user_db: SQLAlchemyUserDatabase = Depends(get_user_db),
-) -> AsyncGenerator[UserManager, None]:
-    """Dependency for providing a UserManager instance with the correct user DB."""
-    yield UserManager(user_db)
+    session: AsyncSession = Depends(get_async_session),
+) -> UserManager:
+    """Dependency for providing a UserManager bound to the request's session.
+
+    The manager is per request because the user database wraps the request's
+    session; everything else it uses is built once, at startup. Wrapping the
+    session here rather than through ``get_user_db`` saves FastAPI a generator
+    dependency on every authenticated request.
+    """
+    return UserManager(SQLAlchemyUserDatabase(session, User), services.password_helper)
 
 
 fastapi_users = FastAPIUsers[User, uuid.UUID](
@@ -125,3 +409,45 @@ fastapi_users = FastAPIUsers[User, uuid.UUID](
 )
 
 current_active_user = fastapi_users.current_user(active=True)
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
+
+
+async def current_active_claims(
+    token: str | None = Depends(bearer_transport.scheme),
+    strategy: LoginJWTStrategy = Depends(get_jwt_strategy),
+    user_manager: UserManager = Depends(get_user_manager),
+) -> TokenClaims:
+    """Dependency authorizing an active user, from the token when possible.
+
+    Claims tokens that :meth:`LoginJWTStrategy.is_current` trusts are accepted
+    without a database read. Anything else (plain tokens, changed users) is
+    checked against the database like ``current_active_user``.
+    """
+    claims = strategy.read_claims(token)
+    if claims is not None and claims.is_active and strategy.is_current(claims):
+        return claims
+    user = await strategy.read_token(token, user_manager)
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return TokenClaims.from_user(user, claims.expires_at if claims else None)
+
+
+def get_check_router() -> APIRouter:
+    """Router with ``GET /check``, to be mounted under ``/auth``.
+
+    A forward-auth endpoint for reverse proxies (nginx ``auth_request``,
+    Traefik ``forwardAuth``): 204 with the user id in ``X-User-Id`` when the
+    bearer token belongs to an active user, 401 otherwise. It only needs an
+    active user, so claims tokens are usually answered without the database.
+    """
+    router = APIRouter()
+
+    @router.get("/check", status_code=status.HTTP_204_NO_CONTENT)
+    async def check(claims: TokenClaims = Depends(current_active_claims)) -> Response:
+        """Authorize the bearer token's user for a proxied request."""
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"X-User-Id": str(claims.user_id)},
+        )
+
+    return router
@@ -0,0 +1,328 @@
+"""Bulk user import from CSV or JSON Lines.
+
+Registering users one ``/auth/register`` call at a time costs an insert, a
+hash and a hook per user. :class:`BulkUserImporter` instead streams rows,
+validates them, hashes plain passwords concurrently on the user manager's
+password executor, and inserts each batch with a single multi-row INSERT in
+its own transaction. Memory use is bounded by the batch size, whatever the
+input size: lines longer than ``MAX_LINE_LENGTH`` are reported as errors and
+skipped without being held in memory.
+
+Each row needs an ``email`` and either a ``password`` or a ``hashed_password``
+(an Argon2 or bcrypt hash the password helper recognizes, stored as-is). The
+optional ``full_name``, ``is_active``, ``is_verified`` and ``is_superuser``
+columns are honoured. In JSON Lines, text fields must be strings and the flags
+booleans (or strings, as in CSV). Emails already present, in the database or
+earlier in the input, are skipped. Invalid rows are reported with their line
+number, and the import carries on.
+
+Imports do not run ``on_after_register``. Use the admin endpoint
+``POST /admin/users/import`` or the CLI::
+
+    python -m login.bulk_import users.csv [--format jsonl] [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import sys
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from fastapi_users import exceptions
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from userdb import db
+from userdb.models import User
+
+from .auth import UserManager
+from .password import password_helper
+from .services import services
+
+FORMATS = ("csv", "jsonl")
+MAX_LINE_LENGTH = 64 * 1024
+_email = TypeAdapter(EmailStr)
+_TRUE = {"1", "true", "yes", "y", "t"}
+
+
+@dataclass(slots=True)
+class RowError:
+    line: int
+    email: str | None
+    error: str
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import; only the first ``max_errors`` errors are kept."""
+
+    max_errors: int = 1000
+    rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+    def error(self, line: int, email: str | None, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(RowError(line, email, message))
+
+    def as_dict(self) -> dict[str, Any]:
+        report = asdict(self)
+        del report["max_errors"]
+        return report
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[str | None]:
+    """Split a stream of UTF-8 byte chunks into lines.
+
+    A line longer than ``max_length`` characters is yielded as ``None``, once,
+    and the rest of it is discarded up to the next newline.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    skipping = False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if skipping:
+                # The end of an overlong line, already reported.
+                skipping = False
+                continue
+            yield line if len(line) <= max_length else None
+        if len(pending) > max_length:
+            if not skipping:
+                yield None
+                skipping = True
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if pending and not skipping:
+        yield pending if len(pending) <= max_length else None
+
+
+async def iter_rows(
+    lines: AsyncIterable[str | None], fmt: str
+) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    """Yield ``(line number, row)`` pairs, or an error message for bad lines.
+
+    CSV input needs a header row; quoted fields cannot span lines. ``None``
+    stands for a line :func:`iter_lines` found too long.
+    """
+    header: list[str] | None = None
+    number = 0
+    async for raw in lines:
+        number += 1
+        if raw is None:
+            yield number, f"line longer than {MAX_LINE_LENGTH} characters"
+            continue
+        line = raw.rstrip("\r")
+        if not line.strip():
+            continue
+        if fmt == "jsonl":
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, f"invalid JSON: {e}"
+                continue
+            yield number, row if isinstance(row, dict) else "expected a JSON object"
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield number, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, dict(zip(header, values, strict=True))
+
+
+def _flag(row: dict[str, Any], name: str, default: bool) -> bool:
+    value = row.get(name)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a boolean")
+    return value.strip().lower() in _TRUE
+
+
+def _text(row: dict[str, Any], name: str) -> str | None:
+    """A string field of ``row``; missing and empty values are ``None``."""
+    value = row.get(name)
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value
+
+
+class BulkUserImporter:
+    """Imports users in batches through a ``UserManager``'s DB and hasher."""
+
+    def __init__(self, user_manager, batch_size: int = 1000) -> None:
+        self.user_manager = user_manager
+        self.session = user_manager.user_db.session
+        self.batch_size = batch_size
+
+    async def run(
+        self,
+        rows: AsyncIterable[tuple[int, dict[str, Any] | str]],
+        report: ImportReport | None = None,
+    ) -> ImportReport:
+        report = report or ImportReport()
+        batch: list[tuple[int, dict[str, Any]]] = []
+        async for number, row in rows:
+            report.rows += 1
+            if isinstance(row, str):
+                report.error(number, None, row)
+                continue
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch, report)
+                batch = []
+        if batch:
+            await self._import_batch(batch, report)
+        return report
+
+    async def _prepare(
+        self, number: int, row: dict[str, Any], report: ImportReport
+    ) -> dict[str, Any] | None:
+        raw_email = row.get("email")
+        try:
+            email = _email.validate_python(str(raw_email or "").strip())
+        except ValidationError:
+            report.error(number, raw_email, "invalid email")
+            return None
+        try:
+            hashed = _text(row, "hashed_password")
+            password = _text(row, "password")
+            fields = {
+                "full_name": _text(row, "full_name"),
+                "is_active": _flag(row, "is_active", True),
+                "is_verified": _flag(row, "is_verified", False),
+                "is_superuser": _flag(row, "is_superuser", False),
+            }
+        except ValueError as e:
+            report.error(number, email, str(e))
+            return None
+        helper = self.user_manager.password_helper
+        if hashed:
+            if not any(h.identify(hashed) for h in helper.password_hash.hashers):
+                report.error(number, email, "unrecognized password hash")
+                return None
+        elif password:
+            try:
+                await self.user_manager.validate_password(password, None)
+            except exceptions.InvalidPasswordException as e:
+                report.error(number, email, f"invalid password: {e.reason}")
+                return None
+            hashed = await helper.hash_async(password)
+        else:
+            report.error(number, email, "password or hashed_password is required")
+            return None
+        user_id = uuid.uuid4()
+        return {
+            "id": user_id,
+            "user_id_str": str(user_id),
+            "email": email,
+            "hashed_password": hashed,
+            **fields,
+        }
+
+    async def _import_batch(
+        self, batch: list[tuple[int, dict[str, Any]]], report: ImportReport
+    ) -> None:
+        # Hash concurrently; the password helper bounds how many run at once.
+        prepared = await asyncio.gather(
+            *(self._prepare(number, row, report) for number, row in batch)
+        )
+        candidates = [values for values in prepared if values is not None]
+        emails = {values["email"].lower() for values in candidates}
+        existing = set(
+            (
+                await self.session.execute(
+                    select(func.lower(User.email)).where(
+                        func.lower(User.email).in_(emails)
+                    )
+                )
+            ).scalars()
+        )
+        rows = []
+        for values in candidates:
+            key = values["email"].lower()
+            if key in existing:
+                report.duplicates += 1
+                continue
+            existing.add(key)
+            rows.append(values)
+        if not rows:
+            return
+        try:
+            await self.session.execute(insert(User), rows)
+            await self.session.commit()
+            report.created += len(rows)
+        except IntegrityError:
+            # A concurrent registration took one of the emails; retry row by row.
+            await self.session.rollback()
+            await self._insert_one_by_one(rows, report)
+
+    async def _insert_one_by_one(
+        self, rows: list[dict[str, Any]], report: ImportReport
+    ) -> None:
+        for values in rows:
+            try:
+                await self.session.execute(insert(User), [values])
+                await self.session.commit()
+                report.created += 1
+            except IntegrityError:
+                await self.session.rollback()
+                report.duplicates += 1
+
+
+async def _file_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(64 * 1024):
+            yield chunk
+
+
+async def _import_file(path: str, fmt: str, batch_size: int) -> ImportReport:
+    password_helper.configure(services.settings)
+    password_helper.start()
+    try:
+        async with db.lifespan(), db.DBState.async_session_maker() as session:
+            db.DBState.engine.sync_engine.echo = False
+            manager = UserManager(SQLAlchemyUserDatabase(session, User))
+            importer = BulkUserImporter(manager, batch_size)
+            return await importer.run(iter_rows(iter_lines(_file_chunks(path)), fmt))
+    finally:
+        password_helper.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import users.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    fmt = args.format or (
+        "jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv"
+    )
+    report = asyncio.run(_import_file(args.path, fmt, args.batch_size))
+    json.dump(report.as_dict(), sys.stdout, indent=2)
+    print()
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
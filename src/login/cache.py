@@ -0,0 +1,133 @@
+"""In-process cache of user records for token authentication.
+
+Every request guarded by ``current_active_user`` loads the user by id. User
+rows rarely change, so :class:`UserCache` keeps a bounded LRU of recently seen
+users with a time-to-live. The user manager invalidates an entry whenever it
+updates, verifies, resets or deletes that user; the TTL bounds staleness for
+changes made by other worker processes.
+
+Entries are column snapshots rather than ORM instances, and each hit returns a
+fresh detached ``User``, so concurrent requests never share a mapped object and
+the instance can still be attached to a session for updates. Each entry also
+records the user's :func:`user_version` stamp, which the claims token strategy
+compares against to authorize requests without loading the user.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+from userdb.models import User
+
+from .config import Settings
+
+_COLUMNS = tuple(attr.key for attr in sa_inspect(User).column_attrs)
+
+
+def user_version(user: Any) -> str:
+    """Return a short stamp that changes with any security-relevant field.
+
+    Covers the email, password hash and the active/verified/superuser flags,
+    so a password change or deactivation yields a new version.
+    """
+    material = (
+        f"{user.email}|{user.hashed_password}|{user.is_active:d}"
+        f"|{user.is_verified:d}|{user.is_superuser:d}"
+    )
+    return hashlib.blake2b(material.encode(), digest_size=8).hexdigest()
+
+
+class UserCache:
+    """Bounded LRU+TTL cache of users keyed by id."""
+
+    def __init__(
+        self, max_size: int = 10000, ttl: float = 30.0, enabled: bool = True
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: OrderedDict[Any, tuple[float, dict[str, Any], str]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, settings: Settings) -> None:
+        """Apply cache settings, dropping any cached entries."""
+        self.enabled = settings.user_cache_enabled
+        self.max_size = settings.user_cache_max_size
+        self.ttl = settings.user_cache_ttl_seconds
+        self.clear()
+
+    def get(self, user_id: Any) -> User | None:
+        """Return a detached copy of the cached user, or ``None`` on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, values, _ = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def version(self, user_id: Any) -> str | None:
+        """Return the cached version stamp of a user without rebuilding it."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, user: User) -> None:
+        """Cache the loaded column values of ``user``."""
+        if not self.enabled:
+            return
+        loaded = sa_inspect(user).dict
+        if any(column not in loaded for column in _COLUMNS):
+            # Partially loaded or expired instance; never cache guesses.
+            return
+        values = {column: loaded[column] for column in _COLUMNS}
+        expires_at = time.monotonic() + self.ttl
+        self._entries[user.id] = (expires_at, values, user_version(user))
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: Any) -> None:
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserCache()
@@ -0,0 +1,179 @@
+"""Calibrate Argon2 parameters for the host it runs on.
+
+Hash cost is only meaningful on the hardware, and under the CPU limit, that
+will serve logins. Run this inside the production container::
+
+    python -m login.calibrate --budget-ms 250 [--concurrency 2] [--json]
+
+For each candidate memory size the time cost is raised until a single hash
+exceeds the latency budget; the last setting within budget is kept. Each kept
+setting is then run with ``--concurrency`` hashes in parallel to measure the
+throughput the host actually sustains (a CPU quota shows up here, not in the
+single-hash latency). The recommendation is the setting with the most memory,
+then the most passes, that meets the budget and ``--min-rate``. It is printed
+as ``PASSWORD_ARGON2_*`` settings; with ``PASSWORD_REHASH_ON_LOGIN`` on,
+existing hashes move to the new parameters as users log in.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+# KiB; 19 and 46 MiB are the OWASP minimums for 2 passes and 1 pass.
+DEFAULT_MEMORY_SIZES = (19456, 47104, 65536)
+_PASSWORD = "correct horse battery staple"
+
+
+@dataclass(slots=True)
+class Candidate:
+    memory_kib: int
+    time_cost: int
+    parallelism: int
+    latency_ms: float
+    hashes_per_second: float = 0.0
+    within_budget: bool = True
+
+    def hasher(self) -> Argon2Hasher:
+        return Argon2Hasher(
+            time_cost=self.time_cost,
+            memory_cost=self.memory_kib,
+            parallelism=self.parallelism,
+        )
+
+
+def measure_latency(hasher: Argon2Hasher, samples: int) -> float:
+    """Median seconds for one hash."""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash(_PASSWORD)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def measure_throughput(hasher: Argon2Hasher, concurrency: int, samples: int) -> float:
+    """Hashes per second with ``concurrency`` running at once.
+
+    argon2-cffi releases the GIL, so threads compete for CPU as a process
+    pool would.
+    """
+    count = concurrency * samples
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(lambda _: hasher.hash(_PASSWORD), range(count)))
+        return count / (time.perf_counter() - started)
+
+
+def calibrate(  # noqa: PLR0913
+    budget: float,
+    memory_sizes: tuple[int, ...] = DEFAULT_MEMORY_SIZES,
+    parallelism: int = 1,
+    max_time_cost: int = 10,
+    samples: int = 3,
+    concurrency: int = 1,
+) -> list[Candidate]:
+    """The highest time cost within ``budget`` seconds for each memory size.
+
+    A memory size whose cheapest setting (one pass) is over budget is still
+    reported, with ``within_budget`` false.
+    """
+    candidates = []
+    for memory_kib in memory_sizes:
+        best: Candidate | None = None
+        for time_cost in range(1, max_time_cost + 1):
+            candidate = Candidate(memory_kib, time_cost, parallelism, 0.0)
+            latency = measure_latency(candidate.hasher(), samples)
+            candidate.latency_ms = latency * 1000
+            if latency > budget:
+                if best is None:
+                    candidate.within_budget = False
+                    best = candidate
+                break
+            best = candidate
+        best.hashes_per_second = measure_throughput(best.hasher(), concurrency, samples)
+        candidates.append(best)
+    return candidates
+
+
+def recommend(candidates: list[Candidate], min_rate: float = 0.0) -> Candidate | None:
+    """The strongest candidate within budget and at least ``min_rate``."""
+    eligible = [
+        c for c in candidates if c.within_budget and c.hashes_per_second >= min_rate
+    ]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda c: (c.memory_kib, c.time_cost))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate Argon2 parameters.")
+    parser.add_argument(
+        "--budget-ms", type=float, default=250.0, help="Latency budget per hash"
+    )
+    parser.add_argument(
+        "--memory-kib",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_MEMORY_SIZES),
+        help="Memory sizes to try",
+    )
+    parser.add_argument("--parallelism", type=int, default=1)
+    parser.add_argument("--max-time-cost", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Hashes run at once when measuring throughput (PASSWORD_HASH_WORKERS)",
+    )
+    parser.add_argument(
+        "--min-rate", type=float, default=0.0, help="Required hashes per second"
+    )
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args(argv)
+
+    candidates = calibrate(
+        args.budget_ms / 1000,
+        tuple(args.memory_kib),
+        args.parallelism,
+        args.max_time_cost,
+        args.samples,
+        args.concurrency,
+    )
+    choice = recommend(candidates, args.min_rate)
+    if args.json:
+        report = {
+            "budget_ms": args.budget_ms,
+            "concurrency": args.concurrency,
+            "candidates": [asdict(c) for c in candidates],
+            "recommended": asdict(choice) if choice else None,
+        }
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"{'memory KiB':>10} {'time':>4} {'latency ms':>10} {'hashes/s':>9}")
+        for c in candidates:
+            flag = "" if c.within_budget else "  over budget"
+            print(
+                f"{c.memory_kib:>10} {c.time_cost:>4} {c.latency_ms:>10.1f} "
+                f"{c.hashes_per_second:>9.1f}{flag}"
+            )
+        print()
+        if choice is None:
+            print("No setting meets the budget; raise --budget-ms or add CPU.")
+        else:
+            print("Recommended settings:")
+            print(f"PASSWORD_ARGON2_TIME_COST={choice.time_cost}")
+            print(f"PASSWORD_ARGON2_MEMORY_KIB={choice.memory_kib}")
+            print(f"PASSWORD_ARGON2_PARALLELISM={choice.parallelism}")
+    return 0 if choice else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
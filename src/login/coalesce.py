@@ -0,0 +1,140 @@
+"""Per-user coalescing of password reset and verification emails.
+
+Every forgot-password or request-verify-token call used to mint a token (the
+reset token also costs a password hash for its fingerprint) and queue an
+email. Users hammering "resend" and bots replaying the form multiply that into
+SMTP fan-out. :class:`EmailCoalescer` lets one send per user and kind through
+every ``window`` seconds. Repeats inside the window are answered exactly like
+the first request, since the email it queued is still on its way, but mint
+nothing and send nothing.
+
+A claim is released early when the email could not be queued, and when the
+flow it started completes (password reset, email verified), so the next
+request is never held back by a send that is no longer pending.
+
+Claims live in process memory by default, as expiry times in an insertion-
+ordered map that is pruned from the oldest end. ``EMAIL_COALESCE_BACKEND``
+swaps in a shared :class:`CoalesceBackend`, loaded like the rate limiter's
+(see :mod:`login.ratelimit`).
+"""
+
+import abc
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from .config import Settings
+from .ratelimit import load_backend
+
+KINDS = ("forgot_password", "request_verify")
+
+
+class CoalesceBackend(abc.ABC):
+    """Storage for pending-send claims; subclass to share them between workers."""
+
+    @abc.abstractmethod
+    async def claim(self, key: str, window: float) -> bool:
+        """Claim ``key`` for ``window`` seconds.
+
+        Returns ``True`` if the caller should send, ``False`` if an unexpired
+        claim already exists.
+        """
+
+    @abc.abstractmethod
+    async def release(self, key: str) -> None:
+        """Drop the claim on ``key``, if any."""
+
+    async def reset(self) -> None:  # noqa: B027 - optional hook
+        """Forget every claim."""
+
+
+class MemoryBackend(CoalesceBackend):
+    """Per-process claims, bounded to ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._claims: OrderedDict[str, float] = OrderedDict()
+
+    async def claim(self, key: str, window: float) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        expires_at = self._claims.get(key)
+        if expires_at is not None and expires_at > now:
+            return False
+        self._claims.pop(key, None)
+        self._claims[key] = now + window
+        while len(self._claims) > self.max_keys:
+            self._claims.popitem(last=False)
+        return True
+
+    def _prune(self, now: float) -> None:
+        # Insertion order is expiry order, since the window is fixed.
+        while self._claims:
+            key, expires_at = next(iter(self._claims.items()))
+            if expires_at > now:
+                break
+            del self._claims[key]
+
+    async def release(self, key: str) -> None:
+        self._claims.pop(key, None)
+
+    async def reset(self) -> None:
+        self._claims.clear()
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+
+class EmailCoalescer:
+    """Lets one email per user and kind through each window; counts the rest."""
+
+    enabled: bool = True
+    window: float = 300.0
+
+    def __init__(self, backend: CoalesceBackend | None = None) -> None:
+        self.backend = backend or MemoryBackend()
+        self.sent = dict.fromkeys(KINDS, 0)
+        self.coalesced = dict.fromkeys(KINDS, 0)
+        self.released = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.enabled = settings.email_coalesce_enabled
+        self.window = settings.email_coalesce_window_seconds
+        if settings.email_coalesce_backend:
+            self.backend = load_backend(settings.email_coalesce_backend)
+
+    async def claim(self, kind: str, user_id: uuid.UUID) -> bool:
+        """Whether to mint a token and send ``kind`` email to ``user_id`` now."""
+        if not self.enabled:
+            return True
+        if await self.backend.claim(f"{kind}:{user_id}", self.window):
+            self.sent[kind] += 1
+            return True
+        self.coalesced[kind] += 1
+        return False
+
+    async def release(self, kind: str, user_id: uuid.UUID) -> None:
+        """End ``user_id``'s window for ``kind`` so the next request sends."""
+        if self.enabled:
+            await self.backend.release(f"{kind}:{user_id}")
+            self.released += 1
+
+    async def reset(self) -> None:
+        self.sent = dict.fromkeys(KINDS, 0)
+        self.coalesced = dict.fromkeys(KINDS, 0)
+        self.released = 0
+        await self.backend.reset()
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"enabled": self.enabled, "window": self.window}
+        for kind in KINDS:
+            stats[f"{kind}_sent"] = self.sent[kind]
+            stats[f"{kind}_coalesced"] = self.coalesced[kind]
+        stats["released"] = self.released
+        if isinstance(self.backend, MemoryBackend):
+            stats["pending"] = len(self.backend)
+        return stats
+
+
+email_coalescer = EmailCoalescer()
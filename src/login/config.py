@@ -13,6 +13,20 @@ class Settings(userdbSettings):
         default="userdbdb", json_schema_extra={"env": "POSTGRES_DB"}
     )
     log_level: str = Field(default="INFO", json_schema_extra={"env": "LOG_LEVEL"})
+    server_host: str = Field(
+        default="0.0.0.0", json_schema_extra={"env": "SERVER_HOST"}
+    )
+    server_port: int = Field(default=8001, json_schema_extra={"env": "SERVER_PORT"})
+    server_workers: int = Field(default=0, json_schema_extra={"env": "SERVER_WORKERS"})
+    server_keepalive_seconds: float = Field(
+        default=75.0, json_schema_extra={"env": "SERVER_KEEPALIVE_SECONDS"}
+    )
+    server_backlog: int = Field(
+        default=2048, json_schema_extra={"env": "SERVER_BACKLOG"}
+    )
+    server_graceful_timeout_seconds: float = Field(
+        default=30.0, json_schema_extra={"env": "SERVER_GRACEFUL_TIMEOUT_SECONDS"}
+    )
     smtp_host: str = Field(default="localhost", json_schema_extra={"env": "SMTP_HOST"})
     smtp_port: int = Field(default=1025, json_schema_extra={"env": "SMTP_PORT"})
     smtp_user: str = Field(default="", json_schema_extra={"env": "SMTP_USER"})
@@ -21,3 +35,189 @@ class Settings(userdbSettings):
     frontend_url: str = Field(
         default="http://localhost:3000", json_schema_extra={"env": "FRONTEND_URL"}
     )
+    email_outbox_max_size: int = Field(
+        default=1000, json_schema_extra={"env": "EMAIL_OUTBOX_MAX_SIZE"}
+    )
+    email_outbox_concurrency: int = Field(
+        default=2, json_schema_extra={"env": "EMAIL_OUTBOX_CONCURRENCY"}
+    )
+    email_outbox_max_retries: int = Field(
+        default=3, json_schema_extra={"env": "EMAIL_OUTBOX_MAX_RETRIES"}
+    )
+    email_outbox_retry_backoff_seconds: float = Field(
+        default=1.0, json_schema_extra={"env": "EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS"}
+    )
+    email_outbox_shutdown_timeout_seconds: float = Field(
+        default=10.0,
+        json_schema_extra={"env": "EMAIL_OUTBOX_SHUTDOWN_TIMEOUT_SECONDS"},
+    )
+    email_outbox_batch_size: int = Field(
+        default=20, json_schema_extra={"env": "EMAIL_OUTBOX_BATCH_SIZE"}
+    )
+    smtp_timeout_seconds: float = Field(
+        default=10.0, json_schema_extra={"env": "SMTP_TIMEOUT_SECONDS"}
+    )
+    smtp_pool_size: int = Field(default=2, json_schema_extra={"env": "SMTP_POOL_SIZE"})
+    smtp_pool_idle_timeout_seconds: float = Field(
+        default=60.0, json_schema_extra={"env": "SMTP_POOL_IDLE_TIMEOUT_SECONDS"}
+    )
+    readiness_probe_interval_seconds: float = Field(
+        default=5.0, json_schema_extra={"env": "READINESS_PROBE_INTERVAL_SECONDS"}
+    )
+    readiness_probe_timeout_seconds: float = Field(
+        default=2.0, json_schema_extra={"env": "READINESS_PROBE_TIMEOUT_SECONDS"}
+    )
+    readiness_require_smtp: bool = Field(
+        default=False, json_schema_extra={"env": "READINESS_REQUIRE_SMTP"}
+    )
+    password_hash_executor: str = Field(
+        default="thread", json_schema_extra={"env": "PASSWORD_HASH_EXECUTOR"}
+    )
+    password_hash_workers: int = Field(
+        default=0, json_schema_extra={"env": "PASSWORD_HASH_WORKERS"}
+    )
+    password_hash_max_in_flight: int = Field(
+        default=0, json_schema_extra={"env": "PASSWORD_HASH_MAX_IN_FLIGHT"}
+    )
+    password_argon2_time_cost: int = Field(
+        default=3, json_schema_extra={"env": "PASSWORD_ARGON2_TIME_COST"}
+    )
+    password_argon2_memory_kib: int = Field(
+        default=65536, json_schema_extra={"env": "PASSWORD_ARGON2_MEMORY_KIB"}
+    )
+    password_argon2_parallelism: int = Field(
+        default=4, json_schema_extra={"env": "PASSWORD_ARGON2_PARALLELISM"}
+    )
+    password_rehash_on_login: bool = Field(
+        default=True, json_schema_extra={"env": "PASSWORD_REHASH_ON_LOGIN"}
+    )
+    database_replica_url: str = Field(
+        default="", json_schema_extra={"env": "DATABASE_REPLICA_URL"}
+    )
+    database_replica_sticky_seconds: float = Field(
+        default=10.0, json_schema_extra={"env": "DATABASE_REPLICA_STICKY_SECONDS"}
+    )
+    user_cache_enabled: bool = Field(
+        default=True, json_schema_extra={"env": "USER_CACHE_ENABLED"}
+    )
+    user_cache_max_size: int = Field(
+        default=10000, json_schema_extra={"env": "USER_CACHE_MAX_SIZE"}
+    )
+    user_cache_ttl_seconds: float = Field(
+        default=30.0, json_schema_extra={"env": "USER_CACHE_TTL_SECONDS"}
+    )
+    # Claims of a changed user are trusted for at most one revocation sync
+    # interval on workers that did not make the change.
+    jwt_embed_claims: bool = Field(
+        default=False, json_schema_extra={"env": "JWT_EMBED_CLAIMS"}
+    )
+    jwt_keys_dir: str = Field(default="", json_schema_extra={"env": "JWT_KEYS_DIR"})
+    jwt_active_kid: str = Field(default="", json_schema_extra={"env": "JWT_ACTIVE_KID"})
+    jwks_max_age_seconds: int = Field(
+        default=300, json_schema_extra={"env": "JWKS_MAX_AGE_SECONDS"}
+    )
+    introspection_max_tokens: int = Field(
+        default=100, json_schema_extra={"env": "INTROSPECTION_MAX_TOKENS"}
+    )
+    introspection_cache_size: int = Field(
+        default=10_000, json_schema_extra={"env": "INTROSPECTION_CACHE_SIZE"}
+    )
+    introspection_cache_ttl_seconds: float = Field(
+        default=60.0, json_schema_extra={"env": "INTROSPECTION_CACHE_TTL_SECONDS"}
+    )
+    introspection_client_secret: str = Field(
+        default="", json_schema_extra={"env": "INTROSPECTION_CLIENT_SECRET"}
+    )
+    refresh_token_enabled: bool = Field(
+        default=True, json_schema_extra={"env": "REFRESH_TOKEN_ENABLED"}
+    )
+    refresh_token_lifetime_seconds: int = Field(
+        default=14 * 24 * 3600,
+        json_schema_extra={"env": "REFRESH_TOKEN_LIFETIME_SECONDS"},
+    )
+    token_revocation_sync_seconds: float = Field(
+        default=5.0, json_schema_extra={"env": "TOKEN_REVOCATION_SYNC_SECONDS"}
+    )
+    login_activity_enabled: bool = Field(
+        default=True, json_schema_extra={"env": "LOGIN_ACTIVITY_ENABLED"}
+    )
+    login_activity_flush_seconds: float = Field(
+        default=5.0, json_schema_extra={"env": "LOGIN_ACTIVITY_FLUSH_SECONDS"}
+    )
+    login_activity_max_pending: int = Field(
+        default=10_000, json_schema_extra={"env": "LOGIN_ACTIVITY_MAX_PENDING"}
+    )
+    rate_limit_enabled: bool = Field(
+        default=True, json_schema_extra={"env": "RATE_LIMIT_ENABLED"}
+    )
+    rate_limit_ip_per_minute: float = Field(
+        default=30, json_schema_extra={"env": "RATE_LIMIT_IP_PER_MINUTE"}
+    )
+    rate_limit_account_per_minute: float = Field(
+        default=10, json_schema_extra={"env": "RATE_LIMIT_ACCOUNT_PER_MINUTE"}
+    )
+    rate_limit_trust_forwarded: bool = Field(
+        default=False, json_schema_extra={"env": "RATE_LIMIT_TRUST_FORWARDED"}
+    )
+    rate_limit_forwarded_hops: int = Field(
+        default=1, json_schema_extra={"env": "RATE_LIMIT_FORWARDED_HOPS"}
+    )
+    rate_limit_backend: str = Field(
+        default="", json_schema_extra={"env": "RATE_LIMIT_BACKEND"}
+    )
+    email_coalesce_enabled: bool = Field(
+        default=True, json_schema_extra={"env": "EMAIL_COALESCE_ENABLED"}
+    )
+    email_coalesce_window_seconds: float = Field(
+        default=300.0, json_schema_extra={"env": "EMAIL_COALESCE_WINDOW_SECONDS"}
+    )
+    email_coalesce_backend: str = Field(
+        default="", json_schema_extra={"env": "EMAIL_COALESCE_BACKEND"}
+    )
+    email_templates_dir: str = Field(
+        default="", json_schema_extra={"env": "EMAIL_TEMPLATES_DIR"}
+    )
+    email_default_locale: str = Field(
+        default="en", json_schema_extra={"env": "EMAIL_DEFAULT_LOCALE"}
+    )
+    audit_enabled: bool = Field(
+        default=True, json_schema_extra={"env": "AUDIT_ENABLED"}
+    )
+    audit_sink: str = Field(default="file", json_schema_extra={"env": "AUDIT_SINK"})
+    audit_path: str = Field(
+        default="audit/audit.jsonl", json_schema_extra={"env": "AUDIT_PATH"}
+    )
+    audit_max_bytes: int = Field(
+        default=50 * 1024 * 1024, json_schema_extra={"env": "AUDIT_MAX_BYTES"}
+    )
+    audit_rotate_seconds: float = Field(
+        default=24 * 3600, json_schema_extra={"env": "AUDIT_ROTATE_SECONDS"}
+    )
+    audit_backups: int = Field(default=10, json_schema_extra={"env": "AUDIT_BACKUPS"})
+    audit_queue_size: int = Field(
+        default=10_000, json_schema_extra={"env": "AUDIT_QUEUE_SIZE"}
+    )
+    audit_batch_size: int = Field(
+        default=500, json_schema_extra={"env": "AUDIT_BATCH_SIZE"}
+    )
+    audit_flush_seconds: float = Field(
+        default=1.0, json_schema_extra={"env": "AUDIT_FLUSH_SECONDS"}
+    )
+    profiling_enabled: bool = Field(
+        default=False, json_schema_extra={"env": "PROFILING_ENABLED"}
+    )
+    profiling_threshold_ms: float = Field(
+        default=1000.0, json_schema_extra={"env": "PROFILING_THRESHOLD_MS"}
+    )
+    profiling_sample_rate: float = Field(
+        default=0.0, json_schema_extra={"env": "PROFILING_SAMPLE_RATE"}
+    )
+    profiling_interval_ms: float = Field(
+        default=5.0, json_schema_extra={"env": "PROFILING_INTERVAL_MS"}
+    )
+    profiling_dir: str = Field(
+        default="profiles", json_schema_extra={"env": "PROFILING_DIR"}
+    )
+    profiling_max_files: int = Field(
+        default=100, json_schema_extra={"env": "PROFILING_MAX_FILES"}
+    )
@@ -0,0 +1,144 @@
+"""Optional read-replica routing.
+
+Token authentication loads the user on every cache miss, which makes these
+reads most of the database traffic. With ``DATABASE_REPLICA_URL`` set, the
+:class:`ReplicaRouter` keeps a second engine and connection pool for the
+replica. It serves those lookups (:meth:`ReplicaRouter.get_user`) and the admin
+listings (:func:`get_read_session`) from the replica, so they no longer compete
+with registrations and updates on the primary.
+
+Replicas lag. So that users always see their own changes, the user manager
+calls :meth:`ReplicaRouter.mark_written` whenever it creates or updates a user.
+That user's lookups then go to the primary for ``sticky_seconds``. A user the
+replica does not have yet is looked up on the primary as well. Stickiness is
+per worker process; ``sticky_seconds`` should comfortably exceed the
+replication lag.
+
+Without a replica URL every read goes to the primary, as before.
+"""
+
+import time
+import uuid
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from userdb import db
+from userdb.models import User
+
+from .config import Settings
+
+
+class ReplicaRouter:
+    """Sends reads to the replica unless the user wrote recently."""
+
+    url: str = ""
+    sticky_seconds: float = 10.0
+    # Bounds the per-user stickiness map; older entries are pruned first.
+    max_sticky: int = 100_000
+
+    def __init__(self) -> None:
+        self.engine: AsyncEngine | None = None
+        self.session_maker: async_sessionmaker[AsyncSession] | None = None
+        self._written: dict[uuid.UUID, float] = {}
+        self.replica_reads = 0
+        self.replica_misses = 0
+        self.sticky_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.session_maker is not None
+
+    def configure(self, settings: Settings) -> None:
+        self.url = settings.database_replica_url
+        self.sticky_seconds = settings.database_replica_sticky_seconds
+
+    def start(self) -> None:
+        if self.url and self.engine is None:
+            self.engine = create_async_engine(self.url)
+            self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def stop(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+        self.engine = None
+        self.session_maker = None
+        self._written.clear()
+
+    def mark_written(self, user_id: uuid.UUID) -> None:
+        """Route ``user_id``'s reads to the primary for ``sticky_seconds``."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self._written.pop(user_id, None)
+        self._written[user_id] = now + self.sticky_seconds
+        if len(self._written) > self.max_sticky:
+            self._prune(now)
+
+    def is_sticky(self, user_id: uuid.UUID) -> bool:
+        until = self._written.get(user_id)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del self._written[user_id]
+            return False
+        return True
+
+    def _prune(self, now: float) -> None:
+        # Insertion order is expiry order, since the window is fixed.
+        while self._written:
+            user_id, until = next(iter(self._written.items()))
+            if until >= now and len(self._written) <= self.max_sticky:
+                break
+            del self._written[user_id]
+
+    async def get_user(self, user_id: uuid.UUID) -> User | None:
+        """Load a user from the replica.
+
+        Returns ``None`` when the primary must be asked instead: no replica is
+        configured, the user wrote recently, or the replica lacks the user.
+        The returned instance is detached.
+        """
+        if not self.enabled:
+            return None
+        if self.is_sticky(user_id):
+            self.sticky_reads += 1
+            return None
+        async with self.session_maker() as session:
+            user = await session.get(User, user_id)
+        if user is None:
+            self.replica_misses += 1
+        else:
+            self.replica_reads += 1
+        return user
+
+    @asynccontextmanager
+    async def session(self) -> AsyncGenerator[AsyncSession, None]:
+        """A session on the replica if configured, else on the primary."""
+        maker = self.session_maker or db.DBState.async_session_maker
+        async with maker() as session:
+            yield session
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "replica_reads": self.replica_reads,
+            "replica_misses": self.replica_misses,
+            "sticky_reads": self.sticky_reads,
+            "sticky_users": len(self._written),
+        }
+
+
+replica = ReplicaRouter()
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only queries that tolerate replication lag."""
+    async with replica.session() as session:
+        yield session
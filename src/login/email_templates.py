@@ -0,0 +1,257 @@
+"""Precompiled templates for the password reset and verification emails.
+
+Templates live in ``<directory>/<locale>/<name>.{subject,txt,html}``; the
+subject and text parts are required, the HTML part is optional. They use
+:class:`string.Template` placeholders (``$link``). :meth:`EmailTemplates.load`
+reads and compiles every template once, at startup, into a format string, so
+rendering a message is one ``str.format_map`` per part with no re-parsing.
+Values substituted into the HTML part are escaped. Loading also checks each
+template against the values its caller passes (:data:`PLACEHOLDERS`), so a
+misspelt placeholder fails at startup instead of on the first email.
+
+Templates are cached by name and locale. The locale of a message comes from
+the request's ``Accept-Language`` header: each language range is tried in
+preference order, first as given (``pt-br``) and then by its primary subtag
+(``pt``), falling back to ``default_locale``. Resolved headers are cached too,
+as browsers send the same few values over and over.
+"""
+
+import html
+import string
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from fastapi import Request
+
+from .config import Settings
+
+BUNDLED_DIRECTORY = Path(__file__).parent / "templates" / "email"
+
+_MAX_RESOLVED = 1024
+
+# Values the auth hooks pass to each template; a template may use any of them.
+PLACEHOLDERS: dict[str, frozenset[str]] = {
+    "reset_password": frozenset({"link"}),
+    "verify_email": frozenset({"link"}),
+}
+
+
+class CompiledTemplate:
+    """A ``string.Template`` source compiled to a ``str.format`` string."""
+
+    __slots__ = ("_format", "names", "source")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        parts = []
+        position = 0
+        for match in string.Template.pattern.finditer(source):
+            parts.append(_escape_braces(source[position : match.start()]))
+            position = match.end()
+            if match["escaped"] is not None:
+                parts.append("$")
+                continue
+            name = match["named"] or match["braced"]
+            if name is None:
+                raise ValueError(
+                    f"Invalid placeholder at offset {match.start()}: {source!r}"
+                )
+            parts.append(f"{{{name}}}")
+        parts.append(_escape_braces(source[position:]))
+        self._format = "".join(parts)
+        self.names = frozenset(
+            field
+            for _, field, _, _ in string.Formatter().parse(self._format)
+            if field is not None
+        )
+
+    def render(self, values: dict[str, Any]) -> str:
+        return self._format.format_map(values)
+
+
+def _escape_braces(literal: str) -> str:
+    return literal.replace("{", "{{").replace("}", "}}")
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedEmail:
+    subject: str
+    text: str
+    html: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class EmailTemplate:
+    name: str
+    locale: str
+    subject: CompiledTemplate
+    text: CompiledTemplate
+    html: CompiledTemplate | None = None
+
+    @property
+    def names(self) -> frozenset[str]:
+        """Placeholders used by any part of the template."""
+        parts = (self.subject, self.text, self.html)
+        return frozenset().union(*(part.names for part in parts if part is not None))
+
+    def render(self, values: dict[str, Any]) -> RenderedEmail:
+        return RenderedEmail(
+            subject=self.subject.render(values),
+            text=self.text.render(values),
+            html=self.html.render(
+                {key: html.escape(str(value)) for key, value in values.items()}
+            )
+            if self.html is not None
+            else None,
+        )
+
+
+class EmailTemplates:
+    """Registry of compiled email templates keyed by name and locale."""
+
+    default_locale: str = "en"
+
+    def __init__(
+        self,
+        directory: Path = BUNDLED_DIRECTORY,
+        placeholders: dict[str, frozenset[str]] = PLACEHOLDERS,
+    ) -> None:
+        self.directory = directory
+        self.placeholders = placeholders
+        self._templates: dict[tuple[str, str], EmailTemplate] = {}
+        self._resolved: dict[str | None, str] = {}
+        self.renders = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.directory = (
+            Path(settings.email_templates_dir)
+            if settings.email_templates_dir
+            else BUNDLED_DIRECTORY
+        )
+        self.default_locale = settings.email_default_locale.lower()
+        self.load()
+
+    def load(self) -> None:
+        """Read and compile every template under ``directory``.
+
+        Raises ``ValueError`` if a template is malformed, uses a placeholder
+        its caller does not pass, or is missing from the default locale, so a
+        bad deployment fails at startup rather than on the first email.
+        """
+        templates = {}
+        for locale_dir in sorted(self.directory.iterdir()):
+            if not locale_dir.is_dir():
+                continue
+            locale = locale_dir.name.lower()
+            for text_path in sorted(locale_dir.glob("*.txt")):
+                name = text_path.stem
+                html_path = text_path.with_suffix(".html")
+                template = EmailTemplate(
+                    name=name,
+                    locale=locale,
+                    subject=_compile(text_path.with_suffix(".subject")),
+                    text=_compile(text_path),
+                    html=_compile(html_path) if html_path.exists() else None,
+                )
+                allowed = self.placeholders.get(name)
+                if allowed is not None and not template.names <= allowed:
+                    raise ValueError(
+                        f"{locale_dir / name} uses unknown placeholders: "
+                        + ", ".join(sorted(template.names - allowed))
+                    )
+                templates[name, locale] = template
+        names = {name for name, _ in templates}
+        missing = sorted(n for n in names if (n, self.default_locale) not in templates)
+        if not names or missing:
+            raise ValueError(
+                f"{self.directory} has no {self.default_locale!r} templates"
+                + (f" for {', '.join(missing)}" if missing else "")
+            )
+        self._templates = templates
+        self._resolved.clear()
+
+    @property
+    def locales(self) -> set[str]:
+        return {locale for _, locale in self._templates}
+
+    def resolve(self, accept_language: str | None) -> str:
+        """The best available locale for an ``Accept-Language`` header value."""
+        locale = self._resolved.get(accept_language)
+        if locale is not None:
+            return locale
+        locale = self.default_locale
+        available = self.locales
+        for tag in _language_ranges(accept_language):
+            if tag in available:
+                locale = tag
+                break
+            primary = tag.partition("-")[0]
+            if primary in available:
+                locale = primary
+                break
+        if len(self._resolved) >= _MAX_RESOLVED:
+            self._resolved.clear()
+        self._resolved[accept_language] = locale
+        return locale
+
+    def get(self, name: str, accept_language: str | None = None) -> EmailTemplate:
+        if not self._templates:
+            self.load()
+        locale = self.resolve(accept_language)
+        template = self._templates.get((name, locale))
+        if template is None:
+            template = self._templates[name, self.default_locale]
+        return template
+
+    def render(
+        self, name: str, accept_language: str | None = None, /, **values: Any
+    ) -> RenderedEmail:
+        """Render template ``name`` in the locale preferred by the header."""
+        rendered = self.get(name, accept_language).render(values)
+        self.renders += 1
+        return rendered
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "default_locale": self.default_locale,
+            "templates": len(self._templates),
+            "locales": sorted(self.locales),
+            "renders": self.renders,
+        }
+
+
+def _compile(path: Path) -> CompiledTemplate:
+    return CompiledTemplate(path.read_text(encoding="utf-8").rstrip())
+
+
+def _language_ranges(accept_language: str | None) -> list[str]:
+    """Language ranges of an ``Accept-Language`` value, most preferred first."""
+    if not accept_language:
+        return []
+    ranges = []
+    for position, item in enumerate(accept_language.split(",")):
+        tag, _, params = item.partition(";")
+        tag = tag.strip().lower()
+        if not tag or tag == "*":
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, tag))
+    return [tag for *_, tag in sorted(ranges)]
+
+
+def accept_language(request: Request | None) -> str | None:
+    """The request's ``Accept-Language`` header, if there is a request."""
+    return request.headers.get("accept-language") if request is not None else None
+
+
+email_templates = EmailTemplates()
@@ -1,38 +1,149 @@
+import binascii
 import logging
 import smtplib
+import time
+from dataclasses import dataclass
+from email import policy
 from email.message import EmailMessage
+from functools import lru_cache
+from typing import Any
 
+from . import metrics
 from .config import Settings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FROM_ADDRESS = "noreply@example.com"
 
-def send_email(to_email: str, subject: str, body: str):
-    """Send an email using SMTP settings from environment variables."""
-    settings = Settings()
-    smtp_host = settings.smtp_host
-    smtp_port = settings.smtp_port
-    smtp_user = settings.smtp_user
-    smtp_pass = settings.smtp_password
-    smtp_tls = settings.smtp_tls
 
+@dataclass(frozen=True, slots=True)
+class SMTPConfig:
+    """SMTP relay connection parameters, resolved once from the settings."""
+
+    host: str = "localhost"
+    port: int = 1025
+    user: str = ""
+    password: str = ""
+    tls: bool = False
+    timeout: float = 10.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SMTPConfig":
+        return cls(
+            host=settings.smtp_host,
+            port=settings.smtp_port,
+            user=settings.smtp_user,
+            password=settings.smtp_password,
+            tls=settings.smtp_tls,
+            timeout=settings.smtp_timeout_seconds,
+        )
+
+    @property
+    def from_address(self) -> str:
+        return self.user or DEFAULT_FROM_ADDRESS
+
+
+_TEXT_TYPE = 'text/plain; charset="utf-8"'
+_HTML_TYPE = 'text/html; charset="utf-8"'
+
+
+@lru_cache(maxsize=256)
+def _parsed_headers(*headers: tuple[str, str]) -> tuple[tuple[str, Any], ...]:
+    """Headers parsed once into the objects :class:`EmailMessage` stores.
+
+    Parsing a header through the default policy dominates the cost of building
+    a message; the sender, subject and MIME headers repeat from one message to
+    the next, so only the recipient is parsed per message.
+    """
+    return tuple(policy.default.header_store_parse(*header) for header in headers)
+
+
+def _set_headers(msg: EmailMessage, *headers: tuple[str, str]) -> None:
+    for name, value in _parsed_headers(*headers):
+        msg.set_raw(name, value)
+
+
+def _set_text(msg: EmailMessage, content_type: str, content: str) -> None:
+    _set_headers(
+        msg,
+        ("Content-Type", content_type),
+        ("Content-Transfer-Encoding", "quoted-printable"),
+    )
+    msg.set_payload(binascii.b2a_qp(content.encode()).decode("ascii"))
+
+
+def build_message(
+    config: SMTPConfig,
+    to_email: str,
+    subject: str,
+    body: str,
+    html: str | None = None,
+) -> EmailMessage:
+    """Build a message addressed from the configured sender.
+
+    ``body`` is the plain-text content; with ``html`` the message is
+    ``multipart/alternative`` with the HTML part last, as mail clients prefer
+    the last alternative they can display.
+    """
     msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = smtp_user or "noreply@example.com"
+    _set_headers(
+        msg,
+        ("Subject", subject),
+        ("From", config.from_address),
+        ("MIME-Version", "1.0"),
+    )
     msg["To"] = to_email
-    msg.set_content(body)
+    if html is None:
+        _set_text(msg, _TEXT_TYPE, body)
+        return msg
+    _set_headers(msg, ("Content-Type", "multipart/alternative"))
+    for content_type, content in ((_TEXT_TYPE, body), (_HTML_TYPE, html)):
+        part = EmailMessage()
+        _set_text(part, content_type, content)
+        msg.attach(part)
+    return msg
+
+
+def send_email(
+    to_email: str,
+    subject: str,
+    body: str,
+    html: str | None = None,
+    config: SMTPConfig | None = None,
+) -> bool:
+    """Send an email through the configured SMTP relay, or ``config``'s.
+
+    This opens a dedicated connection for a single message; bulk senders
+    should use :class:`login.smtp_pool.SMTPConnectionPool` instead. Errors are
+    logged rather than raised; the return value tells the caller whether the
+    message was accepted by the relay so it can retry.
+    """
+    if config is None:
+        # Deferred: the service container builds its SMTPConfig from this module.
+        from .services import services
+
+        config = services.smtp_config
+    msg = build_message(config, to_email, subject, body, html)
 
+    started = time.perf_counter()
     try:
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            if smtp_tls:
+        with smtplib.SMTP(config.host, config.port, timeout=config.timeout) as server:
+            if config.tls:
                 logger.info("Starting TLS")
                 server.starttls()
-            if smtp_user and smtp_pass:
+            if config.user and config.password:
                 logger.info("Logging in to SMTP server")
-                server.login(smtp_user, smtp_pass)
+                server.login(config.user, config.password)
             server.send_message(msg)
             logger.info(f"Email successfully sent to {to_email}")
     except smtplib.SMTPException as e:
         logger.error(f"SMTP error: {e}", exc_info=True)
+        metrics.SMTP_FAILURES.inc("rejected")
     except Exception as e:
         logger.error(f"Unexpected error {e}", exc_info=True)
+        metrics.SMTP_FAILURES.inc("connection")
+    else:
+        return True
+    finally:
+        metrics.SMTP_SEND.observe(time.perf_counter() - started)
+    return False
@@ -0,0 +1,224 @@
+"""Batch access-token introspection for downstream services.
+
+Services that validate tokens through ``/users/me`` pay a request and a user
+load per token. ``POST /auth/introspect`` takes up to ``max_tokens`` tokens
+and answers for all of them at once, in order: whether each is valid and, if
+so, the user id, the user's active/verified/superuser flags and the expiry.
+
+Tokens are verified once and the decoded payload is kept in a bounded LRU
+keyed by the token's digest, until the token expires or for ``ttl`` seconds,
+whichever is sooner; repeated tokens in a burst skip signature verification.
+Revocation is in memory and checked on every lookup, hit or not. User flags
+are never cached here: users found in the user cache are answered from it and
+the rest are loaded with one ``IN`` query, from the replica when configured.
+
+As RFC 7662 requires, callers authenticate: they send the shared
+``INTROSPECTION_CLIENT_SECRET`` as a bearer credential. Without a configured
+secret every call is refused, so tokens cannot be probed anonymously.
+"""
+
+import hashlib
+import hmac
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from userdb import db
+from userdb.models import User
+
+from .cache import user_cache
+from .config import Settings
+from .db_routing import replica
+from .revocation import revocations
+from .strategy import LoginJWTStrategy
+
+_FLAGS = (User.id, User.is_active, User.is_verified, User.is_superuser)
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class IntrospectRequest(BaseModel):
+    tokens: list[str] = Field(min_length=1)
+
+
+class TokenInfo(BaseModel):
+    valid: bool
+    user_id: uuid.UUID | None = None
+    is_active: bool | None = None
+    is_verified: bool | None = None
+    is_superuser: bool | None = None
+    expires_at: int | None = None
+
+
+class IntrospectResponse(BaseModel):
+    results: list[TokenInfo]
+
+
+class TokenIntrospector:
+    """Verifies batches of tokens with a short-lived decoded-token cache."""
+
+    max_tokens: int = 100
+    max_size: int = 10_000
+    ttl: float = 60.0
+    client_secret: str = ""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.requests = 0
+        self.tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self.user_queries = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.max_tokens = settings.introspection_max_tokens
+        self.max_size = settings.introspection_cache_size
+        self.ttl = settings.introspection_cache_ttl_seconds
+        self.client_secret = settings.introspection_client_secret
+        self._entries.clear()
+
+    def authenticate(self, credential: str | None) -> bool:
+        """Whether ``credential`` is the configured client secret."""
+        if not self.client_secret or credential is None:
+            return False
+        return hmac.compare_digest(credential.encode(), self.client_secret.encode())
+
+    def decode(self, strategy: LoginJWTStrategy, token: str) -> dict[str, Any] | None:
+        """The verified payload of ``token``, or ``None`` if it is not valid."""
+        key = _digest(token)
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[1]
+            return None if revocations.is_revoked(payload) else payload
+        self.misses += 1
+        payload = strategy.decode(token)
+        if payload is None:
+            self._entries.pop(key, None)
+            return None
+        expires_at = min(payload.get("exp", now + self.ttl), now + self.ttl)
+        if self.max_size > 0:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return payload
+
+    async def load_flags(
+        self, user_ids: set[uuid.UUID]
+    ) -> dict[uuid.UUID, tuple[bool, bool, bool]]:
+        """Active/verified/superuser flags per user, with at most one query."""
+        flags = {}
+        missing = []
+        for user_id in user_ids:
+            user = user_cache.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                flags[user_id] = (user.is_active, user.is_verified, user.is_superuser)
+        if not missing:
+            return flags
+        # Recent writers must see their own changes, as with user lookups.
+        if any(replica.is_sticky(user_id) for user_id in missing):
+            session_scope = db.DBState.async_session_maker()
+        else:
+            session_scope = replica.session()
+        async with session_scope as session:
+            rows = await session.execute(select(*_FLAGS).where(User.id.in_(missing)))
+        self.user_queries += 1
+        for user_id, *row in rows:
+            flags[user_id] = tuple(row)
+        return flags
+
+    async def introspect(
+        self, strategy: LoginJWTStrategy, tokens: list[str]
+    ) -> list[TokenInfo]:
+        self.requests += 1
+        self.tokens += len(tokens)
+        decoded: list[tuple[uuid.UUID, int | None] | None] = []
+        for token in tokens:
+            payload = self.decode(strategy, token)
+            try:
+                decoded.append((uuid.UUID(payload["sub"]), payload.get("exp")))
+            except (TypeError, KeyError, ValueError, AttributeError):
+                decoded.append(None)
+        flags = await self.load_flags({d[0] for d in decoded if d is not None})
+        results = []
+        for entry in decoded:
+            if entry is None or entry[0] not in flags:
+                results.append(TokenInfo(valid=False))
+                continue
+            user_id, expires_at = entry
+            is_active, is_verified, is_superuser = flags[user_id]
+            results.append(
+                TokenInfo(
+                    valid=True,
+                    user_id=user_id,
+                    is_active=is_active,
+                    is_verified=is_verified,
+                    is_superuser=is_superuser,
+                    expires_at=expires_at,
+                )
+            )
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "hits": self.hits,
+            "misses": self.misses,
+            "user_queries": self.user_queries,
+        }
+
+
+introspector = TokenIntrospector()
+
+_client_credentials = HTTPBearer(auto_error=False)
+
+
+async def require_client(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_client_credentials),
+) -> None:
+    """Dependency refusing callers without the introspection client secret."""
+    if not introspector.authenticate(credentials and credentials.credentials):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def get_introspection_router(get_strategy) -> APIRouter:
+    """Router with ``POST /introspect``, to be mounted under ``/auth``."""
+    router = APIRouter()
+
+    @router.post(
+        "/introspect",
+        response_model=IntrospectResponse,
+        dependencies=[Depends(require_client)],
+    )
+    async def introspect(
+        payload: IntrospectRequest,
+        strategy: LoginJWTStrategy = Depends(get_strategy),
+    ) -> IntrospectResponse:
+        """Validate a batch of access tokens; results are in request order."""
+        if len(payload.tokens) > introspector.max_tokens:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {introspector.max_tokens} tokens per request",
+            )
+        results = await introspector.introspect(strategy, payload.tokens)
+        return IntrospectResponse(results=results)
+
+    return router
@@ -0,0 +1,182 @@
+"""Asymmetric JWT signing keys, rotation and the published JWKS.
+
+With an asymmetric ``JWT_ALGORITHM`` (RS256/RS384/RS512 or EdDSA) access
+tokens are signed with a private key and carry its ``kid`` in the header, so
+downstream services can verify them locally from the public keys published at
+``/.well-known/jwks.json`` instead of sharing ``JWT_SECRET`` or calling back.
+
+Keys are PEM files in ``JWT_KEYS_DIR``; the file name (without ``.pem``) is the
+``kid``. Private keys can sign and verify, public-only keys are kept to verify
+tokens issued before a rotation. ``JWT_ACTIVE_KID`` selects the signing key and
+defaults to the last private key in name order. To rotate: add a new private
+key, point ``JWT_ACTIVE_KID`` at it, replace the old private key file with its
+public key, and delete that file once tokens signed with it have expired.
+
+New keys can be generated with ``python -m login.keys DIR KID``.
+"""
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from fastapi import APIRouter, Request, Response, status
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+from .config import Settings
+from .responses import etag_for, etag_matches
+
+RSA_ALGORITHMS = ("RS256", "RS384", "RS512")
+ASYMMETRIC_ALGORITHMS = (*RSA_ALGORITHMS, "EdDSA")
+
+
+@dataclass(frozen=True, slots=True)
+class SigningKey:
+    """A key pair (or retired public key) identified by ``kid``."""
+
+    kid: str
+    algorithm: str
+    public_key: Any
+    private_key: Any | None = None
+
+    def jwk(self) -> dict[str, Any]:
+        """Return the public JWK for this key."""
+        if self.algorithm == "EdDSA":
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            jwk = RSAAlgorithm.to_jwk(self.public_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def _check_key_type(key: Any, algorithm: str, path: Path) -> None:
+    expected = (
+        (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)
+        if algorithm == "EdDSA"
+        else (rsa.RSAPrivateKey, rsa.RSAPublicKey)
+    )
+    if not isinstance(key, expected):
+        raise ValueError(f"Key {path} does not match JWT algorithm {algorithm}")
+
+
+def load_key(path: Path, algorithm: str) -> SigningKey:
+    """Load a private or public PEM key file for ``algorithm``."""
+    data = path.read_bytes()
+    if b"PRIVATE KEY" in data:
+        private_key = serialization.load_pem_private_key(data, password=None)
+        _check_key_type(private_key, algorithm, path)
+        return SigningKey(path.stem, algorithm, private_key.public_key(), private_key)
+    public_key = serialization.load_pem_public_key(data)
+    _check_key_type(public_key, algorithm, path)
+    return SigningKey(path.stem, algorithm, public_key)
+
+
+class KeySet:
+    """The signing key plus every key still accepted for verification.
+
+    The JWKS document is serialized once, with its ETag, when the set is
+    built; serving it never re-encodes keys.
+    """
+
+    def __init__(self, keys: list[SigningKey], active_kid: str) -> None:
+        self._keys = {key.kid: key for key in keys}
+        active = self._keys.get(active_kid)
+        if active is None or active.private_key is None:
+            raise ValueError(f"No private key found for active kid {active_kid!r}")
+        self.active = active
+        self.jwks_body = json.dumps(
+            {"keys": [key.jwk() for key in keys]}, separators=(",", ":")
+        ).encode()
+        self.jwks_etag = etag_for(self.jwks_body)
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        return self._keys.get(kid) if kid is not None else None
+
+    @classmethod
+    def load(
+        cls, directory: str | Path, algorithm: str, active_kid: str = ""
+    ) -> "KeySet":
+        """Load every ``*.pem`` key in ``directory``."""
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported asymmetric JWT algorithm: {algorithm}")
+        keys = [
+            load_key(path, algorithm) for path in sorted(Path(directory).glob("*.pem"))
+        ]
+        if not active_kid:
+            signing = [key.kid for key in keys if key.private_key is not None]
+            if not signing:
+                raise ValueError(f"No private signing key found in {directory}")
+            active_kid = signing[-1]
+        return cls(keys, active_kid)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "KeySet | None":
+        """Build the key set, or ``None`` when tokens are HMAC-signed."""
+        if settings.JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+            return None
+        if not settings.jwt_keys_dir:
+            raise RuntimeError(
+                f"JWT_KEYS_DIR is required for JWT_ALGORITHM={settings.JWT_ALGORITHM}"
+            )
+        return cls.load(
+            settings.jwt_keys_dir, settings.JWT_ALGORITHM, settings.jwt_active_kid
+        )
+
+
+EMPTY_JWKS_BODY = b'{"keys":[]}'
+
+
+def get_jwks_router(key_set: KeySet | None, max_age: int) -> APIRouter:
+    """Router serving the precomputed JWKS with ETag and cache headers.
+
+    HMAC deployments publish an empty key set; the shared secret never leaves
+    the service.
+    """
+    router = APIRouter()
+    body = key_set.jwks_body if key_set else EMPTY_JWKS_BODY
+    etag = key_set.jwks_etag if key_set else etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+    @router.get("/.well-known/jwks.json", tags=["auth"])
+    async def jwks(request: Request) -> Response:
+        """Public keys for verifying access tokens locally."""
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    return router
+
+
+def generate_key(directory: str | Path, kid: str, algorithm: str = "RS256") -> Path:
+    """Write a new private key ``<kid>.pem`` into ``directory``."""
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm in RSA_ALGORITHMS:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f"Unsupported asymmetric JWT algorithm: {algorithm}")
+    path = Path(directory) / f"{kid}.pem"
+    path.write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    path.chmod(0o600)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a JWT signing key.")
+    parser.add_argument("directory")
+    parser.add_argument("kid")
+    parser.add_argument("--algorithm", default="RS256", choices=ASYMMETRIC_ALGORITHMS)
+    args = parser.parse_args()
+    print(generate_key(args.directory, args.kid, args.algorithm))
+
+
+if __name__ == "__main__":
+    main()
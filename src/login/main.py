@@ -2,33 +2,241 @@
 
 import logging
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from userdb import db
-from userdb.schemas import UserCreate, UserRead, UserUpdate
+from userdb.schemas import UserCreate, UserRead
 
-from .auth import auth_backend, fastapi_users
+from .activity import activity
+from .admin import get_admin_router
+from .audit import audit
+from .auth import (
+    auth_backend,
+    fastapi_users,
+    get_check_router,
+    get_jwt_strategy,
+    get_user_manager,
+)
+from .cache import user_cache
+from .coalesce import email_coalescer
 from .config import Settings
+from .db_routing import replica
+from .email_templates import email_templates
+from .introspection import get_introspection_router, introspector
+from .keys import get_jwks_router
+from .metrics import MetricsMiddleware, instrument_engine, registry
+from .outbox import outbox
+from .password import password_helper
+from .profiling import ProfilingMiddleware, profiler
+from .ratelimit import RateLimitMiddleware, rate_limiter
+from .readiness import readiness
+from .refresh import get_refresh_router, refresh_tokens
+from .responses import FastJSONResponse
+from .revocation import revocations
+from .services import services
+from .users import get_users_router, user_representations
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(name)s %(message)s",
 )
 
+# Set by the server once it has created the tables and the admin user, before
+# starting its workers.
+database_bootstrapped = False
+
+
+def get_health_router() -> APIRouter:
+    """Router with the health check, subsystem stats and Prometheus metrics."""
+    router = APIRouter(tags=["health"])
+
+    @router.get("/health")
+    @router.get("/health/live")
+    async def health_check() -> dict[str, str]:
+        """Liveness: the worker is up and its event loop is answering."""
+        return {"status": "ok"}
+
+    @router.get("/health/ready")
+    async def readiness_check() -> FastJSONResponse:
+        """Readiness from the last background probe of the database and SMTP."""
+        return FastJSONResponse(
+            readiness.state(), status_code=200 if readiness.ready else 503
+        )
+
+    @router.get("/health/outbox")
+    async def outbox_stats() -> dict[str, float | int]:
+        """Email outbox queue depth, delivery counters and send latency."""
+        return outbox.stats()
+
+    @router.get("/health/email-coalescing")
+    async def email_coalescing_stats() -> dict[str, Any]:
+        """Reset and verification emails sent and coalesced per user window."""
+        return email_coalescer.stats()
+
+    @router.get("/health/email-templates")
+    async def email_templates_stats() -> dict[str, Any]:
+        """Loaded email templates, their locales and the number rendered."""
+        return email_templates.stats()
+
+    @router.get("/health/password")
+    async def password_hash_stats() -> dict[str, Any]:
+        """Password hashing pool queue depth and hash timings."""
+        return password_helper.stats()
+
+    @router.get("/health/user-cache")
+    async def user_cache_stats() -> dict[str, Any]:
+        """User cache size and hit/miss/eviction counters."""
+        return user_cache.stats()
+
+    @router.get("/health/user-representations")
+    async def user_representation_stats() -> dict[str, Any]:
+        """Precomputed /users bodies reused, rendered and answered with 304."""
+        return user_representations.stats()
+
+    @router.get("/health/revocations")
+    async def revocation_stats() -> dict[str, Any]:
+        """Revoked tokens and user cutoffs held in memory, and sync counters."""
+        return revocations.stats()
+
+    @router.get("/health/introspection")
+    async def introspection_stats() -> dict[str, Any]:
+        """Token introspection volume and decoded-token cache counters."""
+        return introspector.stats()
+
+    @router.get("/health/replica")
+    async def replica_stats() -> dict[str, Any]:
+        """Reads served by the replica and reads sent to the primary instead."""
+        return replica.stats()
+
+    @router.get("/health/rate-limit")
+    async def rate_limit_stats() -> dict[str, Any]:
+        """Requests allowed and rejected by the credential endpoint limits."""
+        return rate_limiter.stats()
+
+    @router.get("/health/login-activity")
+    async def login_activity_stats() -> dict[str, Any]:
+        """Buffered login activity and write-behind flush counters."""
+        return activity.stats()
+
+    @router.get("/health/audit")
+    async def audit_stats() -> dict[str, Any]:
+        """Audit events buffered, written, dropped and failed."""
+        return audit.stats()
+
+    @router.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        """Prometheus metrics in the text exposition format."""
+        return Response(
+            registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    return router
+
+
+@asynccontextmanager
+async def open_database(settings: Settings):
+    """Open the primary database for this process.
+
+    ``db.lifespan`` also creates missing tables and the admin user, which the
+    server has already done when it starts workers; they only open an engine.
+    """
+    if not database_bootstrapped:
+        async with db.lifespan():
+            yield
+        return
+    engine = create_async_engine(settings.DATABASE_URL)
+    if engine.url.get_backend_name() == "sqlite":
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def enable_foreign_keys(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+    db.DBState.engine = engine
+    db.DBState.async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        yield
+    finally:
+        await engine.dispose()
+
+
+async def start_services(settings: Settings) -> None:
+    """Configure and start the background services, primary database first."""
+    instrument_engine(db.DBState.engine)
+    replica.configure(settings)
+    replica.start()
+    if replica.engine is not None:
+        instrument_engine(replica.engine)
+    outbox.configure(settings)
+    user_cache.configure(settings)
+    user_representations.configure(settings)
+    introspector.configure(settings)
+    password_helper.configure(settings)
+    revocations.configure(settings)
+    rate_limiter.configure(settings)
+    email_coalescer.configure(settings)
+    email_templates.configure(settings)
+    activity.configure(settings)
+    audit.configure(settings)
+    password_helper.start()
+    await revocations.start()
+    await outbox.start()
+    await activity.start()
+    await audit.start()
+    readiness.configure(settings)
+    await readiness.start()
+    if settings.profiling_enabled:
+        profiler.configure(settings)
+        profiler.start()
+
+
+async def stop_services() -> None:
+    """Flush and stop the background services started by start_services."""
+    await readiness.stop()
+    profiler.stop()
+    await activity.stop()
+    await audit.stop()
+    await outbox.stop()
+    await revocations.stop()
+    password_helper.shutdown()
+    await replica.stop()
+
 
 def create_app() -> FastAPI:
-    """App factory for FastAPI application."""
+    """App factory for FastAPI application.
+
+    Settings are read once here and shared, through :data:`services`, with the
+    request dependencies and the background services started by the lifespan.
+    """
     settings = Settings()
+    services.configure(settings)
+    auth_backend.refresh_enabled = settings.refresh_token_enabled
+    refresh_tokens.lifetime_seconds = settings.refresh_token_lifetime_seconds
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         # Automatically create tables if they do not exist (dev/CI only)
-        async with db.lifespan():
-            yield
+        async with open_database(settings):
+            await start_services(settings)
+            try:
+                yield
+            finally:
+                await stop_services()
 
     app = FastAPI(title="userdb Login Service", version="1.0.0", lifespan=lifespan)
 
+    # Innermost, so profiles cover only the request handling itself
+    if settings.profiling_enabled:
+        app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    # Throttle credential endpoints before any parsing, hashing or DB work
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
     # CORS configuration
     app.add_middleware(
         CORSMiddleware,
@@ -38,22 +246,27 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Outermost, so rate-limited and CORS-rejected requests are counted too
+    app.add_middleware(MetricsMiddleware)
+
     # Routers
     app.include_router(
         fastapi_users.get_auth_router(auth_backend),
         prefix="/auth/jwt",
         tags=["auth"],
     )
+    if settings.refresh_token_enabled:
+        app.include_router(
+            get_refresh_router(get_user_manager, get_jwt_strategy),
+            prefix="/auth/jwt",
+            tags=["auth"],
+        )
     app.include_router(
         fastapi_users.get_register_router(UserRead, UserCreate),
         prefix="/auth",
         tags=["auth"],
     )
-    app.include_router(
-        fastapi_users.get_users_router(UserRead, UserUpdate),
-        prefix="/users",
-        tags=["users"],
-    )
+    app.include_router(get_users_router(), prefix="/users", tags=["users"])
     app.include_router(
         fastapi_users.get_reset_password_router(),
         prefix="/auth",
@@ -64,11 +277,16 @@ def create_app() -> FastAPI:
         prefix="/auth",
         tags=["auth"],
     )
+    app.include_router(
+        get_introspection_router(get_jwt_strategy), prefix="/auth", tags=["auth"]
+    )
+    app.include_router(get_check_router(), prefix="/auth", tags=["auth"])
+    app.include_router(
+        get_jwks_router(services.signing_keys, settings.jwks_max_age_seconds)
+    )
 
-    @app.get("/health", tags=["health"])
-    def health_check() -> dict[str, str]:
-        """Health check endpoint."""
-        return {"status": "ok"}
+    app.include_router(get_admin_router(), prefix="/admin", tags=["admin"])
+    app.include_router(get_health_router())
 
     return app
 
@@ -0,0 +1,341 @@
+"""Prometheus metrics for the login service, without extra dependencies.
+
+Counters and histograms are plain in-process objects rendered in the
+Prometheus text exposition format at ``/metrics``. Recording a sample is a
+bucket search and a few additions under a lock, since SMTP delivery and
+password hashing record from worker threads.
+
+What is measured:
+
+* every HTTP request, by method, route template and status
+  (:class:`MetricsMiddleware`);
+* password hashing and verification time, and time queued for a worker;
+* database connection checkout and statement execution time
+  (:func:`instrument_engine`);
+* SMTP send time per message and delivery failures;
+* user manager hook durations (:func:`timed_hook`).
+
+Histograms created with a ``phase`` also add each sample to the per-request
+phase totals collected by :func:`track_phases`, which the request profiler
+uses to break a slow request down.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Seconds; covers cached lookups (~1ms) up to slow password hashes.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+_phases: ContextVar[dict[str, float] | None] = ContextVar(
+    "login_request_phases", default=None
+)
+
+
+@contextmanager
+def track_phases() -> Iterator[dict[str, float]]:
+    """Collect phase seconds recorded in this context into the yielded dict."""
+    phases: dict[str, float] = {}
+    token = _phases.set(phases)
+    try:
+        yield phases
+    finally:
+        _phases.reset(token)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        phase: str | None = None,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = buckets
+        self.phase = phase
+        # Per label set: [count per bucket..., count above the last bucket].
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+        if self.phase is not None:
+            phases = _phases.get()
+            if phases is not None:
+                phases[self.phase] = phases.get(self.phase, 0.0) + value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v), self._sums[k]) for k, v in self._counts.items()]
+        names = (*self.labels, "le")
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(names, (*key, str(bound)))} {cumulative}"
+                )
+            suffix = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "login_http_requests_total",
+        "HTTP requests by method, route and status.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_DURATION = registry.register(
+    Histogram(
+        "login_http_request_duration_seconds",
+        "HTTP request latency by method and route.",
+        ("method", "route"),
+    )
+)
+PASSWORD_DURATION = registry.register(
+    Histogram(
+        "login_password_hash_duration_seconds",
+        "Password hash/verify time on the executor.",
+        ("operation",),
+        phase="hash",
+    )
+)
+PASSWORD_WAIT = registry.register(
+    Histogram(
+        "login_password_hash_wait_seconds",
+        "Time password operations waited for a free worker.",
+        phase="hash_wait",
+    )
+)
+DB_ACQUIRE = registry.register(
+    Histogram(
+        "login_db_connection_acquire_seconds",
+        "Time to check a connection out of the pool.",
+        phase="db_acquire",
+    )
+)
+DB_QUERY = registry.register(
+    Histogram(
+        "login_db_query_duration_seconds",
+        "Statement execution time by statement type.",
+        ("statement",),
+        phase="db",
+    )
+)
+SMTP_SEND = registry.register(
+    Histogram(
+        "login_smtp_send_duration_seconds",
+        "Time to hand one message to the SMTP relay.",
+        phase="smtp",
+    )
+)
+SMTP_FAILURES = registry.register(
+    Counter(
+        "login_smtp_failures_total",
+        "Messages the relay rejected or that could not be sent.",
+        ("reason",),
+    )
+)
+HOOK_DURATION = registry.register(
+    Histogram(
+        "login_user_manager_hook_duration_seconds",
+        "User manager event hook time.",
+        ("hook",),
+        phase="hooks",
+    )
+)
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, or ``<unmatched>``."""
+    # Newer FastAPI keeps the un-prefixed route in scope["route"] and records
+    # the full template for routes from included routers separately.
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route.
+
+    Routes are labelled with their template (``/users/{id}``); requests that
+    match no route share one label so unknown paths cannot grow the series.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = route_template(scope)
+            method = scope["method"]
+            HTTP_DURATION.observe(time.perf_counter() - started, method, path)
+            HTTP_REQUESTS.inc(method, path, str(status))
+
+
+def _before_execute(conn, *_) -> None:
+    conn.info["login_query_started"] = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, *_) -> None:
+    started = conn.info.pop("login_query_started", None)
+    if started is not None:
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        DB_QUERY.observe(time.perf_counter() - started, kind)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Record pool checkout and statement times for ``engine``."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+
+    pool = sync_engine.pool
+    connect = pool.connect
+
+    @functools.wraps(connect)
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_ACQUIRE.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+def timed_hook(func):
+    """Record the duration of an async user manager hook under its name."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            HOOK_DURATION.observe(time.perf_counter() - started, name)
+
+    return wrapper
@@ -0,0 +1,134 @@
+"""Tables owned by the login service.
+
+They are declared on the userdb ``Base`` so that ``userdb.db.lifespan`` creates
+them alongside the user table. Tables are looked up in the shared metadata
+before being defined, because the package can be imported both as ``login``
+and as ``src.login``.
+"""
+
+from sqlalchemy import (
+    JSON,
+    UUID,
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    Table,
+)
+from userdb.models import Base
+
+
+def _table(name: str, *columns: Column) -> Table:
+    table = Base.metadata.tables.get(name)
+    return table if table is not None else Table(name, Base.metadata, *columns)
+
+
+class RefreshToken(Base):
+    """A refresh token, stored only as the SHA-256 of its value.
+
+    Tokens issued from one login share a ``family_id``; every refresh marks the
+    presented token used and issues a successor in the same family.
+    ``expires_at`` is a Unix timestamp.
+    """
+
+    __table__ = _table(
+        "refresh_token",
+        Column("token_hash", String(64), primary_key=True),
+        Column(
+            "user_id",
+            UUID(as_uuid=True),
+            ForeignKey("user.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+        Column("family_id", UUID(as_uuid=True), nullable=False, index=True),
+        Column("expires_at", BigInteger, nullable=False),
+        Column("used", Boolean, nullable=False, default=False),
+    )
+
+
+class RevokedToken(Base):
+    """An access token revoked before its expiry, identified by its ``jti``.
+
+    Rows can be deleted once ``expires_at`` has passed; ``revoked_at`` lets
+    workers fetch only the revocations they have not seen yet.
+    """
+
+    __table__ = _table(
+        "revoked_token",
+        Column("jti", String(64), primary_key=True),
+        Column("expires_at", BigInteger, nullable=False),
+        Column("revoked_at", Float, nullable=False, index=True),
+    )
+
+
+class TokenCutoff(Base):
+    """Rejects every access token of a user issued before ``not_before``."""
+
+    __table__ = _table(
+        "token_cutoff",
+        Column(
+            "user_id",
+            UUID(as_uuid=True),
+            ForeignKey("user.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        Column("not_before", Float, nullable=False),
+        Column("updated_at", Float, nullable=False, index=True),
+    )
+
+
+class ClaimsCutoff(Base):
+    """Stops trusting the claims of a user's tokens issued before ``not_before``.
+
+    Such tokens stay valid but are checked against the database again.
+    ``user_id`` has no foreign key, so deleting a user can record one too.
+    """
+
+    __table__ = _table(
+        "claims_cutoff",
+        Column("user_id", UUID(as_uuid=True), primary_key=True),
+        Column("not_before", Float, nullable=False),
+        Column("updated_at", Float, nullable=False, index=True),
+    )
+
+
+class LoginActivity(Base):
+    """A user's last successful login and running login count.
+
+    Written in bulk by :mod:`login.activity`, so it may lag logins by up to the
+    flush interval. ``last_login_at`` is a Unix timestamp.
+    """
+
+    __table__ = _table(
+        "login_activity",
+        Column(
+            "user_id",
+            UUID(as_uuid=True),
+            ForeignKey("user.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        Column("last_login_at", Float, nullable=False),
+        Column("last_login_ip", String(45), nullable=True),
+        Column("login_count", Integer, nullable=False, default=0),
+    )
+
+
+class AuditRecord(Base):
+    """A security-relevant event written by the audit pipeline's DB sink.
+
+    ``user_id`` has no foreign key, so the trail outlives deleted users.
+    """
+
+    __table__ = _table(
+        "audit_event",
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("ts", Float, nullable=False, index=True),
+        Column("event", String(32), nullable=False, index=True),
+        Column("user_id", UUID(as_uuid=True), nullable=True, index=True),
+        Column("ip", String(45), nullable=True),
+        Column("detail", JSON, nullable=True),
+    )
@@ -0,0 +1,265 @@
+"""Asynchronous email outbox for the login service.
+
+The user manager hooks must never block the event loop on SMTP. Instead they
+enqueue an :class:`OutboundEmail` on the process-wide :data:`outbox`, and a set
+of background workers started from the application lifespan deliver the
+messages in a thread, retrying failed sends with exponential backoff. Workers
+drain up to ``batch_size`` queued messages at a time and deliver them over one
+pooled SMTP session. Whatever is still queued when the application shuts down
+is flushed before exit.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+
+from .config import Settings
+from .email_utils import SMTPConfig, build_message
+from .smtp_pool import SMTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class OutboundEmail:
+    """A message waiting in the outbox."""
+
+    to_email: str
+    subject: str
+    body: str
+    html: str | None = None
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class EmailOutbox:
+    """Bounded in-memory email queue drained by background workers.
+
+    Messages can be enqueued before the outbox is started; they are delivered
+    once :meth:`start` runs. Delivery uses ``sender``, a blocking callable that
+    takes a batch of messages and returns one success flag per message, run in
+    the default thread pool. Unless a sender is injected, :meth:`start` builds
+    an :class:`SMTPConnectionPool` and sends through it. Tuning defaults below
+    are overridden from the settings by :meth:`configure`.
+    """
+
+    max_size: int = 1000
+    concurrency: int = 2
+    batch_size: int = 20
+    max_retries: int = 3
+    retry_backoff: float = 1.0
+    shutdown_timeout: float = 10.0
+    pool_size: int = 2
+    pool_idle_timeout: float = 60.0
+
+    def __init__(
+        self, sender: Callable[[list[EmailMessage]], list[bool]] | None = None
+    ) -> None:
+        self._injected_sender = sender
+        self.sender = sender
+        self.smtp_config = SMTPConfig()
+        self.pool: SMTPConnectionPool | None = None
+        self._reaper: asyncio.Task | None = None
+        self._queue: asyncio.Queue[OutboundEmail] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._retries: dict[asyncio.TimerHandle, OutboundEmail] = {}
+        self._in_flight = 0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._dropped = 0
+        self._send_count = 0
+        self._send_total = 0.0
+        self._send_max = 0.0
+        self._wait_total = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def configure(self, settings: Settings) -> None:
+        """Apply outbox tuning from the service settings."""
+        self.max_size = settings.email_outbox_max_size
+        self.concurrency = settings.email_outbox_concurrency
+        self.max_retries = settings.email_outbox_max_retries
+        self.retry_backoff = settings.email_outbox_retry_backoff_seconds
+        self.shutdown_timeout = settings.email_outbox_shutdown_timeout_seconds
+        self.batch_size = settings.email_outbox_batch_size
+        self.pool_size = settings.smtp_pool_size
+        self.pool_idle_timeout = settings.smtp_pool_idle_timeout_seconds
+        self.smtp_config = SMTPConfig.from_settings(settings)
+
+    def enqueue(
+        self, to_email: str, subject: str, body: str, html: str | None = None
+    ) -> bool:
+        """Queue a message for delivery and return immediately.
+
+        ``body`` is the plain-text part; ``html``, if given, is sent alongside
+        it as a ``multipart/alternative`` message.
+
+        Returns ``False`` (and counts the message as dropped) when the outbox
+        is full, so a stalled relay cannot grow memory without bound.
+        """
+        if self._queue.qsize() >= self.max_size:
+            self._dropped += 1
+            logger.error("Email outbox full, dropping message to %s", to_email)
+            return False
+        self._queue.put_nowait(OutboundEmail(to_email, subject, body, html))
+        return True
+
+    async def start(self) -> None:
+        """Start the delivery workers on the running event loop."""
+        if self.running:
+            return
+        # Rebind the queue to the current loop, keeping anything queued early.
+        pending = self._queue
+        self._queue = asyncio.Queue()
+        while not pending.empty():
+            self._queue.put_nowait(pending.get_nowait())
+        if self._injected_sender is None:
+            self.pool = SMTPConnectionPool(
+                self.smtp_config, self.pool_size, self.pool_idle_timeout
+            )
+            self.sender = self.pool.send_messages
+            self._reaper = asyncio.create_task(self._reap_idle_connections())
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"email-outbox-{i}")
+            for i in range(max(1, self.concurrency))
+        ]
+        logger.info("Email outbox started with %d workers", len(self._workers))
+
+    async def stop(self) -> None:
+        """Flush queued messages, then stop the workers.
+
+        Pending retries are delivered immediately instead of waiting out their
+        backoff. Messages that cannot be sent within ``shutdown_timeout`` are
+        logged and discarded.
+        """
+        if not self.running:
+            return
+        for handle, message in self._retries.items():
+            handle.cancel()
+            self._queue.put_nowait(message)
+        self._retries.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                "Email outbox shutdown timed out with %d messages unsent",
+                self._queue.qsize(),
+            )
+        tasks = [*self._workers, self._reaper] if self._reaper else self._workers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._reaper = None
+        if self.pool is not None:
+            await asyncio.to_thread(self.pool.close)
+            self.pool = None
+        logger.info("Email outbox stopped")
+
+    def stats(self) -> dict[str, float | int]:
+        """Return queue depth, delivery counters and latency figures.
+
+        Average send latency is amortised per message across each delivered
+        batch; the maximum is the slowest batch.
+        """
+        count = self._send_count
+        pool = self.pool.stats() if self.pool else {}
+        return {
+            **{f"smtp_{key}": value for key, value in pool.items()},
+            "queue_depth": self._queue.qsize(),
+            "in_flight": self._in_flight,
+            "retry_pending": len(self._retries),
+            "sent": self._sent,
+            "failed": self._failed,
+            "retried": self._retried,
+            "dropped": self._dropped,
+            "send_latency_avg_ms": self._send_total / count * 1000 if count else 0.0,
+            "send_latency_max_ms": self._send_max * 1000,
+            "queue_wait_avg_ms": self._wait_total / count * 1000 if count else 0.0,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _reap_idle_connections(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.pool_idle_timeout / 2, 1.0))
+            await asyncio.to_thread(self.pool.close_idle)
+
+    async def _deliver(self, batch: list[OutboundEmail]) -> None:
+        # A message that cannot be built (a malformed recipient or subject)
+        # would fail the same way on every retry, so it fails at once rather
+        # than raising out of the worker.
+        sendable, messages = [], []
+        for m in batch:
+            try:
+                message = build_message(
+                    self.smtp_config, m.to_email, m.subject, m.body, m.html
+                )
+            except Exception:
+                self._failed += 1
+                logger.exception("Could not build email to %r", m.to_email)
+            else:
+                sendable.append(m)
+                messages.append(message)
+        if not messages:
+            return
+        batch = sendable
+        self._in_flight += len(batch)
+        started = time.monotonic()
+        try:
+            results = await asyncio.to_thread(self.sender, messages)
+        except Exception:
+            logger.exception("Email sender raised for a batch of %d", len(batch))
+            results = [False] * len(batch)
+        finally:
+            self._in_flight -= len(batch)
+        elapsed = time.monotonic() - started
+        self._send_count += len(batch)
+        self._send_total += elapsed
+        self._send_max = max(self._send_max, elapsed)
+
+        for message, ok in zip(batch, results, strict=True):
+            message.attempts += 1
+            self._wait_total += started - message.enqueued_at
+            if ok:
+                self._sent += 1
+            elif message.attempts <= self.max_retries:
+                self._schedule_retry(message)
+            else:
+                self._failed += 1
+                logger.error(
+                    "Giving up on email to %s after %d attempts",
+                    message.to_email,
+                    message.attempts,
+                )
+
+    def _schedule_retry(self, message: OutboundEmail) -> None:
+        self._retried += 1
+        delay = self.retry_backoff * 2 ** (message.attempts - 1)
+        loop = asyncio.get_running_loop()
+
+        def requeue() -> None:
+            self._retries.pop(handle, None)
+            message.enqueued_at = time.monotonic()
+            self._queue.put_nowait(message)
+
+        handle = loop.call_later(delay, requeue)
+        self._retries[handle] = message
+
+
+outbox = EmailOutbox()
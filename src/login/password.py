@@ -0,0 +1,266 @@
+"""Password hashing off the event loop.
+
+Argon2 and bcrypt are deliberately expensive. Running them inline on the event
+loop thread stalls every other request in the worker, so
+:class:`ExecutorPasswordHelper` runs them in a thread or process pool and caps
+how many run at once. Requests beyond the cap wait on an asyncio semaphore
+without occupying the loop, which keeps cheap authenticated requests flowing
+while expensive logins queue.
+
+Argon2 parameters come from a :class:`HashPolicy`. Hashes made under older
+parameters (or with bcrypt) still verify, and with ``rehash_on_login`` the
+user manager stores a fresh hash under the current parameters after the next
+successful login, so the cost can be re-tuned without forcing resets. Use
+``python -m login.calibrate`` to pick parameters for a latency budget.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+import argon2
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from . import metrics
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("thread", "process", "inline")
+
+
+@dataclass(frozen=True, slots=True)
+class HashPolicy:
+    """Argon2 parameters for new hashes and whether logins upgrade old ones."""
+
+    time_cost: int = argon2.DEFAULT_TIME_COST
+    memory_kib: int = argon2.DEFAULT_MEMORY_COST
+    parallelism: int = argon2.DEFAULT_PARALLELISM
+    rehash_on_login: bool = True
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "HashPolicy":
+        return cls(
+            time_cost=settings.password_argon2_time_cost,
+            memory_kib=settings.password_argon2_memory_kib,
+            parallelism=settings.password_argon2_parallelism,
+            rehash_on_login=settings.password_rehash_on_login,
+        )
+
+    def password_hash(self) -> PasswordHash:
+        """Argon2 with these parameters first; bcrypt hashes still verify."""
+        argon2_hasher = Argon2Hasher(
+            time_cost=self.time_cost,
+            memory_cost=self.memory_kib,
+            parallelism=self.parallelism,
+        )
+        return PasswordHash((argon2_hasher, BcryptHasher()))
+
+
+# Helper used inside worker processes; built by the pool initializer.
+_process_helper: PasswordHelper | None = None
+
+
+def _init_process_worker(policy: HashPolicy) -> None:
+    global _process_helper  # noqa: PLW0603
+    _process_helper = PasswordHelper(policy.password_hash())
+
+
+def _process_hash(password: str) -> str:
+    return _process_helper.hash(password)
+
+
+def _process_verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return _process_helper.verify_and_update(plain_password, hashed_password)
+
+
+def _process_verify(plain_password: str, hashed_password: str) -> bool:
+    return _process_helper.password_hash.verify(plain_password, hashed_password)
+
+
+class ExecutorPasswordHelper(PasswordHelper):
+    """PasswordHelper with awaitable, executor-backed hash and verify.
+
+    The synchronous ``hash``/``verify_and_update`` methods are kept for code
+    paths that cannot await; the user manager uses the ``*_async`` variants.
+
+    :param mode: ``"thread"``, ``"process"`` or ``"inline"`` (no executor).
+    :param max_workers: Pool size; defaults to the number of CPUs.
+    :param max_in_flight: Maximum concurrent hashes; defaults to ``max_workers``.
+    :param policy: Argon2 parameters and rehash policy; library defaults if unset.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int | None = None,
+        max_in_flight: int | None = None,
+        policy: HashPolicy | None = None,
+    ) -> None:
+        self.policy = policy or HashPolicy()
+        super().__init__(self.policy.password_hash())
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+        self._apply(mode, max_workers, max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._hash_total = 0.0
+        self._hash_max = 0.0
+        self._rehashed = 0
+
+    def _apply(
+        self, mode: str, max_workers: int | None, max_in_flight: int | None
+    ) -> None:
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown password hash executor mode: {mode!r}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers
+
+    def configure(self, settings: Settings) -> None:
+        """Apply hashing settings.
+
+        The hash policy applies at once in thread and inline mode; executor
+        settings, and the policy in process mode, on the next :meth:`start`.
+        """
+        self.policy = HashPolicy.from_settings(settings)
+        self.password_hash = self.policy.password_hash()
+        self._apply(
+            settings.password_hash_executor,
+            settings.password_hash_workers or None,
+            settings.password_hash_max_in_flight or None,
+        )
+
+    def start(self) -> None:
+        """Create the executor pool (idempotent)."""
+        if self._executor is not None or self.mode == "inline":
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_process_worker,
+                initargs=(self.policy,),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        logger.info(
+            "Password hashing uses a %s pool of %d workers", self.mode, self.max_workers
+        )
+
+    def shutdown(self) -> None:
+        """Shut the executor pool down, waiting for running hashes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue and timing figures for the hashing pool."""
+        done = self._completed
+        return {
+            "mode": self.mode,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": done,
+            "wait_avg_ms": self._wait_total / done * 1000 if done else 0.0,
+            "hash_avg_ms": self._hash_total / done * 1000 if done else 0.0,
+            "hash_max_ms": self._hash_max * 1000,
+            "argon2_time_cost": self.policy.time_cost,
+            "argon2_memory_kib": self.policy.memory_kib,
+            "argon2_parallelism": self.policy.parallelism,
+            "rehash_on_login": self.policy.rehash_on_login,
+            "rehashed": self._rehashed,
+        }
+
+    async def hash_async(self, password: str) -> str:
+        if self.mode == "process":
+            return await self._run(partial(_process_hash, password), "hash")
+        return await self._run(partial(self.hash, password), "hash")
+
+    async def verify_and_update_async(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """Verify a password, and rehash it if the policy asks for it.
+
+        The new hash is returned when ``hashed_password`` was made with other
+        parameters or another algorithm and ``rehash_on_login`` is on.
+        """
+        if not self.policy.rehash_on_login:
+            verify = _process_verify if self.mode == "process" else self.verify
+            func = partial(verify, plain_password, hashed_password)
+            return await self._run(func, "verify"), None
+        if self.mode == "process":
+            func = partial(_process_verify_and_update, plain_password, hashed_password)
+        else:
+            func = partial(self.verify_and_update, plain_password, hashed_password)
+        verified, updated_hash = await self._run(func, "verify")
+        if updated_hash is not None:
+            self._rehashed += 1
+        return verified, updated_hash
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify without computing an upgraded hash."""
+        return self.password_hash.verify(plain_password, hashed_password)
+
+    def _gate(self) -> asyncio.Semaphore:
+        # asyncio primitives bind to the loop they are first used on, so keep
+        # one semaphore per running loop.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, func, operation: str):
+        if self.mode == "inline":
+            started = time.monotonic()
+            try:
+                return func()
+            finally:
+                self._record(time.monotonic() - started, operation)
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        gate = self._gate()
+        queued = time.monotonic()
+        self._waiting += 1
+        try:
+            await gate.acquire()
+        finally:
+            self._waiting -= 1
+        started = time.monotonic()
+        self._wait_total += started - queued
+        metrics.PASSWORD_WAIT.observe(started - queued)
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, func)
+        finally:
+            self._in_flight -= 1
+            self._record(time.monotonic() - started, operation)
+            gate.release()
+
+    def _record(self, elapsed: float, operation: str) -> None:
+        metrics.PASSWORD_DURATION.observe(elapsed, operation)
+        self._completed += 1
+        self._hash_total += elapsed
+        self._hash_max = max(self._hash_max, elapsed)
+
+
+password_helper = ExecutorPasswordHelper()
@@ -0,0 +1,192 @@
+"""Opt-in profiling of slow requests.
+
+With ``PROFILING_ENABLED`` the :class:`ProfilingMiddleware` times every request
+and breaks it into phases: password hashing and the wait for a hashing worker,
+DB connection checkout and queries, SMTP sends and user manager hooks. Time
+not covered by any phase (serialization, event-loop contention) is reported as
+``other``. Phases come from the same measurement points as the Prometheus
+metrics (see :func:`login.metrics.track_phases`), so nothing extra is timed.
+
+While requests are in flight, a background thread samples the stacks of all
+threads every ``PROFILING_INTERVAL_MS``. Requests slower than
+``PROFILING_THRESHOLD_MS``, and a ``PROFILING_SAMPLE_RATE`` fraction of the
+rest, get the samples taken during their lifetime written to
+``PROFILING_DIR``:
+
+* ``<name>.folded`` holds collapsed stacks (``thread;frame;frame count``),
+  which ``flamegraph.pl`` and speedscope read directly;
+* ``<name>.json`` holds the request, its duration and the phase breakdown.
+
+Only the newest ``PROFILING_MAX_FILES`` profiles are kept. When profiling is
+disabled the middleware is not installed at all.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from .config import Settings
+from .metrics import route_template, track_phases
+
+logger = logging.getLogger(__name__)
+
+
+def _collapse(frame, thread_name: str) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """Samples every thread's stack while at least one request is profiled."""
+
+    def __init__(self, interval: float, retention: float) -> None:
+        super().__init__(name="login-stack-sampler", daemon=True)
+        self.interval = interval
+        self.samples: deque[tuple[float, list[str]]] = deque(
+            maxlen=max(1, int(retention / interval))
+        )
+        self._active = 0
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def begin(self) -> None:
+        self._active += 1
+        self._wake.set()
+
+    def end(self) -> None:
+        self._active -= 1
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped:
+            if self._active <= 0:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [
+                _collapse(frame, names.get(ident, str(ident)))
+                for ident, frame in sys._current_frames().items()
+                if ident != own
+            ]
+            self.samples.append((time.monotonic(), stacks))
+            time.sleep(self.interval)
+
+    def collect(self, start: float, end: float) -> Counter[str]:
+        counts: Counter[str] = Counter()
+        for taken, stacks in list(self.samples):
+            if start <= taken <= end:
+                counts.update(stacks)
+        return counts
+
+
+class RequestProfiler:
+    """Decides which requests to keep and writes their profiles."""
+
+    threshold: float = 1.0
+    sample_rate: float = 0.0
+    interval: float = 0.005
+    directory: Path = Path("profiles")
+    max_files: int = 100
+
+    def __init__(self) -> None:
+        self.sampler: StackSampler | None = None
+        self.written = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.threshold = settings.profiling_threshold_ms / 1000
+        self.sample_rate = settings.profiling_sample_rate
+        self.interval = settings.profiling_interval_ms / 1000
+        self.directory = Path(settings.profiling_dir)
+        self.max_files = settings.profiling_max_files
+
+    def start(self) -> None:
+        if self.sampler is None:
+            # Keep enough samples to cover a request a few times the threshold.
+            retention = max(10.0, 4 * self.threshold)
+            self.sampler = StackSampler(self.interval, retention)
+            self.sampler.start()
+
+    def stop(self) -> None:
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+    def should_keep(self, duration: float) -> bool:
+        return duration >= self.threshold or random.random() < self.sample_rate
+
+    def write(self, record: dict, stacks: Counter[str]) -> Path:
+        """Write one profile pair and drop the oldest beyond ``max_files``."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9_-]+", "_", record["route"]).strip("_") or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(record["started_at"]))
+        name = f"{stamp}-{self.written:06d}-{record['method']}-{route}"
+        path = self.directory / f"{name}.folded"
+        path.write_text("".join(f"{stack} {n}\n" for stack, n in stacks.items()))
+        path.with_suffix(".json").write_text(json.dumps(record, indent=2))
+        self.written += 1
+        profiles = sorted(self.directory.glob("*.folded"))
+        for old in profiles[: max(0, len(profiles) - self.max_files)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
+        return path
+
+
+profiler = RequestProfiler()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware timing request phases and keeping slow-request profiles."""
+
+    def __init__(self, app, profiler: RequestProfiler = profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send) -> None:
+        sampler = self.profiler.sampler
+        if scope["type"] != "http" or sampler is None:
+            await self.app(scope, receive, send)
+            return
+        sampler.begin()
+        started_at = time.time()
+        start = time.monotonic()
+        try:
+            with track_phases() as phases:
+                await self.app(scope, receive, send)
+        finally:
+            end = time.monotonic()
+            sampler.end()
+        duration = end - start
+        if not self.profiler.should_keep(duration):
+            return
+        phases["other"] = max(0.0, duration - sum(phases.values()))
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_template(scope),
+            "started_at": started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "phases_ms": {k: round(v * 1000, 3) for k, v in phases.items()},
+        }
+        stacks = sampler.collect(start, end)
+        try:
+            await asyncio.to_thread(self.profiler.write, record, stacks)
+        except OSError:
+            logger.exception("Unable to write request profile")
@@ -0,0 +1,289 @@
+"""Rate limiting for the credential endpoints.
+
+Login, registration and the password reset/verification flows each cost a
+password hash or an email, so a credential-stuffing burst can pin the CPU. The
+:class:`RateLimitMiddleware` answers over-limit requests with a 429 before
+FastAPI parses them, so rejected attempts never reach the hasher or the
+database.
+
+Requests are limited by client IP and, where the body names one, by account
+(the login ``username`` or the ``email`` field). Each key has a token bucket
+that holds up to ``per_minute`` tokens and refills at ``per_minute / 60``
+tokens a second. Credential bodies too large to inspect for an account are
+refused with a 413, and bodies in a media type the account cannot be read from
+with a 415, so neither padding a request nor relabelling it dodges the account
+limit.
+
+Buckets live in process memory by default. Deployments running several
+workers can share them by pointing ``RATE_LIMIT_BACKEND`` at a
+:class:`RateLimitBackend` subclass (``"package.module:ClassName"``), for
+example one backed by Redis.
+"""
+
+import abc
+import importlib
+import json
+import time
+from collections import OrderedDict
+from email import message_from_bytes, policy
+from urllib.parse import parse_qs
+
+from .config import Settings
+
+LIMITED_PATHS = frozenset(
+    {
+        "/auth/jwt/login",
+        "/auth/register",
+        "/auth/forgot-password",
+        "/auth/reset-password",
+        "/auth/request-verify-token",
+    }
+)
+# Credential bodies are tiny; larger ones are refused rather than let through
+# without an account check.
+MAX_INSPECTED_BODY = 16 * 1024
+
+
+class RateLimitBackend(abc.ABC):
+    """Storage for token buckets; subclass to share buckets between workers."""
+
+    @abc.abstractmethod
+    async def hit(self, key: str, per_minute: float) -> float:
+        """Take a token from ``key``'s bucket.
+
+        Returns 0 if the request is allowed, otherwise the number of seconds
+        until a token is available.
+        """
+
+    async def reset(self) -> None:  # noqa: B027 - optional hook
+        """Forget every bucket."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process token buckets, least recently used first out."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, per_minute: float) -> float:
+        now = time.monotonic()
+        rate = per_minute / 60.0
+        tokens, updated = self._buckets.pop(key, (per_minute, now))
+        tokens = min(per_minute, tokens + (now - updated) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def reset(self) -> None:
+        self._buckets.clear()
+
+
+def load_backend(path: str) -> RateLimitBackend:
+    """Instantiate the backend class named by ``"module:ClassName"``."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RateLimiter:
+    """Per-IP and per-account limits with counters for ``/health``."""
+
+    enabled: bool = True
+    ip_per_minute: float = 30
+    account_per_minute: float = 10
+    trust_forwarded: bool = False
+    forwarded_hops: int = 1
+
+    def __init__(self, backend: RateLimitBackend | None = None) -> None:
+        self.backend = backend or MemoryBackend()
+        self.allowed = 0
+        self.limited = {"ip": 0, "account": 0}
+        self.oversized = 0
+        self.unsupported = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.enabled = settings.rate_limit_enabled
+        self.ip_per_minute = settings.rate_limit_ip_per_minute
+        self.account_per_minute = settings.rate_limit_account_per_minute
+        self.trust_forwarded = settings.rate_limit_trust_forwarded
+        self.forwarded_hops = max(1, settings.rate_limit_forwarded_hops)
+        if settings.rate_limit_backend:
+            self.backend = load_backend(settings.rate_limit_backend)
+
+    async def check(self, scope: str, key: str) -> float:
+        """Count a request for ``key`` and return its retry-after (0 if allowed)."""
+        per_minute = self.ip_per_minute if scope == "ip" else self.account_per_minute
+        retry_after = await self.backend.hit(f"{scope}:{key}", per_minute)
+        if retry_after:
+            self.limited[scope] += 1
+        return retry_after
+
+    def client_ip(self, scope: dict) -> str:
+        """The client address, read from ``X-Forwarded-For`` behind proxies.
+
+        Each proxy appends the address it received the request from, so only
+        the right-most ``forwarded_hops`` entries were written by proxies we
+        trust; anything to their left is whatever the client sent.
+        """
+        if self.trust_forwarded:
+            forwarded = [
+                entry.strip()
+                for name, value in scope["headers"]
+                if name == b"x-forwarded-for"
+                for entry in value.decode("latin-1").split(",")
+            ]
+            forwarded = [entry for entry in forwarded if entry]
+            if forwarded:
+                return forwarded[max(len(forwarded) - self.forwarded_hops, 0)]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def reset(self) -> None:
+        self.allowed = 0
+        self.limited = {"ip": 0, "account": 0}
+        self.oversized = 0
+        self.unsupported = 0
+        await self.backend.reset()
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "limited_ip": self.limited["ip"],
+            "limited_account": self.limited["account"],
+            "rejected_oversized": self.oversized,
+            "rejected_unsupported": self.unsupported,
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+def body_format(content_type: str) -> str | None:
+    """``"form"``, ``"multipart"`` or ``"json"``: how FastAPI reads the body.
+
+    Media types compare case-insensitively and without parameters. A missing
+    type counts as JSON, which FastAPI may parse too. Returns ``None`` for
+    anything else.
+    """
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type == "application/x-www-form-urlencoded":
+        return "form"
+    if media_type == "multipart/form-data":
+        return "multipart"
+    if media_type in ("", "application/json") or (
+        media_type.startswith("application/") and media_type.endswith("+json")
+    ):
+        return "json"
+    return None
+
+
+def account_from_body(body: bytes, content_type: str) -> str | None:
+    """The account a credential request targets, lower-cased, if it names one."""
+    try:
+        match body_format(content_type):
+            case "form":
+                values = parse_qs(body.decode())
+                account = (values.get("username") or [None])[0]
+            case "multipart":
+                account = _multipart_field(body, content_type, "username")
+            case "json":
+                data = json.loads(body)
+                account = data.get("email") if isinstance(data, dict) else None
+            case _:
+                return None
+    except (UnicodeDecodeError, ValueError):
+        return None
+    return account.strip().lower() if isinstance(account, str) else None
+
+
+def _multipart_field(body: bytes, content_type: str, name: str) -> str | None:
+    message = message_from_bytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body,
+        policy=policy.HTTP,
+    )
+    if not message.is_multipart():
+        return None
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == name:
+            value = part.get_payload(decode=True)
+            return value.decode() if isinstance(value, bytes) else None
+    return None
+
+
+async def _reject(send, status: int, detail: bytes, headers=()) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), *headers],
+        }
+    )
+    await send({"type": "http.response.body", "body": b'{"detail":"%s"}' % detail})
+
+
+async def _too_many_requests(send, retry_after: float) -> None:
+    retry_header = (b"retry-after", str(max(1, round(retry_after))).encode())
+    await _reject(send, 429, b"Too many requests", [retry_header])
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing :class:`RateLimiter` on ``LIMITED_PATHS``."""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in LIMITED_PATHS
+            or not self.limiter.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self.limiter.check("ip", self.limiter.client_ip(scope))
+        if retry_after:
+            await _too_many_requests(send, retry_after)
+            return
+
+        # Buffer the (small) body to find the account, then replay it.
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            size += len(message.get("body", b""))
+            if not message.get("more_body") or size > MAX_INSPECTED_BODY:
+                break
+        if size > MAX_INSPECTED_BODY:
+            self.limiter.oversized += 1
+            await _reject(send, 413, b"Request body too large")
+            return
+        body = b"".join(m.get("body", b"") for m in messages)
+        content_type = dict(scope["headers"]).get(b"content-type", b"")
+        content_type = content_type.decode("latin-1")
+        if body and body_format(content_type) is None:
+            self.limiter.unsupported += 1
+            await _reject(send, 415, b"Unsupported media type")
+            return
+        account = account_from_body(body, content_type)
+        if account:
+            retry_after = await self.limiter.check("account", account)
+            if retry_after:
+                await _too_many_requests(send, retry_after)
+                return
+        self.limiter.allowed += 1
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        await self.app(scope, replay, send)
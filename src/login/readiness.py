@@ -0,0 +1,166 @@
+"""Cached readiness state for ``/health/ready``.
+
+``/health/live`` only says the worker's event loop is answering. Readiness
+also needs the dependencies: the database connection pool (and the replica's,
+when configured) and the SMTP relay. Probing them on every request would make
+orchestrator probes open connections and take as long as the slowest
+dependency, so :class:`ReadinessProbe` runs the checks from a background task
+every ``interval`` seconds, each bounded by ``timeout``, and ``/health/ready``
+only reads the last result.
+
+The worker is ready once a probe has completed, every required check passed
+and that result is recent (at most ``STALE_INTERVALS`` probe intervals old; a
+stuck probe task must not keep reporting an old success). The SMTP check is
+reported but only required with ``READINESS_REQUIRE_SMTP``: mail goes through
+the outbox, which retries, so a relay outage alone should not take every
+worker out of rotation.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from userdb import db
+
+from .config import Settings
+from .db_routing import replica
+
+logger = logging.getLogger(__name__)
+
+Check = Callable[[], Awaitable[None]]
+# Results older than this many intervals count as not ready.
+STALE_INTERVALS = 3
+
+
+@dataclass(slots=True)
+class CheckResult:
+    ok: bool
+    latency_ms: float
+    error: str | None = None
+
+
+async def ping_database(engine: AsyncEngine | None) -> None:
+    """Check out a pooled connection and run ``SELECT 1`` on it."""
+    if engine is None:
+        raise RuntimeError("engine not started")
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def ping_smtp(host: str, port: int) -> None:
+    """Connect to the relay and read its greeting, without sending mail."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        greeting = await reader.readline()
+        if not greeting.startswith(b"220"):
+            raise RuntimeError(f"unexpected greeting {greeting[:80]!r}")
+        writer.write(b"QUIT\r\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+class ReadinessProbe:
+    """Runs dependency checks periodically and caches the outcome."""
+
+    interval: float = 5.0
+    timeout: float = 2.0
+
+    def __init__(self) -> None:
+        self.checks: dict[str, Check] = {}
+        self.required: set[str] = set()
+        self.results: dict[str, CheckResult] = {}
+        self.checked_at: float | None = None
+        self._task: asyncio.Task | None = None
+        self.probes = 0
+        self.failures = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.interval = settings.readiness_probe_interval_seconds
+        self.timeout = settings.readiness_probe_timeout_seconds
+        self.checks = {"database": lambda: ping_database(db.DBState.engine)}
+        if replica.url:
+            self.checks["replica"] = lambda: ping_database(replica.engine)
+        self.required = set(self.checks)
+        self.checks["smtp"] = lambda: ping_smtp(settings.smtp_host, settings.smtp_port)
+        if settings.readiness_require_smtp:
+            self.required.add("smtp")
+
+    async def _run_check(self, check: Check) -> CheckResult:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+            return CheckResult(False, (time.perf_counter() - started) * 1000, error)
+        return CheckResult(True, (time.perf_counter() - started) * 1000)
+
+    async def probe(self) -> None:
+        """Run every check concurrently and store the results."""
+        names = list(self.checks)
+        results = await asyncio.gather(
+            *(self._run_check(self.checks[name]) for name in names)
+        )
+        previous = self.results
+        self.results = dict(zip(names, results, strict=True))
+        self.checked_at = time.monotonic()
+        self.probes += 1
+        for name, result in self.results.items():
+            if not result.ok:
+                self.failures += 1
+                if name not in previous or previous[name].ok:
+                    logger.warning("Readiness check %s failed: %s", name, result.error)
+
+    @property
+    def ready(self) -> bool:
+        if self.checked_at is None:
+            return False
+        if time.monotonic() - self.checked_at > self.interval * STALE_INTERVALS:
+            return False
+        return all(
+            name in self.results and self.results[name].ok for name in self.required
+        )
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="readiness-probe")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.results = {}
+        self.checked_at = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception:
+                logger.exception("Readiness probe failed")
+            await asyncio.sleep(self.interval)
+
+    def state(self) -> dict[str, Any]:
+        """The last probe result; no dependency is contacted."""
+        age = None if self.checked_at is None else time.monotonic() - self.checked_at
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "age_seconds": age,
+            "probes": self.probes,
+            "failures": self.failures,
+            "checks": {
+                name: {**asdict(result), "required": name in self.required}
+                for name, result in self.results.items()
+            },
+        }
+
+
+readiness = ReadinessProbe()
@@ -0,0 +1,196 @@
+"""Refresh tokens: short-lived access tokens without repeated password logins.
+
+A successful password login returns a short-lived access token plus an opaque
+refresh token. ``POST /auth/jwt/refresh`` exchanges a refresh token for a new
+pair after a single indexed lookup, so clients never pay the password hash
+again until the refresh token itself expires.
+
+Refresh tokens rotate: each one can be used once. Presenting a token that was
+already used means it leaked, so the whole family descending from that login
+is revoked. Access tokens carry their family id, so logging out revokes the
+family as well. Only the SHA-256 of each token is stored.
+"""
+
+import hashlib
+import secrets
+import time
+import uuid
+from typing import NamedTuple
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi_users import exceptions
+from fastapi_users.authentication import AuthenticationBackend
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from userdb import db
+from userdb.models import User
+
+from .models import RefreshToken
+from .responses import FastJSONResponse
+from .strategy import LoginJWTStrategy
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class Rotation(NamedTuple):
+    """Outcome of a successful refresh."""
+
+    user_id: uuid.UUID
+    token: str
+    family_id: uuid.UUID
+
+
+class RefreshTokenStore:
+    """Issues, rotates and revokes refresh tokens in the ``refresh_token`` table."""
+
+    def __init__(self, lifetime_seconds: int = 14 * 24 * 3600) -> None:
+        self.lifetime_seconds = lifetime_seconds
+
+    async def issue(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        family_id: uuid.UUID | None = None,
+    ) -> str:
+        """Create a refresh token for ``user_id``; the caller commits.
+
+        Also drops the user's expired tokens so the table stays compact.
+        """
+        now = int(time.time())
+        await session.execute(
+            delete(RefreshToken).where(
+                RefreshToken.user_id == user_id, RefreshToken.expires_at < now
+            )
+        )
+        token = secrets.token_urlsafe(32)
+        session.add(
+            RefreshToken(
+                token_hash=_digest(token),
+                user_id=user_id,
+                family_id=family_id or uuid.uuid4(),
+                expires_at=now + self.lifetime_seconds,
+                used=False,
+            )
+        )
+        return token
+
+    async def rotate(self, session: AsyncSession, token: str) -> Rotation | None:
+        """Spend ``token`` and return its user id with a successor token.
+
+        Returns ``None`` for unknown, expired or replayed tokens; a replay
+        revokes every token in the family. Commits the session.
+        """
+        record = await session.get(RefreshToken, _digest(token))
+        if record is None or record.expires_at < time.time():
+            return None
+        # Conditional update so two concurrent refreshes cannot both win.
+        result = await session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == record.token_hash,
+                RefreshToken.used.is_(False),
+            )
+            .values(used=True)
+        )
+        if result.rowcount != 1:
+            await self.revoke_family(session, record.family_id)
+            await session.commit()
+            return None
+        successor = await self.issue(session, record.user_id, record.family_id)
+        await session.commit()
+        return Rotation(record.user_id, successor, record.family_id)
+
+    async def revoke_family(self, session: AsyncSession, family_id: uuid.UUID) -> None:
+        """Revoke every token descending from one login; the caller commits."""
+        await session.execute(
+            delete(RefreshToken).where(RefreshToken.family_id == family_id)
+        )
+
+    async def revoke_user(self, session: AsyncSession, user_id: uuid.UUID) -> None:
+        """Revoke every refresh token of a user; the caller commits."""
+        await session.execute(
+            delete(RefreshToken).where(RefreshToken.user_id == user_id)
+        )
+
+
+refresh_tokens = RefreshTokenStore()
+
+
+async def token_response(
+    strategy: LoginJWTStrategy,
+    user: User,
+    refresh_token: str | None,
+    family_id: uuid.UUID | None = None,
+) -> FastJSONResponse:
+    """Bearer login response, with the refresh token when one was issued."""
+    body = {
+        "access_token": await strategy.write_token(user, family_id),
+        "token_type": "bearer",
+        "expires_in": strategy.lifetime_seconds,
+    }
+    if refresh_token is not None:
+        body["refresh_token"] = refresh_token
+    return FastJSONResponse(body)
+
+
+class RefreshingAuthenticationBackend(AuthenticationBackend[User, uuid.UUID]):
+    """Bearer backend whose login response also carries a refresh token."""
+
+    refresh_enabled: bool = True
+
+    async def login(self, strategy: LoginJWTStrategy, user: User) -> FastJSONResponse:
+        if not self.refresh_enabled:
+            return await super().login(strategy, user)
+        family_id = uuid.uuid4()
+        async with db.DBState.async_session_maker() as session:
+            refresh_token = await refresh_tokens.issue(session, user.id, family_id)
+            await session.commit()
+        return await token_response(strategy, user, refresh_token, family_id)
+
+    async def logout(
+        self, strategy: LoginJWTStrategy, user: User, token: str
+    ) -> Response:
+        """Revoke the access token and the refresh family issued with it."""
+        data = strategy.decode(token)
+        response = await super().logout(strategy, user, token)
+        try:
+            family_id = uuid.UUID(data["fam"])
+        except (TypeError, KeyError, ValueError):
+            return response
+        async with db.DBState.async_session_maker() as session:
+            await refresh_tokens.revoke_family(session, family_id)
+            await session.commit()
+        return response
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+def get_refresh_router(get_user_manager, get_strategy) -> APIRouter:
+    """Router with ``POST /refresh``, to be mounted under the JWT auth prefix."""
+    router = APIRouter()
+
+    @router.post("/refresh", name="auth:jwt.refresh")
+    async def refresh(
+        payload: RefreshRequest,
+        session: AsyncSession = Depends(db.get_async_session),
+        user_manager=Depends(get_user_manager),
+        strategy: LoginJWTStrategy = Depends(get_strategy),
+    ) -> FastJSONResponse:
+        """Exchange a refresh token for a new access and refresh token pair."""
+        rotated = await refresh_tokens.rotate(session, payload.refresh_token)
+        if rotated is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = await user_manager.get_cached(rotated.user_id)
+        except exceptions.UserNotExists:
+            user = None
+        if user is None or not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        return await token_response(strategy, user, rotated.token, rotated.family_id)
+
+    return router
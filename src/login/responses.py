@@ -0,0 +1,35 @@
+"""Response encoding helpers.
+
+Routes with a response model are serialized by pydantic straight to bytes, and
+a custom default response class would turn that path off, so the app keeps
+FastAPI's default. Responses built by hand (the token responses, readiness)
+use :class:`FastJSONResponse`, which encodes with orjson instead of the
+standard library.
+"""
+
+import hashlib
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """``If-None-Match`` comparison; weak validators match their strong form."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
@@ -0,0 +1,193 @@
+"""Access token revocation without a database read per request.
+
+Access tokens carry a ``jti`` and a fractional ``iat``. Two kinds of
+revocation are persisted: a single token (logout) in ``revoked_token``, and a
+per-user cutoff (password reset, deactivation) in ``token_cutoff`` that rejects
+every token of that user issued before it. A third, softer cutoff in
+``claims_cutoff`` only stops trusting the claims signed into a user's earlier
+tokens (see :mod:`login.strategy`); those tokens are checked against the
+database instead.
+
+Each worker keeps both in memory, so checking a token is two dict lookups.
+Revocations made by this worker apply immediately; those made by other workers
+are picked up by a background task that only fetches rows newer than its last
+sync. Entries are pruned once the tokens they refer to would have expired
+anyway, which bounds memory by the revocation rate times the access token
+lifetime.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from userdb import db
+
+from .config import Settings
+from .models import ClaimsCutoff, RevokedToken, TokenCutoff
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """In-memory view of revoked tokens and per-user cutoffs."""
+
+    sync_interval: float = 5.0
+    # Rows are re-read this far behind the last sync so a revocation committed
+    # just after a sync started is not missed; re-applying a row is harmless.
+    sync_overlap: float = 10.0
+    token_lifetime: int = 3600
+
+    def __init__(self) -> None:
+        self._revoked: dict[str, int] = {}
+        self._cutoffs: dict[str, float] = {}
+        self._claims_cutoffs: dict[uuid.UUID, float] = {}
+        self._synced_at = 0.0
+        self._task: asyncio.Task | None = None
+        self.syncs = 0
+        self.rejected = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.sync_interval = settings.token_revocation_sync_seconds
+        self.sync_overlap = max(self.sync_overlap, 2 * self.sync_interval)
+        self.token_lifetime = settings.JWT_EXPIRE_SECONDS
+
+    def is_revoked(self, payload: dict[str, Any]) -> bool:
+        """Whether a decoded access token has been revoked."""
+        jti = payload.get("jti")
+        if jti is not None and jti in self._revoked:
+            self.rejected += 1
+            return True
+        cutoff = self._cutoffs.get(payload.get("sub"))
+        if cutoff is not None and payload.get("iat", 0) < cutoff:
+            self.rejected += 1
+            return True
+        return False
+
+    def claims_stale(self, user_id: uuid.UUID, issued_at: float) -> bool:
+        """Whether claims issued at ``issued_at`` predate a change to the user."""
+        cutoff = self._claims_cutoffs.get(user_id)
+        return cutoff is not None and issued_at < cutoff
+
+    async def revoke(self, session: AsyncSession, jti: str, expires_at: int) -> None:
+        """Revoke one token until ``expires_at``; the caller commits."""
+        await session.merge(
+            RevokedToken(jti=jti, expires_at=expires_at, revoked_at=time.time())
+        )
+        self._revoked[jti] = expires_at
+
+    async def revoke_user(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        not_before: float | None = None,
+    ) -> None:
+        """Revoke every token of ``user_id`` issued so far; the caller commits."""
+        now = time.time()
+        not_before = now if not_before is None else not_before
+        await session.merge(
+            TokenCutoff(user_id=user_id, not_before=not_before, updated_at=now)
+        )
+        self._cutoffs[str(user_id)] = not_before
+
+    async def expire_claims(self, session: AsyncSession, user_id: uuid.UUID) -> None:
+        """Distrust the claims of ``user_id``'s tokens so far; the caller commits."""
+        now = time.time()
+        await session.merge(
+            ClaimsCutoff(user_id=user_id, not_before=now, updated_at=now)
+        )
+        self._claims_cutoffs[user_id] = now
+
+    async def sync(self, session: AsyncSession) -> None:
+        """Apply revocations made since the last sync and prune expired ones."""
+        started = time.time()
+        since = self._synced_at - self.sync_overlap
+        tokens = await session.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).where(
+                RevokedToken.revoked_at > since
+            )
+        )
+        self._revoked.update(tokens.tuples().all())
+        cutoffs = await session.execute(
+            select(TokenCutoff.user_id, TokenCutoff.not_before).where(
+                TokenCutoff.updated_at > since
+            )
+        )
+        for user_id, not_before in cutoffs.tuples():
+            self._cutoffs[str(user_id)] = not_before
+        claims_cutoffs = await session.execute(
+            select(ClaimsCutoff.user_id, ClaimsCutoff.not_before).where(
+                ClaimsCutoff.updated_at > since
+            )
+        )
+        self._claims_cutoffs.update(claims_cutoffs.tuples().all())
+        self._synced_at = started
+        self.syncs += 1
+        await self._prune(session, started)
+
+    async def _prune(self, session: AsyncSession, now: float) -> None:
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at < now]
+        for jti in expired:
+            del self._revoked[jti]
+        horizon = now - self.token_lifetime
+        stale = [key for key, cutoff in self._cutoffs.items() if cutoff < horizon]
+        for key in stale:
+            del self._cutoffs[key]
+        stale_claims = [
+            key for key, cutoff in self._claims_cutoffs.items() if cutoff < horizon
+        ]
+        for key in stale_claims:
+            del self._claims_cutoffs[key]
+        await session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        await session.execute(
+            delete(TokenCutoff).where(TokenCutoff.not_before < horizon)
+        )
+        await session.execute(
+            delete(ClaimsCutoff).where(ClaimsCutoff.not_before < horizon)
+        )
+        await session.commit()
+
+    async def start(self) -> None:
+        """Load the current revocations and start the background sync."""
+        self._revoked.clear()
+        self._cutoffs.clear()
+        self._claims_cutoffs.clear()
+        self._synced_at = 0.0
+        async with db.DBState.async_session_maker() as session:
+            await self.sync(session)
+        self._task = asyncio.create_task(self._run(), name="token-revocation-sync")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                async with db.DBState.async_session_maker() as session:
+                    await self.sync(session)
+            except Exception:
+                logger.exception("Token revocation sync failed")
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "revoked_tokens": len(self._revoked),
+            "user_cutoffs": len(self._cutoffs),
+            "claims_cutoffs": len(self._claims_cutoffs),
+            "rejected": self.rejected,
+            "syncs": self.syncs,
+            "last_sync": self._synced_at,
+        }
+
+
+revocations = RevocationList()
@@ -0,0 +1,244 @@
+"""Production server entry point: ``login`` (or ``python -m login.server``).
+
+Runs the app under uvicorn with settings suited to a container:
+
+* the worker count follows the CPU quota of the container (cgroup v2
+  ``cpu.max`` or v1 ``cpu.cfs_quota_us``) and the CPU affinity, rather than
+  the host's CPU count, unless ``SERVER_WORKERS`` is set;
+* uvloop and httptools are used when installed;
+* keep-alive (``SERVER_KEEPALIVE_SECONDS``) defaults to longer than the idle
+  timeout of common load balancers, so they do not reuse a connection the
+  server is closing, and the listen backlog is ``SERVER_BACKLOG``.
+
+The supervisor process imports the app, creates missing tables and the admin
+user, and binds the listening socket once, then forks the workers. Workers
+share the imported code copy-on-write, start without paying the import again,
+and skip the bootstrap, so they never race each other on it. Each worker runs
+the app lifespan itself, so engines, pools and background tasks are per
+process. Workers that
+exit unexpectedly are restarted; SIGTERM or SIGINT stops them gracefully.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import signal
+import socket
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+
+import uvicorn
+from userdb import db
+
+from .audit import JsonlFileSink
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# A worker that dies sooner than this is restarted after a pause, so a broken
+# deployment does not fork in a tight loop.
+MIN_WORKER_LIFETIME = 1.0
+
+
+def cpu_quota(root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs allowed by the cgroup CPU quota, or ``None`` if unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    """CPUs this process may use: affinity, capped by the cgroup quota."""
+    if hasattr(os, "sched_getaffinity"):
+        count = len(os.sched_getaffinity(0))
+    else:
+        count = os.cpu_count() or 1
+    quota = cpu_quota(root)
+    return min(count, quota) if quota else float(count)
+
+
+def default_workers(cpus: float) -> int:
+    """One worker per whole CPU; a fractional quota gets a single worker."""
+    return max(1, math.floor(cpus))
+
+
+@dataclass(slots=True)
+class ServerOptions:
+    host: str = "0.0.0.0"
+    port: int = 8001
+    workers: int = 1
+    keepalive: float = 75.0
+    backlog: int = 2048
+    graceful_timeout: float = 30.0
+    loop: str = "asyncio"
+    http: str = "h11"
+    log_level: str = "info"
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ServerOptions":
+        return cls(
+            host=settings.server_host,
+            port=settings.server_port,
+            workers=settings.server_workers or default_workers(available_cpus()),
+            keepalive=settings.server_keepalive_seconds,
+            backlog=settings.server_backlog,
+            graceful_timeout=settings.server_graceful_timeout_seconds,
+            loop="uvloop" if find_spec("uvloop") else "asyncio",
+            http="httptools" if find_spec("httptools") else "h11",
+            log_level=settings.log_level.lower(),
+        )
+
+    def uvicorn_config(self, app) -> uvicorn.Config:
+        return uvicorn.Config(
+            app,
+            loop=self.loop,
+            http=self.http,
+            timeout_keep_alive=int(self.keepalive),
+            backlog=self.backlog,
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+            log_level=self.log_level,
+        )
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+async def bootstrap() -> None:
+    """Create missing tables and the admin user, then release the engine."""
+    async with db.lifespan():
+        engine = db.DBState.engine
+    await engine.dispose()
+
+
+def run_worker(app, sock: socket.socket, options: ServerOptions) -> None:
+    uvicorn.Server(options.uvicorn_config(app)).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks ``options.workers`` workers on a shared socket and keeps them up."""
+
+    def __init__(self, app, sock: socket.socket, options: ServerOptions) -> None:
+        self.app = app
+        self.sock = sock
+        self.options = options
+        # pid -> (worker slot, start time); a restarted worker takes its
+        # predecessor's slot, and with it the slot's audit file.
+        self.children: dict[int, tuple[int, float]] = {}
+        self.stopping = False
+
+    def spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            JsonlFileSink.worker_slot = slot
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.options)
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = (slot, time.monotonic())
+
+    def stop(self, signum=None, frame=None) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            with suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for slot in range(self.options.workers):
+            self.spawn(slot)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            child = self.children.pop(pid, None)
+            if child is None or self.stopping:
+                continue
+            slot, started = child
+            logger.warning(
+                "Worker %d exited with code %d; restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn(slot)
+        self.sock.close()
+
+
+def serve(options: ServerOptions) -> None:
+    """Preload the app, bootstrap the database once and run the workers."""
+    from . import main
+
+    app = main.app
+    asyncio.run(bootstrap())
+    main.database_bootstrapped = True
+    sock = bind_socket(options.host, options.port, options.backlog)
+    workers = options.workers if hasattr(os, "fork") else 1
+    logger.info(
+        "Serving on %s:%d with %d worker(s), loop=%s http=%s",
+        options.host,
+        options.port,
+        workers,
+        options.loop,
+        options.http,
+    )
+    if workers == 1:
+        try:
+            run_worker(app, sock, options)
+        finally:
+            sock.close()
+        return
+    Supervisor(app, sock, options).run()
+
+
+def main(argv: list[str] | None = None) -> None:
+    options = ServerOptions.from_settings(Settings())
+    parser = argparse.ArgumentParser(description="Run the login service.")
+    parser.add_argument("--host", default=options.host)
+    parser.add_argument("--port", type=int, default=options.port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=options.workers,
+        help="Worker processes (default: from the CPU quota)",
+    )
+    parser.add_argument("--log-level", default=options.log_level)
+    args = parser.parse_args(argv)
+    options.host = args.host
+    options.port = args.port
+    options.workers = max(1, args.workers)
+    options.log_level = args.log_level
+    serve(options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Settings and the objects built from them, shared by every request.
+
+Building :class:`~login.config.Settings` reads and validates the environment
+and ``.env`` file, which takes milliseconds. Request dependencies such as the
+JWT strategy only need a few values from it. :class:`Services` holds one
+``Settings`` for the process along with the objects built from it: the
+signing key set, the :class:`~login.strategy.LoginJWTStrategy` and the SMTP
+configuration. Dependencies return these instead of building their own on
+every request.
+
+:func:`login.main.create_app` installs the settings it builds with
+:meth:`Services.configure`, and the application lifespan starts the services
+from the same object. Code running outside an app (the CLI commands, unit
+tests) gets one built from the environment on first use.
+"""
+
+from .config import Settings
+from .email_utils import SMTPConfig
+from .keys import KeySet
+from .password import ExecutorPasswordHelper, password_helper
+from .strategy import LoginJWTStrategy
+
+
+class Services:
+    """Process-wide settings and the collaborators built from them."""
+
+    def __init__(self) -> None:
+        self._settings: Settings | None = None
+        self._signing_keys: KeySet | None = None
+        self._strategy: LoginJWTStrategy | None = None
+        self._smtp_config: SMTPConfig | None = None
+
+    def configure(self, settings: Settings) -> None:
+        """Use ``settings`` and rebuild everything derived from them."""
+        self._settings = settings
+        self._signing_keys = KeySet.from_settings(settings)
+        self._strategy = LoginJWTStrategy(
+            secret=settings.JWT_SECRET,
+            lifetime_seconds=settings.JWT_EXPIRE_SECONDS,
+            embed_claims=settings.jwt_embed_claims,
+            key_set=self._signing_keys,
+        )
+        self._smtp_config = SMTPConfig.from_settings(settings)
+
+    def reset(self) -> None:
+        """Forget the settings; the next access reads the environment again."""
+        self._settings = None
+        self._signing_keys = None
+        self._strategy = None
+        self._smtp_config = None
+
+    def _require(self) -> None:
+        if self._settings is None:
+            self.configure(Settings())
+
+    @property
+    def settings(self) -> Settings:
+        self._require()
+        return self._settings
+
+    @property
+    def signing_keys(self) -> KeySet | None:
+        """The asymmetric signing keys, or ``None`` when tokens use the secret."""
+        self._require()
+        return self._signing_keys
+
+    @property
+    def strategy(self) -> LoginJWTStrategy:
+        self._require()
+        return self._strategy
+
+    @property
+    def smtp_config(self) -> SMTPConfig:
+        self._require()
+        return self._smtp_config
+
+    @property
+    def password_helper(self) -> ExecutorPasswordHelper:
+        """The hashing pool; started and stopped by the application lifespan."""
+        return password_helper
+
+
+services = Services()
@@ -0,0 +1,189 @@
+"""Pooled, persistent SMTP sessions for bulk email delivery.
+
+Opening a connection, negotiating STARTTLS and authenticating costs more than
+sending a typical verification email. :class:`SMTPConnectionPool` keeps
+authenticated ``smtplib`` sessions alive between sends, delivers whole batches
+of messages over a single session, transparently reconnects when the relay
+drops a session, and closes sessions that have sat idle for too long.
+
+The pool is blocking and thread-safe; the email outbox drives it from worker
+threads so the event loop never waits on the network.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.message import EmailMessage
+
+from . import metrics
+from .email_utils import SMTPConfig
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the session itself is unusable, as opposed to a single
+# message being rejected.
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+@dataclass(slots=True)
+class _PooledConnection:
+    client: smtplib.SMTP
+    last_used: float
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP sessions.
+
+    At most ``max_size`` sessions are open at once; callers beyond that wait
+    for a session to be released. Sessions unused for ``idle_timeout`` seconds
+    are closed by :meth:`close_idle` or discarded when next acquired.
+    """
+
+    def __init__(
+        self, config: SMTPConfig, max_size: int = 4, idle_timeout: float = 60.0
+    ) -> None:
+        self.config = config
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle: list[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._opened = 0
+        self._reused = 0
+        self._reconnects = 0
+        self._closed_idle = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return connection reuse counters for monitoring."""
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            "idle": idle,
+            "opened": self._opened,
+            "reused": self._reused,
+            "reconnects": self._reconnects,
+            "closed_idle": self._closed_idle,
+        }
+
+    def _connect(self) -> smtplib.SMTP:
+        client = smtplib.SMTP(
+            self.config.host, self.config.port, timeout=self.config.timeout
+        )
+        try:
+            if self.config.tls:
+                client.starttls()
+            if self.config.user and self.config.password:
+                client.login(self.config.user, self.config.password)
+        except Exception:
+            _close_quietly(client)
+            raise
+        self._opened += 1
+        return client
+
+    def _take_idle(self) -> smtplib.SMTP | None:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if now - conn.last_used <= self.idle_timeout:
+                    self._reused += 1
+                    return conn.client
+                self._closed_idle += 1
+                _close_quietly(conn.client)
+        return None
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Check out an authenticated session, returning it to the pool after.
+
+        A session that raised while checked out is closed rather than reused.
+        """
+        self._slots.acquire()
+        try:
+            client = self._take_idle() or self._connect()
+            try:
+                yield client
+            except BaseException:
+                _close_quietly(client)
+                raise
+            with self._lock:
+                self._idle.append(_PooledConnection(client, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def send_messages(self, messages: list[EmailMessage]) -> list[bool]:
+        """Deliver ``messages`` over one pooled session.
+
+        Returns one flag per message telling whether the relay accepted it.
+        If the session drops mid-batch it is replaced once and delivery resumes
+        with the message that failed; a message rejected by the relay is
+        skipped without tearing the session down.
+        """
+        results = [False] * len(messages)
+        position = 0
+        reconnected = False
+        while position < len(messages):
+            try:
+                with self.connection() as client:
+                    while position < len(messages):
+                        results[position] = self._send_one(client, messages[position])
+                        position += 1
+            except _CONNECTION_ERRORS as e:
+                if reconnected:
+                    logger.error("SMTP session lost twice in one batch: %s", e)
+                    metrics.SMTP_FAILURES.inc(
+                        "connection", amount=len(messages) - position
+                    )
+                    break
+                logger.warning("SMTP session lost, reconnecting: %s", e)
+                self._reconnects += 1
+                reconnected = True
+            except Exception:
+                logger.exception("Unable to open SMTP session")
+                metrics.SMTP_FAILURES.inc("connection", amount=len(messages) - position)
+                break
+        return results
+
+    def _send_one(self, client: smtplib.SMTP, message: EmailMessage) -> bool:
+        started = time.perf_counter()
+        try:
+            client.send_message(message)
+        except _CONNECTION_ERRORS:
+            raise
+        except smtplib.SMTPException as e:
+            logger.error("SMTP relay rejected message to %s: %s", message["To"], e)
+            metrics.SMTP_FAILURES.inc("rejected")
+            client.rset()
+            return False
+        finally:
+            metrics.SMTP_SEND.observe(time.perf_counter() - started)
+        return True
+
+    def close_idle(self) -> int:
+        """Close sessions idle longer than ``idle_timeout``; return the count."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            stale = [c for c in self._idle if c.last_used < cutoff]
+            self._idle = [c for c in self._idle if c.last_used >= cutoff]
+        for conn in stale:
+            _close_quietly(conn.client)
+        self._closed_idle += len(stale)
+        return len(stale)
+
+    def close(self) -> None:
+        """Close every idle session held by the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn.client)
+
+
+def _close_quietly(client: smtplib.SMTP) -> None:
+    try:
+        client.quit()
+    except Exception:
+        client.close()
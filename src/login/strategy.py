@@ -0,0 +1,213 @@
+"""JWT strategy for the login service.
+
+:class:`LoginJWTStrategy` issues the same tokens as fastapi-users'
+``JWTStrategy`` by default. With ``embed_claims`` enabled it also signs the
+user's active/verified/superuser flags and a :func:`~login.cache.user_version`
+stamp into the token, so routes that only need to know that the caller is an
+active user can be authorized from the token alone.
+
+The stamp keeps that fast path honest. When this worker's user cache holds a
+different version for the user, the token is checked against the database.
+When the cache has no entry, the token is trusted unless the user changed
+after it was issued: the user manager records a claims cutoff for every
+change to a security-relevant field and for deletions, and
+:data:`~login.revocation.revocations` syncs those cutoffs to every worker.
+Password changes and deactivation revoke the tokens outright.
+
+Claims are therefore trusted for at most ``TOKEN_REVOCATION_SYNC_SECONDS``
+after a change made by another worker, and not at all after one made by this
+worker. ``USER_CACHE_TTL_SECONDS`` does not bound this window.
+
+Given a :class:`~login.keys.KeySet`, tokens are signed with the active
+asymmetric key and carry its ``kid``; verification picks the key by ``kid`` so
+tokens signed before a rotation stay valid while their key is still published.
+
+Every token carries a ``jti`` and ``iat`` so it can be revoked on logout or by
+a per-user cutoff; :meth:`LoginJWTStrategy.decode` consults the in-memory
+:data:`~login.revocation.revocations` list and never the database.
+"""
+
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import jwt
+from fastapi_users import exceptions
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+from userdb import db
+from userdb.models import User
+
+from .cache import user_cache, user_version
+from .keys import KeySet
+from .revocation import revocations
+
+
+@dataclass(frozen=True, slots=True)
+class TokenClaims:
+    """Authorization facts about a user, as carried by a claims token."""
+
+    user_id: uuid.UUID
+    is_active: bool
+    is_verified: bool
+    is_superuser: bool
+    version: str
+    expires_at: int | None = None
+    issued_at: float = 0.0
+
+    @classmethod
+    def from_user(cls, user: User, expires_at: int | None = None) -> "TokenClaims":
+        return cls(
+            user_id=user.id,
+            is_active=user.is_active,
+            is_verified=user.is_verified,
+            is_superuser=user.is_superuser,
+            version=user_version(user),
+            expires_at=expires_at,
+        )
+
+
+class LoginJWTStrategy(JWTStrategy[User, uuid.UUID]):
+    """JWTStrategy with optional embedded claims and ``kid``-selected keys.
+
+    Without a key set it signs with ``secret`` exactly like ``JWTStrategy``.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        lifetime_seconds: int | None,
+        embed_claims: bool = False,
+        key_set: KeySet | None = None,
+    ) -> None:
+        super().__init__(secret=secret, lifetime_seconds=lifetime_seconds)
+        self.embed_claims = embed_claims
+        self.key_set = key_set
+        if key_set is not None:
+            self.algorithm = key_set.active.algorithm
+
+    def decode(self, token: str | None) -> dict[str, Any] | None:
+        """Verify and decode ``token``.
+
+        Returns ``None`` if the token is invalid, expired or revoked.
+        """
+        if token is None:
+            return None
+        try:
+            if self.key_set is None:
+                data = decode_jwt(
+                    token,
+                    self.decode_key,
+                    self.token_audience,
+                    algorithms=[self.algorithm],
+                )
+            else:
+                key = self.key_set.get(jwt.get_unverified_header(token).get("kid"))
+                if key is None:
+                    return None
+                data = jwt.decode(
+                    token,
+                    key.public_key,
+                    audience=self.token_audience,
+                    algorithms=[key.algorithm],
+                )
+        except jwt.PyJWTError:
+            return None
+        return None if revocations.is_revoked(data) else data
+
+    def encode(self, data: dict[str, Any]) -> str:
+        """Sign ``data`` with the active key, adding the expiry claim."""
+        if self.key_set is None:
+            return generate_jwt(
+                data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm
+            )
+        payload = dict(data)
+        if self.lifetime_seconds:
+            payload["exp"] = datetime.now(timezone.utc) + timedelta(
+                seconds=self.lifetime_seconds
+            )
+        active = self.key_set.active
+        return jwt.encode(
+            payload,
+            active.private_key,
+            algorithm=active.algorithm,
+            headers={"kid": active.kid},
+        )
+
+    async def read_token(self, token: str | None, user_manager) -> User | None:
+        """Load the user for a token verified by :meth:`decode`."""
+        data = self.decode(token)
+        if data is None or data.get("sub") is None:
+            return None
+        try:
+            return await user_manager.get_cached(user_manager.parse_id(data["sub"]))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+    def read_claims(self, token: str | None) -> TokenClaims | None:
+        """Return the claims signed into ``token`` without touching the DB.
+
+        Returns ``None`` for invalid tokens and for tokens issued without
+        embedded claims.
+        """
+        data = self.decode(token)
+        if data is None or "ver" not in data:
+            return None
+        try:
+            return TokenClaims(
+                user_id=uuid.UUID(data["sub"]),
+                is_active=bool(data["act"]),
+                is_verified=bool(data["vfy"]),
+                is_superuser=bool(data["su"]),
+                version=data["ver"],
+                expires_at=data.get("exp"),
+                issued_at=float(data.get("iat", 0)),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def is_current(self, claims: TokenClaims) -> bool:
+        """Whether the claims can be trusted without loading the user.
+
+        A cached user must carry the same version; without one, the user must
+        not have changed since the token was issued.
+        """
+        version = user_cache.version(claims.user_id)
+        if version is not None:
+            return version == claims.version
+        return not revocations.claims_stale(claims.user_id, claims.issued_at)
+
+    async def write_token(self, user: User, family_id: uuid.UUID | None = None) -> str:
+        """Issue an access token, tied to a refresh token family if given.
+
+        The family id (``fam``) lets logout revoke the refresh tokens issued
+        alongside the access token.
+        """
+        data: dict[str, Any] = {
+            "sub": str(user.id),
+            "aud": self.token_audience,
+            "jti": uuid.uuid4().hex,
+            "iat": time.time(),
+        }
+        if family_id is not None:
+            data["fam"] = family_id.hex
+        if self.embed_claims:
+            data.update(
+                act=user.is_active,
+                vfy=user.is_verified,
+                su=user.is_superuser,
+                ver=user_version(user),
+            )
+        return self.encode(data)
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        """Revoke ``token`` until it expires (logout)."""
+        data = self.decode(token)
+        if data is None or "jti" not in data:
+            return
+        expires_at = int(data.get("exp", time.time() + (self.lifetime_seconds or 0)))
+        async with db.DBState.async_session_maker() as session:
+            await revocations.revoke(session, data["jti"], expires_at)
+            await session.commit()
@@ -0,0 +1,186 @@
+"""Conditional, precomputed user reads for ``GET /users/me`` and ``/users/{id}``.
+
+Single-page apps poll ``/users/me``. The fastapi-users routes validate and
+serialize ``UserRead`` on every call. :func:`get_users_router` replaces the
+GETs of that router (PATCH and DELETE still go to it) with routes that answer
+from :class:`UserRepresentations`. It keeps the serialized body and a strong ETag
+per user, and reuses them for as long as the user's readable fields are
+unchanged. A request whose ``If-None-Match`` matches gets a bodiless 304.
+
+The user itself still comes from the authentication dependency, which the
+user cache usually answers, so a changed user is never served a stale body.
+
+``PATCH /users/me`` is replaced too: the authenticated user may come from the
+user cache or the read replica, so the route reloads it from the primary
+before updating it.
+"""
+
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi_users import exceptions
+from fastapi_users.router.common import ErrorCode
+from pydantic import BaseModel
+from userdb.models import User
+from userdb.schemas import UserRead, UserUpdate
+
+from .auth import (
+    current_active_user,
+    current_superuser,
+    fastapi_users,
+    get_user_manager,
+)
+from .config import Settings
+from .responses import etag_for, etag_matches
+
+# Responses are per user; shared caches must not store them.
+CACHE_CONTROL = "private, no-cache"
+
+
+class UserRepresentations:
+    """Bounded LRU of serialized user bodies and their ETags."""
+
+    def __init__(self, schema: type[BaseModel], max_size: int = 10_000) -> None:
+        self.schema = schema
+        self.max_size = max_size
+        self._fields = tuple(schema.model_fields)
+        self._entries: OrderedDict[uuid.UUID, tuple[tuple, str, bytes]] = OrderedDict()
+        self.hits = 0
+        self.renders = 0
+        self.not_modified = 0
+
+    def configure(self, settings: Settings) -> None:
+        self.max_size = settings.user_cache_max_size
+        self._entries.clear()
+
+    def get(self, user: Any) -> tuple[str, bytes]:
+        """The ETag and JSON body for ``user``, rendered only if it changed."""
+        stamp = tuple(getattr(user, name) for name in self._fields)
+        entry = self._entries.get(user.id)
+        if entry is not None and entry[0] == stamp:
+            self._entries.move_to_end(user.id)
+            self.hits += 1
+            return entry[1], entry[2]
+        body = self.schema.model_validate(user).model_dump_json().encode()
+        etag = etag_for(body)
+        self.renders += 1
+        self._entries[user.id] = (stamp, etag, body)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return etag, body
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "renders": self.renders,
+            "not_modified": self.not_modified,
+        }
+
+
+user_representations = UserRepresentations(UserRead)
+
+
+def conditional_response(request: Request, user: User) -> Response:
+    etag, body = user_representations.get(user)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        user_representations.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def get_users_read_router() -> APIRouter:
+    """The conditional GET routes of ``/users``."""
+    router = APIRouter()
+
+    @router.get("/me", response_model=UserRead, name="users:current_user")
+    async def me(
+        request: Request, user: User = Depends(current_active_user)
+    ) -> Response:
+        """The current user; 304 when ``If-None-Match`` matches."""
+        return conditional_response(request, user)
+
+    @router.get(
+        "/{id}",
+        response_model=UserRead,
+        name="users:user",
+        dependencies=[Depends(current_superuser)],
+    )
+    async def get_user(
+        id: str, request: Request, user_manager=Depends(get_user_manager)
+    ) -> Response:
+        """A user by id (superusers only); 304 when ``If-None-Match`` matches."""
+        try:
+            user = await user_manager.get_cached(user_manager.parse_id(id))
+        except (exceptions.UserNotExists, exceptions.InvalidID) as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND) from e
+        return conditional_response(request, user)
+
+    return router
+
+
+def get_users_update_router() -> APIRouter:
+    """``PATCH /me``, updating the current user as read from the primary."""
+    router = APIRouter()
+
+    @router.patch("/me", response_model=UserRead, name="users:patch_current_user")
+    async def update_me(
+        request: Request,
+        user_update: UserUpdate,
+        user: User = Depends(current_active_user),
+        user_manager=Depends(get_user_manager),
+    ) -> UserRead:
+        """Update the current user.
+
+        The email-uniqueness and password checks, and the response, use the
+        primary's row rather than the possibly stale authenticated one.
+        """
+        try:
+            user = await user_manager.get(user.id)
+        except exceptions.UserNotExists as e:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED) from e
+        if not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = await user_manager.update(
+                user_update, user, safe=True, request=request
+            )
+        except exceptions.InvalidPasswordException as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "code": ErrorCode.UPDATE_USER_INVALID_PASSWORD,
+                    "reason": e.reason,
+                },
+            ) from e
+        except exceptions.UserAlreadyExists as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ErrorCode.UPDATE_USER_EMAIL_ALREADY_EXISTS,
+            ) from e
+        return UserRead.model_validate(user)
+
+    return router
+
+
+def get_users_router() -> APIRouter:
+    """Router for ``/users``: the replaced routes and the fastapi-users rest.
+
+    The fastapi-users routes replaced here are left out rather than shadowed,
+    so each route name and OpenAPI operation id appears once.
+    """
+    router = get_users_read_router()
+    router.routes.extend(get_users_update_router().routes)
+    replaced = {route.name for route in router.routes}
+    for route in fastapi_users.get_users_router(UserRead, UserUpdate).routes:
+        if route.name not in replaced:
+            router.routes.append(route)
+    return router
@@ -1,9 +1,11 @@
 import os
 import sys
+import uuid
 from pathlib import Path
 
 import pytest
 from dotenv import load_dotenv
+from userdb.models import User
 
 # Ensure src/ is in sys.path for module resolution
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -19,9 +21,38 @@ def patch_database_url():
     yield
 
 
+@pytest.fixture(autouse=True, scope="session")
+def patch_audit_path(tmp_path_factory):
+    # Keep audit logs written by the app under test out of the checkout
+    os.environ["AUDIT_PATH"] = str(tmp_path_factory.mktemp("audit") / "audit.jsonl")
+    yield
+
+
 @pytest.fixture(scope="session", autouse=True)
 def cleanup_test_db():
     yield
     db_path = Path("test.db")
     if db_path.exists():
         db_path.unlink()
+
+
+@pytest.fixture
+def make_user():
+    """Factory for fully loaded, transient users; keyword arguments override."""
+
+    def factory(**overrides) -> User:
+        user_id = uuid.uuid4()
+        values = {
+            "id": user_id,
+            "email": "user@example.com",
+            "hashed_password": "hash",
+            "is_active": True,
+            "is_superuser": False,
+            "is_verified": True,
+            "full_name": None,
+            "user_id_str": str(user_id),
+        }
+        values.update(overrides)
+        return User(**values)
+
+    return factory
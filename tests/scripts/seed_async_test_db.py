@@ -2,7 +2,7 @@ import asyncio
 import os
 import uuid
 
-from passlib.hash import argon2
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from userdb.models import Base, User
 
@@ -32,7 +32,7 @@ async def seed():
         user = User(
             id=uuid.uuid4(),
             email="testuser@example.com",
-            hashed_password=argon2.hash("testpassword123"),
+            hashed_password=Argon2Hasher().hash("testpassword123"),
             is_active=True,
             is_superuser=False,
             is_verified=False,
@@ -0,0 +1,119 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb.models import Base, User
+
+from login.activity import ActivityTracker
+from login.models import LoginActivity
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'activity.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_user(session):
+    user_id = uuid.uuid4()
+    session.add(
+        User(
+            id=user_id,
+            email=f"{user_id.hex[:8]}@example.com",
+            hashed_password="hash",
+            user_id_str=str(user_id),
+        )
+    )
+    await session.commit()
+    return user_id
+
+
+async def activity_rows(session):
+    result = await session.execute(
+        select(
+            LoginActivity.user_id,
+            LoginActivity.login_count,
+            LoginActivity.last_login_at,
+            LoginActivity.last_login_ip,
+        )
+    )
+    return {row[0]: row[1:] for row in result.tuples()}
+
+
+@pytest.mark.asyncio
+async def test_logins_coalesce_and_accumulate(session_maker):
+    tracker = ActivityTracker()
+    async with session_maker() as session:
+        alice, bob = await add_user(session), await add_user(session)
+        tracker.record(alice, "10.0.0.1", at=100.0)
+        tracker.record(alice, "10.0.0.2", at=105.0)
+        tracker.record(bob, None, at=101.0)
+        assert tracker.stats()["pending_users"] == 2
+
+        assert await tracker.flush(session) == 2
+        assert await activity_rows(session) == {
+            alice: (2, 105.0, "10.0.0.2"),
+            bob: (1, 101.0, None),
+        }
+
+        tracker.record(alice, "10.0.0.3", at=200.0)
+        await tracker.flush(session)
+        assert (await activity_rows(session))[alice] == (3, 200.0, "10.0.0.3")
+        assert await tracker.flush(session) == 0
+
+    stats = tracker.stats()
+    assert (stats["recorded"], stats["written"], stats["flushes"]) == (4, 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_capped_per_user():
+    tracker = ActivityTracker()
+    tracker.max_pending = 2
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    tracker.record(first)
+    tracker.record(second)
+    tracker.record(third)
+    tracker.record(first)
+
+    stats = tracker.stats()
+    assert stats["pending_users"] == 2
+    assert (stats["recorded"], stats["dropped"]) == (3, 1)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_pending_logins(session_maker):
+    tracker = ActivityTracker()
+    user_id = uuid.uuid4()
+    tracker.record(user_id, at=1.0)
+    async with session_maker() as session:
+        await session.execute(text("DROP TABLE login_activity"))
+        await session.commit()
+        with pytest.raises(OperationalError):
+            await tracker.flush(session)
+
+    tracker.record(user_id, at=2.0)
+    assert tracker.stats()["pending_users"] == 1
+    assert tracker._pending[user_id].count == 2
+
+
+@pytest.mark.asyncio
+async def test_update_or_insert_without_upsert_support(session_maker):
+    tracker = ActivityTracker()
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        row = {
+            "user_id": user_id,
+            "last_login_at": 1.0,
+            "last_login_ip": None,
+            "login_count": 2,
+        }
+        await tracker._update_or_insert(session, [row])
+        await tracker._update_or_insert(session, [{**row, "last_login_at": 3.0}])
+        await session.commit()
+        assert await activity_rows(session) == {user_id: (4, 3.0, None)}
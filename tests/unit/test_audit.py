@@ -0,0 +1,177 @@
+import json
+import time
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb import db
+from userdb.models import Base
+
+from login.audit import (
+    AuditEvent,
+    AuditLog,
+    AuditSink,
+    DatabaseSink,
+    JsonlFileSink,
+)
+from login.models import AuditRecord
+
+
+class ListSink(AuditSink):
+    def __init__(self, fail: bool = False) -> None:
+        self.batches = []
+        self.fail = fail
+
+    async def write(self, events):
+        if self.fail:
+            raise OSError("disk full")
+        self.batches.append(events)
+
+
+def request_from(host):
+    request = MagicMock()
+    request.client.host = host
+    return request
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_batches():
+    sink = ListSink()
+    log = AuditLog(sink)
+    log.batch_size = 2
+    user_id = uuid.uuid4()
+    log.emit("login", user_id, request_from("10.0.0.1"))
+    log.emit("update", user_id, fields=["email"])
+    log.emit("logout")
+    await log.flush()
+
+    assert [len(batch) for batch in sink.batches] == [2, 1]
+    first, second = sink.batches[0]
+    assert first.as_dict()["ip"] == "10.0.0.1"
+    assert second.as_dict()["fields"] == ["email"]
+    assert second.as_dict()["user_id"] == str(user_id)
+    assert log.stats()["written"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_drops_instead_of_blocking():
+    log = AuditLog(ListSink())
+    log.queue_size = 2
+    for _ in range(5):
+        log.emit("login")
+    stats = log.stats()
+    assert (stats["buffered"], stats["emitted"], stats["dropped"]) == (2, 2, 3)
+
+
+@pytest.mark.asyncio
+async def test_sink_failures_are_counted():
+    log = AuditLog(ListSink(fail=True))
+    log.emit("login")
+    await log.flush()
+    stats = log.stats()
+    assert (stats["written"], stats["failed"], stats["buffered"]) == (0, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_the_buffer():
+    sink = ListSink()
+    log = AuditLog(sink)
+    log.flush_interval = 60
+    await log.start()
+    log.emit("register")
+    await log.stop()
+    assert [e.event for batch in sink.batches for e in batch] == ["register"]
+
+
+@pytest.mark.asyncio
+async def test_file_sink_writes_json_lines_and_rotates_by_size(tmp_path):
+    sink = JsonlFileSink(tmp_path / "audit.jsonl", max_bytes=200, backups=2)
+    log = AuditLog(sink)
+    for _ in range(12):
+        log.emit("login", uuid.uuid4())
+        await log.flush()
+    await sink.close()
+
+    rotated = sorted(tmp_path.glob("audit.jsonl.*"))
+    assert len(rotated) == 2
+    current = (tmp_path / "audit.jsonl").read_text().splitlines()
+    assert json.loads(current[-1])["event"] == "login"
+    for path in [*rotated, tmp_path / "audit.jsonl"]:
+        assert path.stat().st_size <= 200
+
+
+@pytest.mark.asyncio
+async def test_file_sink_rotates_by_age(tmp_path):
+    sink = JsonlFileSink(tmp_path / "audit.jsonl", rotate_seconds=3600)
+    log = AuditLog(sink)
+    log.emit("login")
+    await log.flush()
+    sink._opened_at = time.time() - 7200
+    log.emit("login")
+    await log.flush()
+    await sink.close()
+    assert len(list(tmp_path.glob("audit.jsonl.*"))) == 1
+
+
+def event(name):
+    return AuditEvent(time.time(), name, None, None, None)
+
+
+@pytest.mark.asyncio
+async def test_worker_file_sinks_rotate_only_their_own_files(tmp_path, monkeypatch):
+    sinks = {
+        slot: JsonlFileSink(tmp_path / "audit.jsonl", max_bytes=200, backups=1)
+        for slot in (0, 1)
+    }
+
+    async def write(slot, name):
+        monkeypatch.setattr(JsonlFileSink, "worker_slot", slot)
+        await sinks[slot].write([event(name)])
+
+    await write(0, "login")
+    await write(1, "login")
+    for _ in range(6):
+        await write(0, "login")
+    await write(1, "logout")
+    for sink in sinks.values():
+        await sink.close()
+
+    assert not (tmp_path / "audit.jsonl").exists()
+    assert len(list(tmp_path.glob("audit.0.jsonl.*"))) == 1
+    assert not list(tmp_path.glob("audit.1.jsonl.*"))
+    events = (tmp_path / "audit.1.jsonl").read_text().splitlines()
+    assert [json.loads(line)["event"] for line in events] == ["login", "logout"]
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'audit.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(db.DBState, "async_session_maker", maker)
+    yield maker
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_sink_inserts_rows(session_maker):
+    log = AuditLog(DatabaseSink())
+    user_id = uuid.uuid4()
+    log.emit("update", user_id, fields=["password"])
+    log.emit("delete", user_id)
+    await log.flush()
+
+    async with session_maker() as session:
+        rows = (
+            await session.execute(
+                select(AuditRecord.event, AuditRecord.user_id, AuditRecord.detail)
+            )
+        ).all()
+    assert [tuple(row) for row in rows] == [
+        ("update", user_id, {"fields": ["password"]}),
+        ("delete", user_id, None),
+    ]
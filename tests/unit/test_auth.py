@@ -1,9 +1,10 @@
-import logging
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
+from fastapi.security import OAuth2PasswordRequestForm
 
 from login.auth import UserManager
+from login.password import ExecutorPasswordHelper
 
 
 @pytest.fixture
@@ -14,19 +15,19 @@ def user():
 
 
 @pytest.mark.asyncio
-async def test_on_after_login(user, caplog):
+async def test_on_after_login(user):
     manager = UserManager(None)
-    with caplog.at_level(logging.INFO):
+    with patch("login.auth.audit") as mock_audit:
         await manager.on_after_login(user)
-    assert f"User {user.id} logged in" in caplog.text
+    mock_audit.emit.assert_called_once_with("login", user.id, None)
 
 
 @pytest.mark.asyncio
-async def test_on_after_register(user, caplog):
+async def test_on_after_register(user):
     manager = UserManager(None)
-    with caplog.at_level(logging.INFO):
+    with patch("login.auth.audit") as mock_audit:
         await manager.on_after_register(user)
-    assert "User registered: id=123" in caplog.text
+    mock_audit.emit.assert_called_once_with("register", user.id, None)
 
 
 @pytest.mark.asyncio
@@ -35,13 +36,16 @@ async def test_on_after_forgot_password(user):
     user.email = "test@example.com"
     token = "dummy-token"
     expected_link = f"{manager.settings.frontend_url}/reset-password?token={token}"
-    with patch("login.auth.send_email") as mock_send_email:
+    with patch("login.auth.outbox") as mock_outbox:
         await manager.on_after_forgot_password(user, token=token)
-        mock_send_email.assert_called_once_with(
+        mock_outbox.enqueue.assert_called_once_with(
             to_email="test@example.com",
             subject="Password Reset",
             body=f"Click the link to reset your password: {expected_link}",
+            html=ANY,
         )
+    html = mock_outbox.enqueue.call_args.kwargs["html"]
+    assert f'href="{expected_link}"' in html
 
 
 @pytest.mark.asyncio
@@ -50,22 +54,72 @@ async def test_on_after_request_verify(user):
     user.email = "test@example.com"
     token = "dummy-token"
     expected_link = f"{manager.settings.frontend_url}/verify-email?token={token}"
-    with patch("login.auth.send_email") as mock_send_email:
+    with patch("login.auth.outbox") as mock_outbox:
         await manager.on_after_request_verify(user, token=token)
-        mock_send_email.assert_called_once_with(
+        mock_outbox.enqueue.assert_called_once_with(
             to_email="test@example.com",
             subject="Verify Your Email",
             body=f"Click the link to verify your email: {expected_link}",
+            html=ANY,
         )
 
 
 @pytest.mark.asyncio
 async def test_get_user_manager():
-    from unittest.mock import MagicMock
-
     from login.auth import get_user_manager
+    from login.password import password_helper
 
-    mock_user_db = MagicMock()
-    agen = get_user_manager(user_db=mock_user_db)
-    manager = await agen.__anext__()
+    session = MagicMock()
+    manager = await get_user_manager(session=session)
     assert isinstance(manager, UserManager)
+    assert manager.user_db.session is session
+    assert manager.password_helper is password_helper
+
+
+@pytest.mark.asyncio
+async def test_authenticate_verifies_password_off_loop():
+    helper = ExecutorPasswordHelper(max_workers=1)
+    stored = MagicMock()
+    stored.hashed_password = helper.hash("right")
+    user_db = MagicMock()
+    user_db.get_by_email = AsyncMock(return_value=stored)
+    manager = UserManager(user_db, helper)
+
+    form = OAuth2PasswordRequestForm(username="a@example.com", password="right")
+    assert await manager.authenticate(form) is stored
+    form = OAuth2PasswordRequestForm(username="a@example.com", password="wrong")
+    assert await manager.authenticate(form) is None
+    helper.shutdown()
+    assert helper.stats()["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_update_hashes_new_password():
+    helper = ExecutorPasswordHelper(mode="inline")
+    user_db = MagicMock()
+    user_db.update = AsyncMock(side_effect=lambda user, data: data)
+    manager = UserManager(user_db, helper)
+
+    updated = await manager._update(MagicMock(), {"password": "new-password"})
+    assert "password" not in updated
+    assert helper.verify_and_update("new-password", updated["hashed_password"])[0]
+
+
+@pytest.mark.asyncio
+async def test_get_reads_primary_while_get_cached_uses_cache(make_user):
+    from login.cache import user_cache
+
+    cached = make_user(email="cached@example.com")
+    user_id = cached.id
+    primary = MagicMock()
+    user_db = MagicMock()
+    user_db.get = AsyncMock(return_value=primary)
+    manager = UserManager(user_db, ExecutorPasswordHelper(mode="inline"))
+    user_cache.put(cached)
+    try:
+        assert (await manager.get_cached(user_id)).email == "cached@example.com"
+        user_db.get.assert_not_called()
+        assert await manager.get(user_id) is primary
+        user_db.get.assert_awaited_once_with(user_id)
+    finally:
+        user_cache.clear()
@@ -0,0 +1,141 @@
+import pytest
+import pytest_asyncio
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb.models import Base, User
+
+from login.auth import UserManager
+from login.bulk_import import (
+    MAX_LINE_LENGTH,
+    BulkUserImporter,
+    ImportReport,
+    iter_lines,
+    iter_rows,
+)
+from login.password import ExecutorPasswordHelper
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'import.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def make_importer(session, batch_size=2):
+    helper = ExecutorPasswordHelper(mode="inline")
+    manager = UserManager(SQLAlchemyUserDatabase(session, User), helper)
+    return BulkUserImporter(manager, batch_size), helper
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def import_text(importer, text: str, fmt: str, **kwargs) -> ImportReport:
+    data = text.encode()
+    # Split mid-line to exercise the line reassembly.
+    rows = iter_rows(iter_lines(chunks(data[:7], data[7:])), fmt)
+    return await importer.run(rows, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_csv_import_hashes_dedups_and_reports(session):
+    importer, helper = make_importer(session)
+    bcrypt_hash = helper.password_hash.hashers[1].hash("legacy")
+    text = (
+        "email,password,hashed_password,full_name,is_verified\n"
+        "a@example.com,secret,,Ann,true\n"
+        f"b@example.com,,{bcrypt_hash},,\n"
+        "A@example.com,secret,,,\n"
+        "not-an-email,secret,,,\n"
+        "c@example.com,,plaintext,,\n"
+        "d@example.com,,,,\n"
+        "too,few\n"
+    )
+    report = await import_text(importer, text, "csv")
+
+    assert (report.rows, report.created, report.duplicates, report.failed) == (
+        7,
+        2,
+        1,
+        4,
+    )
+    assert [(e.line, e.error) for e in report.errors] == [
+        (5, "invalid email"),
+        (6, "unrecognized password hash"),
+        (7, "password or hashed_password is required"),
+        (8, "expected 5 columns, got 2"),
+    ]
+    users = {u.email: u for u in (await session.execute(select(User))).scalars()}
+    assert set(users) == {"a@example.com", "b@example.com"}
+    ann = users["a@example.com"]
+    assert ann.full_name == "Ann" and ann.is_verified and ann.is_active
+    assert ann.user_id_str == str(ann.id)
+    assert helper.verify_and_update("secret", ann.hashed_password)[0]
+    assert users["b@example.com"].hashed_password == bcrypt_hash
+
+
+@pytest.mark.asyncio
+async def test_jsonl_import_skips_existing_users_and_caps_errors(session):
+    importer, _ = make_importer(session)
+    first = '{"email": "a@example.com", "password": "x"}\n'
+    assert (await import_text(importer, first, "jsonl")).created == 1
+
+    text = first + '{"email": "b@example.com", "password": "x"}\n[1]\n{bad\n'
+    report = await import_text(importer, text, "jsonl", report=ImportReport(1))
+
+    assert (report.created, report.duplicates, report.failed) == (1, 1, 2)
+    assert [e.error for e in report.errors] == ["expected a JSON object"]
+
+
+@pytest.mark.asyncio
+async def test_rows_with_wrongly_typed_fields_are_reported(session):
+    importer, _ = make_importer(session)
+    text = (
+        '{"email": "a@example.com", "password": 12345678}\n'
+        '{"email": "b@example.com", "password": "x", "full_name": {"a": 1}}\n'
+        '{"email": "c@example.com", "hashed_password": ["h"]}\n'
+        '{"email": "d@example.com", "password": "x", "is_active": 1}\n'
+        '{"email": "e@example.com", "password": "x", "is_verified": true}\n'
+    )
+    report = await import_text(importer, text, "jsonl")
+
+    assert (report.created, report.failed) == (1, 4)
+    assert [(e.line, e.email, e.error) for e in report.errors] == [
+        (1, "a@example.com", "password must be a string"),
+        (2, "b@example.com", "full_name must be a string"),
+        (3, "c@example.com", "hashed_password must be a string"),
+        (4, "d@example.com", "is_active must be a boolean"),
+    ]
+    user = (await session.execute(select(User))).scalar_one()
+    assert (user.email, user.is_verified) == ("e@example.com", True)
+
+
+@pytest.mark.asyncio
+async def test_overlong_lines_are_reported_and_skipped(session):
+    importer, _ = make_importer(session)
+    padding = "x" * 1024
+    long_row = f'{{"email": "a@example.com", "full_name": "{padding}'
+    parts = [long_row.encode()] + [padding.encode()] * 64 + [b'"}\n']
+    parts.append(b'{"email": "b@example.com", "password": "x"}\n')
+    report = await importer.run(iter_rows(iter_lines(chunks(*parts)), "jsonl"))
+
+    assert (report.rows, report.created, report.failed) == (2, 1, 1)
+    assert [(e.line, e.error) for e in report.errors] == [
+        (1, f"line longer than {MAX_LINE_LENGTH} characters")
+    ]
+    user = (await session.execute(select(User))).scalar_one()
+    assert user.email == "b@example.com"
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_yields_none_for_overlong_lines():
+    data = [b"a" * 10, b"b" * 10, b"\nok\n", b"c" * 30]
+    lines = [line async for line in iter_lines(chunks(*data), max_length=15)]
+    assert lines == [None, "ok", None]
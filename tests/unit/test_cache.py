@@ -0,0 +1,67 @@
+import time
+import uuid
+
+from sqlalchemy import inspect as sa_inspect
+from userdb.models import User
+
+from login.cache import UserCache
+
+
+def test_hit_returns_detached_copy(make_user):
+    cache = UserCache()
+    user = make_user()
+    cache.put(user)
+
+    cached = cache.get(user.id)
+    assert cached is not user
+    assert cached.email == user.email
+    assert sa_inspect(cached).detached
+    assert cache.get(user.id) is not cached
+    assert cache.stats()["hits"] == 2
+
+
+def test_miss_and_expiry(make_user):
+    cache = UserCache(ttl=0.01)
+    user = make_user()
+    assert cache.get(user.id) is None
+    cache.put(user)
+    time.sleep(0.02)
+    assert cache.get(user.id) is None
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(make_user):
+    cache = UserCache(max_size=2)
+    first, second, third = make_user(), make_user(), make_user()
+    cache.put(first)
+    cache.put(second)
+    cache.get(first.id)
+    cache.put(third)
+
+    assert cache.get(second.id) is None
+    assert cache.get(first.id) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate(make_user):
+    cache = UserCache()
+    user = make_user()
+    cache.put(user)
+    cache.invalidate(user.id)
+    assert cache.get(user.id) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_disabled_cache_stores_nothing(make_user):
+    cache = UserCache(enabled=False)
+    user = make_user()
+    cache.put(user)
+    assert cache.get(user.id) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_partially_loaded_user_is_not_cached():
+    cache = UserCache()
+    cache.put(User(id=uuid.uuid4(), email="partial@example.com"))
+    assert cache.stats()["size"] == 0
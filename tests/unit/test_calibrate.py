@@ -0,0 +1,33 @@
+import json
+
+from login.calibrate import Candidate, calibrate, main, recommend
+
+
+def test_calibrate_keeps_the_last_setting_within_budget():
+    candidates = calibrate(10.0, memory_sizes=(1024, 2048), max_time_cost=2, samples=1)
+    assert [(c.memory_kib, c.time_cost) for c in candidates] == [(1024, 2), (2048, 2)]
+    assert all(c.within_budget and c.hashes_per_second > 0 for c in candidates)
+
+
+def test_calibrate_reports_memory_sizes_over_budget():
+    (candidate,) = calibrate(0.0, memory_sizes=(1024,), samples=1)
+    assert (candidate.time_cost, candidate.within_budget) == (1, False)
+
+
+def test_recommend_prefers_memory_then_passes_and_honours_min_rate():
+    candidates = [
+        Candidate(19456, 2, 1, 100.0, hashes_per_second=20.0),
+        Candidate(65536, 1, 1, 200.0, hashes_per_second=5.0),
+        Candidate(131072, 1, 1, 900.0, within_budget=False),
+    ]
+    assert recommend(candidates).memory_kib == 65536
+    assert recommend(candidates, min_rate=10.0).memory_kib == 19456
+    assert recommend(candidates, min_rate=50.0) is None
+
+
+def test_main_prints_a_json_report(capsys):
+    args = "--budget-ms 10000 --memory-kib 1024 --max-time-cost 1 --samples 1 --json"
+    code = main(args.split())
+    report = json.loads(capsys.readouterr().out)
+    assert code == 0
+    assert report["recommended"]["memory_kib"] == 1024
@@ -0,0 +1,110 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from login.auth import UserManager
+from login.coalesce import CoalesceBackend, EmailCoalescer, MemoryBackend
+
+
+@pytest.fixture
+def user():
+    mock_user = MagicMock()
+    mock_user.id = uuid.uuid4()
+    mock_user.email = "coalesce@example.com"
+    mock_user.is_active = True
+    mock_user.is_verified = False
+    return mock_user
+
+
+@pytest.fixture
+def coalescer():
+    coalescer = EmailCoalescer(MemoryBackend())
+    with patch("login.auth.email_coalescer", coalescer):
+        yield coalescer
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_claims_once_per_window():
+    backend = MemoryBackend()
+    assert await backend.claim("k", 60)
+    assert not await backend.claim("k", 60)
+    await backend.release("k")
+    assert await backend.claim("k", 60)
+
+    assert await backend.claim("short", 0)
+    assert await backend.claim("short", 0)
+    assert len(backend) == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded():
+    backend = MemoryBackend(max_keys=2)
+    for key in "abc":
+        assert await backend.claim(key, 60)
+    assert len(backend) == 2
+    assert await backend.claim("a", 60)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_counts_sent_and_coalesced():
+    coalescer = EmailCoalescer()
+    user_id = uuid.uuid4()
+    assert await coalescer.claim("forgot_password", user_id)
+    assert not await coalescer.claim("forgot_password", user_id)
+    assert await coalescer.claim("request_verify", user_id)
+    stats = coalescer.stats()
+    assert stats["forgot_password_sent"] == 1
+    assert stats["forgot_password_coalesced"] == 1
+    assert stats["request_verify_sent"] == 1
+    assert stats["pending"] == 2
+
+    coalescer.enabled = False
+    assert await coalescer.claim("forgot_password", user_id)
+
+
+@pytest.mark.asyncio
+async def test_forgot_password_mints_one_token_per_window(user, coalescer):
+    helper = MagicMock()
+    helper.hash_async = AsyncMock(return_value="fingerprint")
+    manager = UserManager(None, password_helper=helper)
+    with patch("login.auth.outbox") as mock_outbox, patch("login.auth.audit"):
+        await manager.forgot_password(user)
+        await manager.forgot_password(user)
+    helper.hash_async.assert_awaited_once()
+    mock_outbox.enqueue.assert_called_once()
+    assert coalescer.coalesced["forgot_password"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_verify_sends_one_email_per_window(user, coalescer):
+    manager = UserManager(None)
+    with patch("login.auth.outbox") as mock_outbox, patch("login.auth.audit"):
+        await manager.request_verify(user)
+        await manager.request_verify(user)
+        mock_outbox.enqueue.assert_called_once()
+
+        # Verifying ends the window
+        await manager.on_after_verify(user)
+        await manager.request_verify(user)
+    assert mock_outbox.enqueue.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unqueued_email_releases_the_claim(user, coalescer):
+    manager = UserManager(None)
+    with patch("login.auth.outbox") as mock_outbox, patch("login.auth.audit"):
+        mock_outbox.enqueue.return_value = False
+        await manager.request_verify(user)
+        await manager.request_verify(user)
+    assert mock_outbox.enqueue.call_count == 2
+    assert coalescer.coalesced["request_verify"] == 0
+
+
+def test_backends_must_implement_claim_and_release():
+    class ClaimOnly(CoalesceBackend):
+        async def claim(self, key, window):
+            return True
+
+    with pytest.raises(TypeError):
+        ClaimOnly()
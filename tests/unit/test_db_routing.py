@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb.models import Base, User
+
+from login.db_routing import ReplicaRouter
+
+
+async def make_db(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+def new_user(user_id, full_name):
+    return User(
+        id=user_id,
+        email=f"{user_id.hex[:8]}@example.com",
+        hashed_password="hash",
+        user_id_str=str(user_id),
+        full_name=full_name,
+    )
+
+
+@pytest_asyncio.fixture
+async def router(tmp_path):
+    replica_engine = await make_db(tmp_path / "replica.db")
+    await replica_engine.dispose()
+    router = ReplicaRouter()
+    router.url = f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"
+    router.start()
+    yield router
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_the_replica(router):
+    user_id = uuid.uuid4()
+    async with router.session_maker() as session:
+        session.add(new_user(user_id, "Replica"))
+        await session.commit()
+
+    user = await router.get_user(user_id)
+    assert user.full_name == "Replica"
+    assert await router.get_user(uuid.uuid4()) is None
+    stats = router.stats()
+    assert (stats["replica_reads"], stats["replica_misses"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_recent_writers_read_from_the_primary(router):
+    user_id = uuid.uuid4()
+    router.sticky_seconds = 60
+    router.mark_written(user_id)
+    assert router.is_sticky(user_id)
+    assert await router.get_user(user_id) is None
+    assert router.stats()["sticky_reads"] == 1
+
+    router.sticky_seconds = -1
+    router.mark_written(user_id)
+    assert not router.is_sticky(user_id)
+
+
+@pytest.mark.asyncio
+async def test_sticky_map_is_bounded(router):
+    router.sticky_seconds = 60
+    router.max_sticky = 3
+    user_ids = [uuid.uuid4() for _ in range(5)]
+    for user_id in user_ids:
+        router.mark_written(user_id)
+    assert router.stats()["sticky_users"] == 3
+    assert not router.is_sticky(user_ids[0])
+    assert router.is_sticky(user_ids[-1])
+
+
+@pytest.mark.asyncio
+async def test_without_replica_everything_uses_the_primary(tmp_path, monkeypatch):
+    from userdb import db
+
+    primary = await make_db(tmp_path / "primary.db")
+    monkeypatch.setattr(db.DBState, "async_session_maker", async_sessionmaker(primary))
+    router = ReplicaRouter()
+    router.start()
+    user_id = uuid.uuid4()
+    router.mark_written(user_id)
+    assert not router.enabled
+    assert await router.get_user(user_id) is None
+    assert router.stats()["sticky_users"] == 0
+    async with router.session() as session:
+        assert session.bind is primary
+    await primary.dispose()
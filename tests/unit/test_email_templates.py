@@ -0,0 +1,95 @@
+import pytest
+
+from login.email_templates import (
+    CompiledTemplate,
+    EmailTemplates,
+    accept_language,
+    email_templates,
+)
+
+
+def write(directory, locale, name, subject, text, html=None):  # noqa: PLR0913
+    locale_dir = directory / locale
+    locale_dir.mkdir(parents=True, exist_ok=True)
+    (locale_dir / f"{name}.subject").write_text(subject)
+    (locale_dir / f"{name}.txt").write_text(text)
+    if html is not None:
+        (locale_dir / f"{name}.html").write_text(html)
+
+
+@pytest.fixture
+def templates(tmp_path):
+    write(tmp_path, "en", "welcome", "Hello\n", "Hi $name, {see} $$5\n", "<b>$name</b>")
+    write(tmp_path, "pt", "welcome", "Olá", "Olá $name")
+    registry = EmailTemplates(tmp_path)
+    registry.load()
+    return registry
+
+
+def test_compiled_template_matches_string_template():
+    template = CompiledTemplate("Hi ${name}, {literal} costs $$5 at $place")
+    assert template.names == {"name", "place"}
+    assert (
+        template.render({"name": "Ann", "place": "home"})
+        == "Hi Ann, {literal} costs $5 at home"
+    )
+    with pytest.raises(KeyError):
+        template.render({"name": "Ann"})
+    with pytest.raises(ValueError):
+        CompiledTemplate("Bad $ placeholder")
+
+
+def test_load_rejects_placeholders_the_caller_does_not_pass(tmp_path):
+    write(tmp_path, "en", "welcome", "Hi $name", "Hi $name", "<b>$nmae</b>")
+    registry = EmailTemplates(tmp_path, {"welcome": frozenset({"name"})})
+    with pytest.raises(ValueError, match="nmae"):
+        registry.load()
+
+    registry = EmailTemplates(tmp_path, {})
+    registry.load()
+    assert registry.get("welcome").names == {"name", "nmae"}
+
+
+def test_bundled_templates_use_known_placeholders():
+    EmailTemplates().load()
+
+
+def test_render_escapes_html_values_only(templates):
+    email = templates.render("welcome", name="<Ann>")
+    assert email.subject == "Hello"
+    assert email.text == "Hi <Ann>, {see} $5"
+    assert email.html == "<b>&lt;Ann&gt;</b>"
+    assert templates.stats()["renders"] == 1
+
+
+def test_locale_follows_accept_language(templates):
+    assert templates.resolve(None) == "en"
+    assert templates.resolve("pt-BR,en;q=0.8") == "pt"
+    assert templates.resolve("fr, pt;q=0.5, en;q=0.9") == "en"
+    assert templates.resolve("pt;q=0, de") == "en"
+
+    email = templates.render("welcome", "pt-BR", name="Ana")
+    assert (email.subject, email.text, email.html) == ("Olá", "Olá Ana", None)
+
+
+def test_missing_locale_variant_falls_back_to_default(tmp_path, templates):
+    write(tmp_path, "en", "other", "Other", "Other")
+    templates.load()
+    assert templates.get("other", "pt").locale == "en"
+    with pytest.raises(KeyError):
+        templates.get("missing")
+
+
+def test_load_requires_default_locale(tmp_path):
+    write(tmp_path, "pt", "welcome", "Olá", "Olá")
+    with pytest.raises(ValueError, match="welcome"):
+        EmailTemplates(tmp_path).load()
+
+
+def test_bundled_templates_render_both_emails():
+    link = "https://example.com/verify-email?token=a&b"
+    email = email_templates.render("verify_email", link=link)
+    assert email.text == f"Click the link to verify your email: {link}"
+    assert 'href="https://example.com/verify-email?token=a&amp;b"' in email.html
+    assert email_templates.get("reset_password").html is not None
+    assert accept_language(None) is None
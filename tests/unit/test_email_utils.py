@@ -5,7 +5,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from login.config import Settings
-from login.email_utils import send_email
+from login.email_utils import SMTPConfig, build_message, send_email
+from login.services import services
 
 
 @pytest.mark.parametrize(
@@ -19,25 +20,22 @@ from login.email_utils import send_email
 )
 def test_send_email_branches(smtp_tls, smtp_user, smtp_pass, expected_from):
     """Test send_email covers all branches: TLS, auth, and From address logic."""
-    with (
-        patch("login.email_utils.Settings") as mock_settings,
-        patch("login.email_utils.smtplib.SMTP") as mock_smtp,
-    ):
-        # Mock settings
-        instance = mock_settings.return_value
-        instance.smtp_host = "localhost"
-        instance.smtp_port = 1025
-        instance.smtp_user = smtp_user
-        instance.smtp_password = smtp_pass
-        instance.smtp_tls = smtp_tls
-
+    config = SMTPConfig(
+        host="localhost",
+        port=1025,
+        user=smtp_user,
+        password=smtp_pass,
+        tls=smtp_tls,
+        timeout=2.5,
+    )
+    with patch("login.email_utils.smtplib.SMTP") as mock_smtp:
         # Mock SMTP context manager
         smtp_instance = MagicMock()
         mock_smtp.return_value.__enter__.return_value = smtp_instance
 
-        send_email("to@example.com", "Subject", "Body")
+        assert send_email("to@example.com", "Subject", "Body", config=config) is True
 
-        mock_smtp.assert_called_once_with("localhost", 1025)
+        mock_smtp.assert_called_once_with("localhost", 1025, timeout=2.5)
         # Check starttls if TLS is enabled
         if smtp_tls:
             smtp_instance.starttls.assert_called_once()
@@ -65,7 +63,10 @@ def mock_settings(monkeypatch):
     monkeypatch.setenv("SMTP_PASSWORD", "password")
     monkeypatch.setenv("SMTP_TLS", "True")
     # Add other necessary env vars for Settings if any
-    return Settings()
+    settings = Settings()
+    services.configure(settings)
+    yield settings
+    services.reset()
 
 
 def test_send_email_smtp_exception(mock_settings, caplog):
@@ -77,8 +78,9 @@ def test_send_email_smtp_exception(mock_settings, caplog):
         mock_smtp.return_value.__enter__.return_value = mock_server
 
         with caplog.at_level(logging.ERROR):
-            send_email("recipient@example.com", "Test Subject", "Test Body")
+            sent = send_email("recipient@example.com", "Test Subject", "Test Body")
 
+        assert sent is False
         assert any(
             "SMTP error: Test SMTP Error" in record.message
             and record.levelname == "ERROR"
@@ -159,3 +161,27 @@ def test_send_email_generic_exception_on_context_manager(mock_settings, caplog):
             for record in caplog.records
             if "Unexpected error" in record.message
         ), "exc_info was not True for generic Exception (SMTP init) log."
+
+
+def test_build_message_multipart():
+    config = SMTPConfig(user="sender@example.com")
+    msg = build_message(config, "to@example.com", "Olá", "Hé text", "<p>Hé</p>")
+    assert msg.get_content_type() == "multipart/alternative"
+    assert (msg["From"], msg["To"], msg["Subject"]) == (
+        "sender@example.com",
+        "to@example.com",
+        "Olá",
+    )
+    assert msg.get_body(("plain",)).get_content() == "Hé text"
+    assert msg.get_body(("html",)).get_content() == "<p>Hé</p>"
+    assert b"Ol=C3=A1" in msg.as_bytes()
+
+
+def test_send_email_uses_the_configured_relay(mock_settings):
+    with (
+        patch("login.config.Settings.__init__") as settings_init,
+        patch("login.email_utils.smtplib.SMTP") as mock_smtp,
+    ):
+        assert send_email("to@example.com", "S", "B")
+    settings_init.assert_not_called()
+    mock_smtp.assert_called_once_with("smtp.test.com", 587, timeout=10.0)
@@ -0,0 +1,140 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb import db
+from userdb.models import Base, User
+
+from login.cache import user_cache
+from login.introspection import TokenIntrospector
+from login.revocation import revocations
+from login.strategy import LoginJWTStrategy
+
+SECRET = "introspection-test-secret-with-enough-bytes"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest_asyncio.fixture
+async def users(tmp_path, monkeypatch):
+    """Two users in a fresh primary database: one active, one deactivated."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(db.DBState, "async_session_maker", session_maker)
+    created = []
+    async with session_maker() as session:
+        for is_active in (True, False):
+            user_id = uuid.uuid4()
+            user = User(
+                id=user_id,
+                email=f"{user_id.hex[:8]}@example.com",
+                hashed_password="hash",
+                is_active=is_active,
+                is_verified=False,
+                is_superuser=False,
+                full_name=None,
+                user_id_str=str(user_id),
+            )
+            session.add(user)
+            created.append(user)
+        await session.commit()
+    yield created
+    await engine.dispose()
+
+
+def token_for(strategy, user_id, **claims):
+    return strategy.encode(
+        {
+            "sub": str(user_id),
+            "aud": strategy.token_audience,
+            "jti": uuid.uuid4().hex,
+            **claims,
+        }
+    )
+
+
+def test_decode_caches_verified_tokens(monkeypatch):
+    strategy = LoginJWTStrategy(SECRET, 60)
+    introspector = TokenIntrospector()
+    token = token_for(strategy, uuid.uuid4())
+
+    assert introspector.decode(strategy, token)["sub"]
+    assert introspector.decode(strategy, token)["sub"]
+    assert introspector.decode(strategy, "not-a-token") is None
+    assert (introspector.hits, introspector.misses) == (1, 2)
+    assert introspector.stats()["size"] == 1
+
+    # Revocation still applies to cached tokens
+    monkeypatch.setattr(revocations, "is_revoked", lambda payload: True)
+    assert introspector.decode(strategy, token) is None
+
+
+def test_cache_entries_end_with_the_token_or_the_ttl():
+    strategy = LoginJWTStrategy(SECRET, 60)
+    introspector = TokenIntrospector()
+    introspector.ttl = 0.0
+    token = token_for(strategy, uuid.uuid4())
+    introspector.decode(strategy, token)
+    introspector.decode(strategy, token)
+    assert introspector.hits == 0
+
+    introspector.ttl = 60.0
+    introspector.max_size = 1
+    first = token_for(strategy, uuid.uuid4())
+    second = token_for(strategy, uuid.uuid4())
+    introspector.decode(strategy, first)
+    introspector.decode(strategy, second)
+    assert introspector.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_introspect_loads_all_users_with_one_query(users):
+    strategy = LoginJWTStrategy(SECRET, 60)
+    introspector = TokenIntrospector()
+    active, inactive = users
+    tokens = [
+        token_for(strategy, active.id),
+        "garbage",
+        token_for(strategy, inactive.id),
+        token_for(strategy, uuid.uuid4()),
+        token_for(strategy, active.id),
+    ]
+
+    results = await introspector.introspect(strategy, tokens)
+
+    assert [r.valid for r in results] == [True, False, True, False, True]
+    assert results[0].user_id == active.id
+    assert (results[0].is_active, results[2].is_active) == (True, False)
+    assert results[0].expires_at is not None
+    assert introspector.user_queries == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_users_need_no_query(users):
+    strategy = LoginJWTStrategy(SECRET, 60)
+    introspector = TokenIntrospector()
+    user_cache.put(users[0])
+
+    (result,) = await introspector.introspect(
+        strategy, [token_for(strategy, users[0].id)]
+    )
+
+    assert result.valid and result.is_active
+    assert introspector.user_queries == 0
+
+
+def test_callers_must_present_the_client_secret():
+    introspector = TokenIntrospector()
+    assert not introspector.authenticate("anything")
+    introspector.client_secret = "client-secret"
+    assert not introspector.authenticate(None)
+    assert not introspector.authenticate("wrong")
+    assert introspector.authenticate("client-secret")
@@ -0,0 +1,111 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from login.keys import KeySet, generate_key, get_jwks_router, load_key
+from login.responses import etag_for
+from login.strategy import LoginJWTStrategy
+
+
+def retire(path):
+    """Replace a private key file with its public key."""
+    public_key = load_key(path, "RS256").public_key
+    path.write_bytes(
+        public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+async def test_tokens_are_signed_with_active_kid(tmp_path, algorithm, make_user):
+    generate_key(tmp_path, "2026-01", algorithm)
+    key_set = KeySet.load(tmp_path, algorithm)
+    strategy = LoginJWTStrategy("unused", 60, key_set=key_set)
+    user = make_user()
+
+    token = await strategy.write_token(user)
+
+    assert jwt.get_unverified_header(token) == {
+        "alg": algorithm,
+        "kid": "2026-01",
+        "typ": "JWT",
+    }
+    assert strategy.decode(token)["sub"] == str(user.id)
+
+
+@pytest.mark.asyncio
+async def test_rotation_keeps_old_tokens_valid(tmp_path, make_user):
+    old_path = generate_key(tmp_path, "2026-01")
+    old_keys = KeySet.load(tmp_path, "RS256")
+    old_token = await LoginJWTStrategy("unused", 60, key_set=old_keys).write_token(
+        make_user()
+    )
+
+    generate_key(tmp_path, "2026-02")
+    retire(old_path)
+    key_set = KeySet.load(tmp_path, "RS256")
+    strategy = LoginJWTStrategy("unused", 60, key_set=key_set)
+
+    assert key_set.active.kid == "2026-02"
+    assert strategy.decode(old_token) is not None
+    new_token = await strategy.write_token(make_user())
+    assert jwt.get_unverified_header(new_token)["kid"] == "2026-02"
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_is_rejected(tmp_path, make_user):
+    other = tmp_path / "other"
+    other.mkdir()
+    generate_key(other, "foreign")
+    foreign = LoginJWTStrategy("unused", 60, key_set=KeySet.load(other, "RS256"))
+    token = await foreign.write_token(make_user())
+
+    generate_key(tmp_path, "ours")
+    strategy = LoginJWTStrategy("unused", 60, key_set=KeySet.load(tmp_path, "RS256"))
+    assert strategy.decode(token) is None
+
+
+def test_key_type_must_match_algorithm(tmp_path):
+    generate_key(tmp_path, "ed", "EdDSA")
+    with pytest.raises(ValueError):
+        KeySet.load(tmp_path, "RS256")
+
+
+def test_active_kid_needs_private_key(tmp_path):
+    retire(generate_key(tmp_path, "retired"))
+    with pytest.raises(ValueError):
+        KeySet.load(tmp_path, "RS256")
+
+
+def test_jwks_endpoint_is_cacheable(tmp_path):
+    generate_key(tmp_path, "2026-01")
+    generate_key(tmp_path, "2026-02", "RS256")
+    app = FastAPI()
+    app.include_router(get_jwks_router(KeySet.load(tmp_path, "RS256"), max_age=600))
+    client = TestClient(app)
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert [key["kid"] for key in response.json()["keys"]] == ["2026-01", "2026-02"]
+    assert all("d" not in key for key in response.json()["keys"])
+    assert response.headers["cache-control"] == "public, max-age=600"
+
+    etag = response.headers["etag"]
+    assert etag == etag_for(response.content)
+    cached = client.get("/.well-known/jwks.json", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    for if_none_match in (f'"other", W/{etag}', "*"):
+        headers = {"If-None-Match": if_none_match}
+        assert client.get("/.well-known/jwks.json", headers=headers).status_code == 304
+
+
+def test_hmac_deployments_publish_no_keys():
+    app = FastAPI()
+    app.include_router(get_jwks_router(None, max_age=600))
+    assert TestClient(app).get("/.well-known/jwks.json").json() == {"keys": []}
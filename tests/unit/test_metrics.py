@@ -0,0 +1,81 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from login import metrics
+from login.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("op_seconds", "Op time.", ("op",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5.0, "a")
+
+    assert histogram.render() == [
+        'op_seconds_bucket{op="a",le="0.1"} 1',
+        'op_seconds_bucket{op="a",le="1.0"} 2',
+        'op_seconds_bucket{op="a",le="+Inf"} 3',
+        'op_seconds_sum{op="a"} 5.55',
+        'op_seconds_count{op="a"} 3',
+    ]
+
+
+def test_registry_renders_help_type_and_escaped_labels():
+    registry = Registry()
+    counter = registry.register(Counter("hits_total", "Hits.", ("path",)))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+
+    assert registry.render() == (
+        "# HELP hits_total Hits.\n"
+        "# TYPE hits_total counter\n"
+        'hits_total{path="/a\\"b"} 3\n'
+    )
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {}
+
+    client = TestClient(app)
+    before = metrics.HTTP_REQUESTS.value("GET", "/items/{item_id}", "200")
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nowhere")
+
+    assert metrics.HTTP_REQUESTS.value("GET", "/items/{item_id}", "200") == before + 2
+    assert metrics.HTTP_REQUESTS.value("GET", "<unmatched>", "404") >= 1
+    assert metrics.HTTP_DURATION.count("GET", "/items/{item_id}") >= 2
+
+
+@pytest.mark.asyncio
+async def test_engine_instrumentation(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'm.db'}")
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(engine)
+    queries = metrics.DB_QUERY.count("SELECT")
+    acquired = metrics.DB_ACQUIRE.count()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+    assert metrics.DB_QUERY.count("SELECT") == queries + 1
+    assert metrics.DB_ACQUIRE.count() == acquired + 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_timed_hook_records_by_name():
+    @metrics.timed_hook
+    async def on_after_test(value):
+        return value
+
+    assert await on_after_test(3) == 3
+    assert metrics.HOOK_DURATION.count("on_after_test") == 1
@@ -0,0 +1,136 @@
+import asyncio
+import email
+from email import policy
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.stub_smtp import StubSMTPServer
+from login.email_utils import SMTPConfig
+from login.outbox import EmailOutbox
+
+
+def ok_sender(messages):
+    return [True] * len(messages)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_before_start_is_delivered():
+    sender = MagicMock(side_effect=ok_sender)
+    outbox = EmailOutbox(sender=sender)
+    assert outbox.enqueue("a@example.com", "Subject", "Body")
+    assert outbox.stats()["queue_depth"] == 1
+
+    await outbox.start()
+    await outbox.stop()
+
+    (messages,) = sender.call_args.args
+    assert messages[0]["To"] == "a@example.com"
+    assert messages[0]["Subject"] == "Subject"
+    stats = outbox.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["sent"] == 1
+    assert stats["send_latency_max_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_enqueue_drops_when_full():
+    outbox = EmailOutbox(sender=ok_sender)
+    outbox.max_size = 1
+    assert outbox.enqueue("a@example.com", "S", "B")
+    assert not outbox.enqueue("b@example.com", "S", "B")
+    assert outbox.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_retried_with_backoff():
+    sender = MagicMock(side_effect=[[False], [True]])
+    outbox = EmailOutbox(sender=sender)
+    outbox.retry_backoff = 0.01
+    await outbox.start()
+    outbox.enqueue("a@example.com", "S", "B")
+    for _ in range(100):
+        if outbox.stats()["sent"]:
+            break
+        await asyncio.sleep(0.01)
+    await outbox.stop()
+
+    assert sender.call_count == 2
+    stats = outbox.stats()
+    assert stats["retried"] == 1
+    assert stats["sent"] == 1
+    assert stats["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    sender = MagicMock(side_effect=RuntimeError("relay down"))
+    outbox = EmailOutbox(sender=sender)
+    outbox.max_retries = 1
+    outbox.retry_backoff = 60
+    await outbox.start()
+    outbox.enqueue("a@example.com", "S", "B")
+    for _ in range(100):
+        if outbox.stats()["retry_pending"]:
+            break
+        await asyncio.sleep(0.01)
+    # Shutdown flushes the pending retry instead of waiting out the backoff.
+    await outbox.stop()
+
+    assert sender.call_count == 2
+    assert outbox.stats()["failed"] == 1
+    assert not outbox.running
+
+
+@pytest.mark.asyncio
+async def test_malformed_message_fails_without_stopping_the_worker():
+    sender = MagicMock(side_effect=ok_sender)
+    outbox = EmailOutbox(sender=sender)
+    outbox.concurrency = 1
+    await outbox.start()
+    outbox.enqueue("a@example.com\nBcc: x@example.com", "S", "B")
+    for _ in range(100):
+        if outbox.stats()["failed"]:
+            break
+        await asyncio.sleep(0.01)
+    outbox.enqueue("b@example.com", "S", "B")
+    await outbox.stop()
+
+    (messages,) = sender.call_args.args
+    assert [m["To"] for m in messages] == ["b@example.com"]
+    stats = outbox.stats()
+    assert stats["failed"] == 1
+    assert stats["sent"] == 1
+    assert stats["retried"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_messages_are_batched_over_pooled_session():
+    with StubSMTPServer() as server:
+        outbox = EmailOutbox()
+        outbox.concurrency = 1
+        outbox.smtp_config = SMTPConfig(host=server.host, port=server.port)
+        for i in range(5):
+            outbox.enqueue(f"to{i}@example.com", "S", "B")
+        await outbox.start()
+        await outbox.stop()
+
+    assert len(server.state.messages) == 5
+    assert server.state.connections == 1
+    assert outbox.stats()["sent"] == 5
+
+
+@pytest.mark.asyncio
+async def test_html_is_delivered_as_an_alternative():
+    with StubSMTPServer() as server:
+        outbox = EmailOutbox()
+        outbox.smtp_config = SMTPConfig(host=server.host, port=server.port)
+        outbox.enqueue("a@example.com", "S", "Text body", "<p>HTML body</p>")
+        await outbox.start()
+        await outbox.stop()
+
+    (received,) = server.state.messages
+    message = email.message_from_bytes(received.data, policy=policy.default)
+    assert message.get_content_type() == "multipart/alternative"
+    assert message.get_body(("plain",)).get_content().strip() == "Text body"
+    assert message.get_body(("html",)).get_content().strip() == "<p>HTML body</p>"
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import pytest
+
+from login.password import ExecutorPasswordHelper, HashPolicy
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["thread", "process", "inline"])
+async def test_hash_and_verify_roundtrip(mode):
+    helper = ExecutorPasswordHelper(mode=mode, max_workers=1)
+    try:
+        hashed = await helper.hash_async("s3cret")
+        verified, updated = await helper.verify_and_update_async("s3cret", hashed)
+        assert verified is True
+        assert updated is None
+        wrong, _ = await helper.verify_and_update_async("nope", hashed)
+        assert wrong is False
+    finally:
+        helper.shutdown()
+    assert helper.stats()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_off_the_event_loop_thread():
+    helper = ExecutorPasswordHelper(max_workers=1)
+    seen = []
+    helper.hash = lambda password: seen.append(threading.current_thread()) or "x"
+    await helper.hash_async("pw")
+    helper.shutdown()
+    assert seen[0] is not threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_hashes_are_capped():
+    helper = ExecutorPasswordHelper(max_workers=4, max_in_flight=1)
+    release = threading.Event()
+
+    def slow_hash(password):
+        release.wait(5)
+        return password
+
+    helper.hash = slow_hash
+    tasks = [asyncio.create_task(helper.hash_async(str(i))) for i in range(3)]
+    await asyncio.sleep(0.05)
+    stats = helper.stats()
+    assert stats["in_flight"] == 1
+    assert stats["waiting"] == 2
+
+    release.set()
+    assert await asyncio.gather(*tasks) == ["0", "1", "2"]
+    helper.shutdown()
+    assert helper.stats()["waiting"] == 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ExecutorPasswordHelper(mode="gpu")
+
+
+CHEAP = HashPolicy(time_cost=1, memory_kib=1024, parallelism=1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "process"])
+async def test_hashes_use_the_policy_parameters(mode):
+    helper = ExecutorPasswordHelper(mode=mode, max_workers=1, policy=CHEAP)
+    try:
+        hashed = await helper.hash_async("s3cret")
+    finally:
+        helper.shutdown()
+    assert "$m=1024,t=1,p=1$" in hashed
+
+
+@pytest.mark.asyncio
+async def test_old_parameters_are_rehashed_on_login():
+    old = ExecutorPasswordHelper(mode="inline", policy=CHEAP).hash("s3cret")
+    helper = ExecutorPasswordHelper(
+        mode="inline", policy=HashPolicy(time_cost=2, memory_kib=2048, parallelism=1)
+    )
+    verified, updated = await helper.verify_and_update_async("s3cret", old)
+    assert verified is True
+    assert "$m=2048,t=2,p=1$" in updated
+    assert helper.stats()["rehashed"] == 1
+
+    _, current = await helper.verify_and_update_async("s3cret", updated)
+    assert current is None
+
+
+@pytest.mark.asyncio
+async def test_rehash_can_be_turned_off():
+    old = ExecutorPasswordHelper(mode="inline", policy=CHEAP).hash("s3cret")
+    helper = ExecutorPasswordHelper(
+        mode="inline",
+        policy=HashPolicy(time_cost=2, memory_kib=2048, rehash_on_login=False),
+    )
+    assert await helper.verify_and_update_async("s3cret", old) == (True, None)
+    assert await helper.verify_and_update_async("wrong", old) == (False, None)
+    assert helper.stats()["rehashed"] == 0
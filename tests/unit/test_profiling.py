@@ -0,0 +1,91 @@
+import json
+import time
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from login.metrics import Histogram
+from login.profiling import ProfilingMiddleware, RequestProfiler
+
+WORK = Histogram("test_work_seconds", "Work.", phase="work")
+
+
+def make_client(profiler):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/slow/{item}")
+    def slow(item: str):
+        started = time.perf_counter()
+        time.sleep(0.05)
+        WORK.observe(time.perf_counter() - started)
+        return {}
+
+    @app.get("/fast")
+    async def fast():
+        return {}
+
+    return TestClient(app)
+
+
+def make_profiler(tmp_path, **overrides):
+    profiler = RequestProfiler()
+    profiler.directory = tmp_path
+    profiler.threshold = 0.03
+    profiler.interval = 0.001
+    for name, value in overrides.items():
+        setattr(profiler, name, value)
+    return profiler
+
+
+def test_slow_request_writes_folded_stacks_and_phases(tmp_path):
+    profiler = make_profiler(tmp_path)
+    profiler.start()
+    try:
+        client = make_client(profiler)
+        client.get("/fast")
+        client.get("/slow/1")
+    finally:
+        profiler.stop()
+
+    [folded] = tmp_path.glob("*.folded")
+    assert "GET-slow_item" in folded.name
+    lines = folded.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("test_profiling.py:slow" in line for line in lines)
+
+    record = json.loads(folded.with_suffix(".json").read_text())
+    assert record["route"] == "/slow/{item}"
+    assert record["duration_ms"] >= 50
+    assert record["phases_ms"]["work"] >= 50
+    assert set(record["phases_ms"]) == {"work", "other"}
+
+
+def test_sample_rate_keeps_fast_requests(tmp_path):
+    profiler = make_profiler(tmp_path, sample_rate=1.0)
+    profiler.start()
+    try:
+        make_client(profiler).get("/fast")
+    finally:
+        profiler.stop()
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_not_started_profiler_passes_through(tmp_path):
+    profiler = make_profiler(tmp_path, threshold=0.0)
+    assert make_client(profiler).get("/slow/1").status_code == 200
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_only_newest_profiles_are_kept(tmp_path):
+    profiler = make_profiler(tmp_path, max_files=2)
+    record = {"method": "GET", "route": "/x", "started_at": time.time()}
+    for _ in range(3):
+        profiler.write(record, Counter({"MainThread;a.py:f": 1}))
+
+    assert sorted(p.name.split("-")[1] for p in tmp_path.glob("*.folded")) == [
+        "000001",
+        "000002",
+    ]
+    assert len(list(tmp_path.glob("*.json"))) == 2
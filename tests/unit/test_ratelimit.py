@@ -0,0 +1,193 @@
+import pytest
+from fastapi import FastAPI, Form
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from login.ratelimit import (
+    MemoryBackend,
+    RateLimitBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    account_from_body,
+    load_backend,
+)
+
+
+class Email(BaseModel):
+    email: str
+
+
+def make_client(ip_per_minute=100, account_per_minute=100):
+    limiter = RateLimiter()
+    limiter.ip_per_minute = ip_per_minute
+    limiter.account_per_minute = account_per_minute
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.post("/auth/jwt/login")
+    async def login(username: str = Form(), password: str = Form()):
+        return {"username": username}
+
+    @app.post("/auth/forgot-password")
+    async def forgot(payload: Email):
+        return {"email": payload.email}
+
+    @app.post("/other")
+    async def other():
+        return {}
+
+    return TestClient(app), limiter
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("login.ratelimit.time.monotonic", lambda: now[0])
+    backend = MemoryBackend()
+
+    assert await backend.hit("k", 2) == 0
+    assert await backend.hit("k", 2) == 0
+    assert await backend.hit("k", 2) == pytest.approx(30)
+    now[0] += 30
+    assert await backend.hit("k", 2) == 0
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_bucket_is_dropped():
+    backend = MemoryBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        await backend.hit(key, 1)
+    assert await backend.hit("a", 1) == 0
+    assert await backend.hit("c", 1) > 0
+
+
+def test_ip_limit_returns_429_before_the_route():
+    client, limiter = make_client(ip_per_minute=2)
+    for _ in range(2):
+        response = client.post(
+            "/auth/forgot-password", json={"email": f"{_}@example.com"}
+        )
+        assert response.status_code == 200
+    response = client.post("/auth/forgot-password", json={"email": "x@example.com"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    assert limiter.stats()["limited_ip"] == 1
+
+
+def test_account_limit_and_body_replay():
+    client, limiter = make_client(account_per_minute=1)
+    data = {"username": "Victim@Example.com", "password": "guess"}
+    response = client.post("/auth/jwt/login", data=data)
+    assert response.json() == {"username": "Victim@Example.com"}
+
+    data["username"] = "victim@example.com"
+    assert client.post("/auth/jwt/login", data=data).status_code == 429
+    data["username"] = "other@example.com"
+    assert client.post("/auth/jwt/login", data=data).status_code == 200
+    assert limiter.stats() == {
+        "enabled": True,
+        "allowed": 2,
+        "limited_ip": 0,
+        "limited_account": 1,
+        "rejected_oversized": 0,
+        "rejected_unsupported": 0,
+    }
+
+
+def test_oversized_credential_bodies_are_refused():
+    client, limiter = make_client(account_per_minute=1)
+    padded = {"username": "victim@example.com", "password": "x" * 20_000}
+    for _ in range(3):
+        response = client.post("/auth/jwt/login", data=padded)
+        assert response.status_code == 413
+    assert limiter.stats()["rejected_oversized"] == 3
+    assert limiter.stats()["allowed"] == 0
+
+
+def test_account_limit_ignores_how_the_body_is_labelled():
+    client, limiter = make_client(account_per_minute=1)
+    data = {"username": "victim@example.com", "password": "guess"}
+    assert client.post("/auth/jwt/login", data=data).status_code == 200
+    multipart = client.post("/auth/jwt/login", data=data, files={"unused": ("f", b"")})
+    assert multipart.status_code == 429
+    mixed_case = client.post(
+        "/auth/jwt/login",
+        content=b"username=Victim%40example.com&password=guess",
+        headers={"Content-Type": "Application/X-WWW-Form-Urlencoded; charset=UTF-8"},
+    )
+    assert mixed_case.status_code == 429
+    assert limiter.stats()["limited_account"] == 2
+
+
+def test_unreadable_credential_bodies_are_refused():
+    client, limiter = make_client()
+    response = client.post(
+        "/auth/jwt/login",
+        content=b"username=victim@example.com",
+        headers={"Content-Type": "text/plain"},
+    )
+    assert response.status_code == 415
+    assert limiter.stats()["rejected_unsupported"] == 1
+    assert limiter.stats()["allowed"] == 0
+
+
+def test_other_paths_and_disabled_limiter_pass_through():
+    client, limiter = make_client(ip_per_minute=1)
+    assert client.post("/other").status_code == 200
+    assert client.post("/other").status_code == 200
+    limiter.enabled = False
+    for _ in range(3):
+        response = client.post("/auth/forgot-password", json={"email": "a@b.com"})
+        assert response.status_code == 200
+
+
+def test_client_ip_skips_trusted_proxy_hops_from_the_right():
+    limiter = RateLimiter()
+    scope = {
+        "client": ("10.0.0.2", 1),
+        "headers": [
+            (b"x-forwarded-for", b"6.6.6.6, 1.2.3.4"),
+            (b"x-forwarded-for", b"10.0.0.1"),
+        ],
+    }
+    assert limiter.client_ip(scope) == "10.0.0.2"
+
+    limiter.trust_forwarded = True
+    assert limiter.client_ip(scope) == "10.0.0.1"
+    limiter.forwarded_hops = 2
+    assert limiter.client_ip(scope) == "1.2.3.4"
+    limiter.forwarded_hops = 5
+    assert limiter.client_ip(scope) == "6.6.6.6"
+    assert limiter.client_ip({"client": None, "headers": []}) == "unknown"
+
+
+def test_account_from_body():
+    form = "application/x-www-form-urlencoded"
+    assert account_from_body(b"username=A%40b.com&password=x", form) == "a@b.com"
+    assert account_from_body(b'{"email": "A@b.com"}', "application/json") == "a@b.com"
+    assert account_from_body(b"[1]", "application/json") is None
+    assert account_from_body(b"{", "application/json") is None
+    assert account_from_body(b"x", "text/plain") is None
+    json_api = "Application/Vnd.Api+JSON"
+    assert account_from_body(b'{"email": "a@b.com"}', json_api) == "a@b.com"
+    multipart = "multipart/form-data; boundary=xyz"
+    body = (
+        b"--xyz\r\n"
+        b'Content-Disposition: form-data; name="username"\r\n\r\n'
+        b"A@b.com\r\n"
+        b"--xyz--\r\n"
+    )
+    assert account_from_body(body, multipart) == "a@b.com"
+    assert account_from_body(b"garbage", multipart) is None
+
+
+def test_shared_backend_is_loaded_by_path():
+    assert isinstance(load_backend("login.ratelimit:MemoryBackend"), MemoryBackend)
+
+
+def test_backends_must_implement_hit():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,109 @@
+import asyncio
+import socket
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.stub_smtp import StubSMTPServer
+from login.readiness import ReadinessProbe, ping_database, ping_smtp
+
+
+async def ok():
+    pass
+
+
+async def down():
+    raise ConnectionRefusedError("connection refused")
+
+
+async def hangs():
+    await asyncio.sleep(10)
+
+
+def probe_with(**checks):
+    probe = ReadinessProbe()
+    probe.checks = checks
+    probe.required = {"database"}
+    probe.timeout = 0.05
+    return probe
+
+
+@pytest.mark.asyncio
+async def test_not_ready_until_the_first_probe():
+    probe = probe_with(database=ok)
+    assert not probe.ready
+    assert probe.state()["status"] == "not_ready"
+    await probe.probe()
+    assert probe.ready
+    assert probe.state()["checks"]["database"]["ok"]
+
+
+@pytest.mark.asyncio
+async def test_only_required_checks_decide_readiness():
+    probe = probe_with(database=ok, smtp=down)
+    await probe.probe()
+    state = probe.state()
+    assert state["status"] == "ready"
+    assert state["checks"]["smtp"] == {
+        "ok": False,
+        "latency_ms": state["checks"]["smtp"]["latency_ms"],
+        "error": "connection refused",
+        "required": False,
+    }
+
+    probe.checks["database"] = down
+    await probe.probe()
+    assert not probe.ready
+    assert probe.failures == 3
+
+
+@pytest.mark.asyncio
+async def test_checks_are_bounded_by_the_timeout():
+    probe = probe_with(database=hangs)
+    await asyncio.wait_for(probe.probe(), 1)
+    assert not probe.ready
+    assert probe.results["database"].error == "TimeoutError"
+
+
+@pytest.mark.asyncio
+async def test_stale_results_are_not_ready():
+    probe = probe_with(database=ok)
+    await probe.probe()
+    probe.checked_at -= probe.interval * 4
+    assert not probe.ready
+
+
+@pytest.mark.asyncio
+async def test_background_task_probes_until_stopped():
+    probe = probe_with(database=ok)
+    probe.interval = 0.01
+    await probe.start()
+    await asyncio.sleep(0.05)
+    assert probe.ready
+    assert probe.probes >= 2
+    await probe.stop()
+    assert not probe.ready
+
+
+@pytest.mark.asyncio
+async def test_ping_database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ready.db'}")
+    await ping_database(engine)
+    await engine.dispose()
+    with pytest.raises(RuntimeError):
+        await ping_database(None)
+
+
+@pytest.mark.asyncio
+async def test_ping_smtp_reads_the_greeting():
+    with StubSMTPServer() as smtp:
+        await ping_smtp(smtp.host, smtp.port)
+        await asyncio.sleep(0.05)
+        assert smtp.state.connections == 1
+        assert smtp.state.messages == []
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(OSError):
+        await ping_smtp("127.0.0.1", port)
@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb.models import Base, User
+
+from login.refresh import RefreshTokenStore
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'refresh.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_user(session):
+    user_id = uuid.uuid4()
+    session.add(
+        User(
+            id=user_id,
+            email=f"{user_id.hex[:8]}@example.com",
+            hashed_password="hash",
+            user_id_str=str(user_id),
+        )
+    )
+    await session.commit()
+    return user_id
+
+
+@pytest.mark.asyncio
+async def test_rotate_issues_successor(session_maker):
+    store = RefreshTokenStore()
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        token = await store.issue(session, user_id)
+        await session.commit()
+
+        rotated = await store.rotate(session, token)
+        assert rotated is not None
+        assert rotated.user_id == user_id
+        assert await store.rotate(session, rotated.token) is not None
+
+
+@pytest.mark.asyncio
+async def test_replay_revokes_family(session_maker):
+    store = RefreshTokenStore()
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        token = await store.issue(session, user_id)
+        await session.commit()
+        successor = (await store.rotate(session, token)).token
+
+        assert await store.rotate(session, token) is None
+        assert await store.rotate(session, successor) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_and_unknown_tokens_are_rejected(session_maker):
+    store = RefreshTokenStore(lifetime_seconds=-1)
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        token = await store.issue(session, user_id)
+        await session.commit()
+
+        assert await store.rotate(session, token) is None
+        assert await store.rotate(session, "unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_revoke_user(session_maker):
+    store = RefreshTokenStore()
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        token = await store.issue(session, user_id)
+        await store.revoke_user(session, user_id)
+        await session.commit()
+
+        assert await store.rotate(session, token) is None
+
+
+@pytest.mark.asyncio
+async def test_revoke_family(session_maker):
+    store = RefreshTokenStore()
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        family_id = uuid.uuid4()
+        token = await store.issue(session, user_id, family_id)
+        other = await store.issue(session, user_id)
+        await store.revoke_family(session, family_id)
+        await session.commit()
+
+        assert await store.rotate(session, token) is None
+        assert await store.rotate(session, other) is not None
@@ -0,0 +1,20 @@
+import uuid
+
+from login.responses import FastJSONResponse, etag_for, etag_matches
+
+
+def test_fast_json_response_renders_compact_json():
+    user_id = uuid.uuid4()
+    response = FastJSONResponse({"id": user_id, "name": "é"})
+    assert response.body == f'{{"id":"{user_id}","name":"é"}}'.encode()
+    assert response.media_type == "application/json"
+
+
+def test_etag_matches():
+    etag = etag_for(b"body")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
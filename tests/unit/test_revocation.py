@@ -0,0 +1,109 @@
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from userdb.models import Base, User
+
+from login.models import ClaimsCutoff
+from login.revocation import RevocationList
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'revoke.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_user(session):
+    user_id = uuid.uuid4()
+    session.add(
+        User(
+            id=user_id,
+            email=f"{user_id.hex[:8]}@example.com",
+            hashed_password="hash",
+            user_id_str=str(user_id),
+        )
+    )
+    await session.commit()
+    return user_id
+
+
+@pytest.mark.asyncio
+async def test_revoked_jti_is_rejected_locally(session_maker):
+    revocations = RevocationList()
+    async with session_maker() as session:
+        await revocations.revoke(session, "abc", int(time.time()) + 60)
+        await session.commit()
+
+    assert revocations.is_revoked({"jti": "abc", "sub": "x", "iat": time.time()})
+    assert not revocations.is_revoked({"jti": "def", "sub": "x"})
+    assert revocations.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_other_workers_pick_up_changes_incrementally(session_maker):
+    writer, reader = RevocationList(), RevocationList()
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        await reader.sync(session)
+        issued = time.time()
+
+        await writer.revoke(session, "abc", int(time.time()) + 60)
+        await writer.revoke_user(session, user_id)
+        await session.commit()
+        assert not reader.is_revoked({"jti": "abc"})
+
+        await reader.sync(session)
+
+    assert reader.is_revoked({"jti": "abc"})
+    assert reader.is_revoked({"sub": str(user_id), "iat": issued})
+    assert not reader.is_revoked({"sub": str(user_id), "iat": time.time()})
+    assert reader.stats()["syncs"] == 2
+
+
+@pytest.mark.asyncio
+async def test_claims_cutoffs_reach_other_workers(session_maker):
+    writer, reader = RevocationList(), RevocationList()
+    user_id = uuid.uuid4()
+    async with session_maker() as session:
+        await reader.sync(session)
+        issued = time.time()
+        await writer.expire_claims(session, user_id)
+        await session.commit()
+        assert not reader.claims_stale(user_id, issued)
+
+        await reader.sync(session)
+
+    assert reader.claims_stale(user_id, issued)
+    assert not reader.claims_stale(user_id, time.time())
+    assert not reader.is_revoked({"sub": str(user_id), "iat": issued})
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_pruned(session_maker):
+    revocations = RevocationList()
+    revocations.token_lifetime = 60
+    async with session_maker() as session:
+        user_id = await add_user(session)
+        await revocations.revoke(session, "old", int(time.time()) - 1)
+        await revocations.revoke_user(session, user_id, not_before=time.time() - 120)
+        await session.merge(
+            ClaimsCutoff(
+                user_id=user_id, not_before=time.time() - 120, updated_at=time.time()
+            )
+        )
+        await session.commit()
+        await revocations.sync(session)
+
+        fresh = RevocationList()
+        await fresh.sync(session)
+
+    for state in (revocations, fresh):
+        assert state.stats()["revoked_tokens"] == 0
+        assert state.stats()["user_cutoffs"] == 0
+        assert state.stats()["claims_cutoffs"] == 0
@@ -0,0 +1,106 @@
+from unittest.mock import ANY, MagicMock
+
+import pytest
+from sqlalchemy import text
+from userdb import db
+
+from login import main
+from login.config import Settings
+from login.server import (
+    ServerOptions,
+    Supervisor,
+    available_cpus,
+    cpu_quota,
+    default_workers,
+)
+
+
+def test_cpu_quota_reads_cgroup_v2(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cpu_quota(tmp_path) == 1.5
+
+
+def test_cpu_quota_reads_cgroup_v1(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cpu_quota(tmp_path) == 2.0
+
+
+def test_cpu_quota_is_none_when_unlimited(tmp_path):
+    assert cpu_quota(tmp_path) is None
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cpu_quota(tmp_path) is None
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "cpu.max").unlink()
+    assert cpu_quota(tmp_path) is None
+
+
+def test_available_cpus_is_capped_by_the_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False)
+    assert available_cpus(tmp_path) == 4
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    assert available_cpus(tmp_path) == 0.5
+
+
+@pytest.mark.parametrize(("cpus", "workers"), [(0.5, 1), (1.5, 1), (2.0, 2), (8, 8)])
+def test_default_workers(cpus, workers):
+    assert default_workers(cpus) == workers
+
+
+def test_server_options_from_settings(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+    monkeypatch.setenv("SERVER_WORKERS", "3")
+    monkeypatch.setenv("SERVER_KEEPALIVE_SECONDS", "90")
+    options = ServerOptions.from_settings(Settings())
+    assert (options.workers, options.keepalive, options.port) == (3, 90.0, 8001)
+
+    monkeypatch.setenv("SERVER_WORKERS", "0")
+    monkeypatch.setattr("login.server.available_cpus", lambda: 2.5)
+    assert ServerOptions.from_settings(Settings()).workers == 2
+
+
+def test_uvicorn_config_applies_the_options():
+    options = ServerOptions(keepalive=75.0, backlog=512, graceful_timeout=10.0)
+    config = options.uvicorn_config(object())
+    assert config.timeout_keep_alive == 75
+    assert config.backlog == 512
+    assert config.timeout_graceful_shutdown == 10
+    assert (config.loop, config.http) == ("asyncio", "h11")
+
+
+def test_restarted_worker_takes_over_its_slot(monkeypatch):
+    pids = iter([101, 102, 103])
+    exits = iter([(101, 256)])
+
+    def wait():
+        try:
+            return next(exits)
+        except StopIteration:
+            raise ChildProcessError from None
+
+    monkeypatch.setattr("login.server.os.fork", lambda: next(pids))
+    monkeypatch.setattr("login.server.os.wait", wait)
+    monkeypatch.setattr("login.server.signal.signal", lambda *args: None)
+    monkeypatch.setattr("login.server.MIN_WORKER_LIFETIME", 0)
+    supervisor = Supervisor(object(), MagicMock(), ServerOptions(workers=2))
+
+    supervisor.run()
+
+    assert supervisor.children == {102: (1, ANY), 103: (0, ANY)}
+
+
+@pytest.mark.asyncio
+async def test_workers_open_the_database_without_bootstrapping(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'w.db'}")
+    monkeypatch.setattr(main, "database_bootstrapped", True)
+    monkeypatch.setattr(main.db, "lifespan", MagicMock(side_effect=AssertionError))
+    monkeypatch.setattr(db.DBState, "engine", None)
+    monkeypatch.setattr(db.DBState, "async_session_maker", None)
+
+    async with main.open_database(Settings()):
+        async with db.DBState.async_session_maker() as session:
+            pragma = await session.execute(text("PRAGMA foreign_keys"))
+            assert pragma.scalar() == 1
@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+import pytest
+
+from login.auth import UserManager, get_jwt_strategy
+from login.config import Settings
+from login.password import password_helper
+from login.services import Services, services
+
+SECRET = "services-test-secret-with-enough-bytes"
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", SECRET)
+    monkeypatch.setenv("JWT_EMBED_CLAIMS", "True")
+    monkeypatch.setenv("RESET_PASSWORD_SECRET", "reset-secret")
+    monkeypatch.setenv("SMTP_HOST", "smtp.services.test")
+    return Settings()
+
+
+def test_configure_builds_collaborators_once(settings):
+    container = Services()
+    container.configure(settings)
+
+    assert container.settings is settings
+    assert container.strategy is container.strategy
+    assert container.strategy.embed_claims
+    assert container.strategy.encode_key == SECRET
+    assert container.signing_keys is None
+    assert container.smtp_config.host == "smtp.services.test"
+    assert container.password_helper is password_helper
+
+
+def test_settings_are_read_from_the_environment_once(settings):
+    container = Services()
+    with patch("login.services.Settings", return_value=settings) as build_settings:
+        assert container.strategy.embed_claims
+        assert container.settings is settings
+    build_settings.assert_called_once()
+
+    container.reset()
+    with patch("login.services.Settings", return_value=settings) as build_settings:
+        assert container.smtp_config.host == "smtp.services.test"
+    build_settings.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_dependencies_share_the_configured_objects(settings):
+    services.configure(settings)
+    try:
+        assert await get_jwt_strategy() is await get_jwt_strategy()
+        manager = UserManager(None)
+        assert manager.settings is settings
+        assert manager.reset_password_token_secret == "reset-secret"
+    finally:
+        services.reset()
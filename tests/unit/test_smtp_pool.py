@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from benchmarks.stub_smtp import StubSMTPServer
+from login.email_utils import SMTPConfig, build_message
+from login.smtp_pool import SMTPConnectionPool
+
+
+@pytest.fixture
+def smtp_server():
+    with StubSMTPServer() as server:
+        yield server
+
+
+def make_pool(server, **kwargs):
+    config = SMTPConfig(
+        host=server.host, port=server.port, user="user@test.com", password="pw"
+    )
+    return SMTPConnectionPool(config, **kwargs)
+
+
+def make_messages(config, count):
+    return [
+        build_message(config, f"to{i}@example.com", "Subject", f"Body {i}")
+        for i in range(count)
+    ]
+
+
+def test_batch_is_sent_over_one_session(smtp_server):
+    pool = make_pool(smtp_server)
+    results = pool.send_messages(make_messages(pool.config, 3))
+
+    assert results == [True, True, True]
+    assert smtp_server.state.connections == 1
+    assert smtp_server.state.logins == 1
+    assert [m.rcpt_to for m in smtp_server.state.messages] == [
+        ["to0@example.com"],
+        ["to1@example.com"],
+        ["to2@example.com"],
+    ]
+    assert smtp_server.state.messages[0].mail_from == "user@test.com"
+    pool.close()
+
+
+def test_session_is_reused_across_batches(smtp_server):
+    pool = make_pool(smtp_server)
+    pool.send_messages(make_messages(pool.config, 1))
+    pool.send_messages(make_messages(pool.config, 1))
+
+    assert smtp_server.state.connections == 1
+    assert pool.stats()["reused"] == 1
+    pool.close()
+
+
+def test_reconnects_when_session_drops(smtp_server):
+    smtp_server.state.disconnect_after = 2
+    pool = make_pool(smtp_server)
+    results = pool.send_messages(make_messages(pool.config, 3))
+
+    assert results == [True, True, True]
+    assert len(smtp_server.state.messages) == 3
+    assert smtp_server.state.connections == 2
+    assert pool.stats()["reconnects"] == 1
+    pool.close()
+
+
+def test_rejected_message_does_not_break_session(smtp_server):
+    smtp_server.state.reject_rcpt = {"to1@example.com"}
+    pool = make_pool(smtp_server)
+    results = pool.send_messages(make_messages(pool.config, 3))
+
+    assert results == [True, False, True]
+    assert smtp_server.state.connections == 1
+    pool.close()
+
+
+def test_idle_sessions_are_closed(smtp_server):
+    pool = make_pool(smtp_server, idle_timeout=0.01)
+    pool.send_messages(make_messages(pool.config, 1))
+    time.sleep(0.02)
+
+    assert pool.close_idle() == 1
+    assert pool.stats()["idle"] == 0
+
+
+def test_unreachable_relay_reports_failure():
+    pool = SMTPConnectionPool(SMTPConfig(host="127.0.0.1", port=1, timeout=0.5))
+    assert pool.send_messages(make_messages(pool.config, 2)) == [False, False]
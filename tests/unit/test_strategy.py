@@ -0,0 +1,131 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from login.auth import current_active_claims, get_check_router
+from login.cache import user_cache, user_version
+from login.revocation import RevocationList
+from login.strategy import LoginJWTStrategy, TokenClaims
+
+SECRET = "strategy-test-secret-with-enough-bytes"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    state = RevocationList()
+    monkeypatch.setattr("login.strategy.revocations", state)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_plain_tokens_carry_no_claims(make_user):
+    strategy = LoginJWTStrategy(SECRET, 60)
+    token = await strategy.write_token(make_user())
+    assert "ver" not in strategy.decode(token)
+    assert strategy.read_claims(token) is None
+
+
+@pytest.mark.asyncio
+async def test_claims_round_trip(make_user):
+    strategy = LoginJWTStrategy(SECRET, 60, embed_claims=True)
+    user = make_user()
+    claims = strategy.read_claims(await strategy.write_token(user))
+
+    assert claims.user_id == user.id
+    assert claims.is_active and claims.is_verified and not claims.is_superuser
+    assert claims.version == user_version(user)
+    assert claims.expires_at is not None
+
+
+def test_invalid_token_has_no_claims():
+    strategy = LoginJWTStrategy(SECRET, 60, embed_claims=True)
+    assert strategy.read_claims("not-a-token") is None
+    assert strategy.read_claims(None) is None
+
+
+def test_version_changes_with_security_fields(make_user):
+    user = make_user()
+    assert user_version(user) != user_version(make_user(is_active=False))
+    assert user_version(user) != user_version(make_user(hashed_password="new"))
+    assert user_version(user) == user_version(make_user(full_name="Renamed"))
+
+
+@pytest.mark.asyncio
+async def test_current_claims_skip_database_when_version_is_cached(make_user):
+    strategy = LoginJWTStrategy(SECRET, 60, embed_claims=True)
+    user = make_user()
+    token = await strategy.write_token(user)
+    user_cache.put(user)
+    manager = MagicMock()
+    manager.get_cached = AsyncMock()
+
+    claims = await current_active_claims(token, strategy, manager)
+
+    assert isinstance(claims, TokenClaims)
+    manager.get_cached.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_current_claims_trusted_on_a_cold_cache(revocations, make_user):
+    strategy = LoginJWTStrategy(SECRET, 60, embed_claims=True)
+    token = await strategy.write_token(make_user())
+    manager = MagicMock()
+    manager.get_cached = AsyncMock()
+
+    await current_active_claims(token, strategy, manager)
+
+    manager.get_cached.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_claims_cutoff_distrusts_earlier_tokens(revocations, make_user):
+    strategy = LoginJWTStrategy(SECRET, 60, embed_claims=True)
+    user = make_user()
+    old = strategy.read_claims(await strategy.write_token(user))
+    await revocations.expire_claims(AsyncMock(), user.id)
+    new = strategy.read_claims(await strategy.write_token(user))
+
+    assert not strategy.is_current(old)
+    assert strategy.is_current(new)
+
+
+@pytest.mark.asyncio
+async def test_current_claims_refresh_from_database_when_version_moves_on(make_user):
+    strategy = LoginJWTStrategy(SECRET, 60, embed_claims=True)
+    user = make_user()
+    token = await strategy.write_token(user)
+    deactivated = make_user(id=user.id, is_active=False)
+    user_cache.put(deactivated)
+    manager = MagicMock()
+    manager.parse_id = lambda value: uuid.UUID(value)
+    manager.get_cached = AsyncMock(return_value=deactivated)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await current_active_claims(token, strategy, manager)
+
+    assert exc_info.value.status_code == 401
+    manager.get_cached.assert_awaited_once_with(user.id)
+
+
+def test_check_route_answers_from_claims(make_user):
+    user = make_user()
+    app = FastAPI()
+    app.include_router(get_check_router(), prefix="/auth")
+    app.dependency_overrides[current_active_claims] = lambda: TokenClaims.from_user(
+        user
+    )
+
+    response = TestClient(app).get("/auth/check")
+
+    assert response.status_code == 204
+    assert response.headers["X-User-Id"] == str(user.id)
@@ -0,0 +1,81 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from userdb.schemas import UserRead
+
+from login.auth import current_active_user, get_user_manager
+from login.users import (
+    UserRepresentations,
+    get_users_router,
+    get_users_update_router,
+)
+
+
+def test_representation_is_rendered_once_per_version(make_user):
+    representations = UserRepresentations(UserRead)
+    user = make_user(email="etag@example.com", full_name="Etag User")
+
+    etag, body = representations.get(user)
+    assert json.loads(body) == {
+        "id": str(user.id),
+        "email": "etag@example.com",
+        "is_active": True,
+        "is_superuser": False,
+        "is_verified": True,
+        "full_name": "Etag User",
+    }
+    assert representations.get(user) == (etag, body)
+    assert (representations.renders, representations.hits) == (1, 1)
+
+    # Any readable field change yields a new body and ETag; the password
+    # hash is not part of the representation.
+    user.hashed_password = "other"
+    assert representations.get(user)[0] == etag
+    user.full_name = "Renamed"
+    new_etag, new_body = representations.get(user)
+    assert new_etag != etag
+    assert json.loads(new_body)["full_name"] == "Renamed"
+
+
+def test_representations_are_bounded(make_user):
+    representations = UserRepresentations(UserRead, max_size=2)
+    for _ in range(3):
+        representations.get(make_user())
+    assert representations.stats()["size"] == 2
+
+
+def test_users_router_replaces_rather_than_shadows_the_gets():
+    routes = get_users_router().routes
+    names = [route.name for route in routes]
+    assert len(names) == len(set(names))
+    assert {(route.path, *route.methods) for route in routes} == {
+        ("/me", "GET"),
+        ("/me", "PATCH"),
+        ("/{id}", "GET"),
+        ("/{id}", "PATCH"),
+        ("/{id}", "DELETE"),
+    }
+
+
+def test_patch_me_updates_the_primary_row_not_the_cached_one(make_user):
+    stale = make_user(email="old@example.com", full_name="Stale")
+    primary = make_user(id=stale.id, email="new@example.com", full_name="Primary")
+    manager = MagicMock()
+    manager.get = AsyncMock(return_value=primary)
+    manager.update = AsyncMock(side_effect=lambda update, user, **kwargs: user)
+    app = FastAPI()
+    app.include_router(get_users_update_router(), prefix="/users")
+    app.dependency_overrides[current_active_user] = lambda: stale
+    app.dependency_overrides[get_user_manager] = lambda: manager
+
+    response = TestClient(app).patch("/users/me", json={"full_name": "Renamed"})
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "new@example.com"
+    manager.get.assert_awaited_once_with(stale.id)
+    (update, user), kwargs = manager.update.call_args
+    assert user is primary
+    assert update.full_name == "Renamed"
+    assert kwargs["safe"] is True